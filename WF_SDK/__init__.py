@@ -6,12 +6,16 @@ from WF_SDK import device
 from WF_SDK import scope
 from WF_SDK import wavegen
 from WF_SDK import supplies
+from WF_SDK import monitor
 from WF_SDK import dmm
 from WF_SDK import logic
 from WF_SDK import pattern
 from WF_SDK import static
+from WF_SDK import sequencer
 from WF_SDK import protocol
+from WF_SDK import rack
 
 from WF_SDK import tools
+from WF_SDK import backend
 
 from WF_SDK.device import error, warning
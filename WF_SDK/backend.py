@@ -0,0 +1,200 @@
+""" BACKEND SELECTION: native, simulated, use, current, checked, shadowed, invalidate, written """
+
+from os import environ            # environment variables
+from WF_SDK import loader         # resolves the dynamic library
+from WF_SDK import prototypes     # declares the argument types of the functions
+
+"""-----------------------------------------------------------------------"""
+
+class __library__:
+    """ forwards every function call to the selected backend """
+    def __getattr__(self, name):
+        # resolve the function once, later calls find it as an attribute
+        function = getattr(current(), name)
+        setattr(self, name, function)
+        return function
+
+# every instrument calls the WaveForms functions through this object
+dwf = __library__()
+
+"""-----------------------------------------------------------------------"""
+
+class __checked__:
+    """ calls the WaveForms functions and raises an error when they fail """
+    def __getattr__(self, name):
+        function = getattr(dwf, name)
+        def call(*arguments):
+            if name in __resets__:
+                invalidate(arguments[0] if arguments else None, __resets__[name])
+            elif __shadow__ and name.endswith("Set"):
+                # a setter called without the shadow makes the shadowed value unknown
+                __forget__(name, arguments)
+            if function(*arguments) == 0:
+                # imported here, as the device module imports the backend
+                from WF_SDK.device import check_error
+                check_error(2)  # report the instrument function as the caller
+            return
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+# the instruments call the functions through this object when a failure is an error
+checked = __checked__()
+
+"""-----------------------------------------------------------------------"""
+
+class __shadowed__:
+    """ calls the WaveForms setters like checked, but skips the call if it would write the value already written """
+    def __getattr__(self, name):
+        function = getattr(dwf, name)
+        def call(handle, *arguments):
+            registers = __shadow__.setdefault(__value__(handle), {}).setdefault(name, {})
+            address = tuple(__value__(argument) for argument in arguments[:-1])
+            value = __value__(arguments[-1])
+            if registers.get(address, __missing__) == value:
+                return
+            __forget__(name, (handle,) + arguments)
+            if function(handle, *arguments) == 0:
+                from WF_SDK.device import check_error
+                check_error(2)
+                return
+            registers[address] = value
+            return
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+# the instruments call the setters through this object when rewriting the same value is redundant
+shadowed = __shadowed__()
+
+# the last value written through shadowed: {handle: {function name: {(channel, node, ...): value}}}
+__shadow__ = {}
+__missing__ = object()
+
+# the reset functions and the setters they reset
+__resets__ = {"FDwfDeviceReset": "FDwf", "FDwfDeviceClose": "FDwf", "FDwfDeviceCloseAll": "FDwf",
+              "FDwfAnalogInReset": "FDwfAnalogIn", "FDwfAnalogOutReset": "FDwfAnalogOut", "FDwfAnalogIOReset": "FDwfAnalogIO",
+              "FDwfDigitalInReset": "FDwfDigitalIn", "FDwfDigitalOutReset": "FDwfDigitalOut", "FDwfDigitalIOReset": "FDwfDigitalIO"}
+
+__selected__ = None   # the backend in use, selected on the first call
+
+"""-----------------------------------------------------------------------"""
+
+def native(path=None):
+    """
+        load the WaveForms dynamic library
+
+        parameters: - path of the library, default is None (the WF_SDK_LIBRARY environment variable, or the OS specific default)
+
+        returns:    - the loaded library
+    """
+    return prototypes.declare(loader.load_library(path))
+
+"""-----------------------------------------------------------------------"""
+
+def simulated():
+    """
+        load the simulated device, which needs no hardware and no dynamic library
+
+        returns:    - the simulator module
+    """
+    from WF_SDK import simulator
+    return simulator
+
+"""-----------------------------------------------------------------------"""
+
+def use(backend):
+    """
+        select the backend used by every instrument
+
+        parameters: - backend: native, simulated, or any object providing the FDwf* functions
+                      (native and simulated can be passed without calling them)
+    """
+    global __selected__
+    if backend is native or backend is simulated:
+        backend = backend()
+    __selected__ = backend
+    # forget the functions resolved from the previous backend
+    dwf.__dict__.clear()
+    checked.__dict__.clear()
+    shadowed.__dict__.clear()
+    __shadow__.clear()
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def current():
+    """
+        return the backend in use, select it on the first call
+
+        the WF_SDK_BACKEND environment variable chooses the default: "native" (default), or "simulated"
+    """
+    if __selected__ is None:
+        if environ.get("WF_SDK_BACKEND", "native").lower() == "simulated":
+            use(simulated)
+        else:
+            use(native)
+    return __selected__
+
+"""-----------------------------------------------------------------------"""
+
+def invalidate(handle=None, prefix="FDwf"):
+    """
+        forget the values written through shadowed, so the next calls write them again
+
+        the reset and close functions called through checked do this themselves
+
+        parameters: - device handle, default is None (every device)
+                    - function name prefix, like "FDwfAnalogIn", default is "FDwf" (every function)
+    """
+    if prefix == "FDwf":
+        if handle is None:
+            __shadow__.clear()
+        else:
+            __shadow__.pop(__value__(handle), None)
+        return
+    if handle is None:
+        devices = list(__shadow__.values())
+    else:
+        devices = [__shadow__.get(__value__(handle), {})]
+    for functions in devices:
+        for name in [name for name in functions if name.startswith(prefix)]:
+            del functions[name]
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def written(handle, name, *address):
+    """
+        return the value last written through shadowed, or None if it is unknown
+
+        parameters: - device handle
+                    - function name, like "FDwfAnalogOutNodeFunctionSet"
+                    - the arguments between the handle and the value, like the channel and the node
+    """
+    registers = __shadow__.get(__value__(handle), {}).get(name, {})
+    return registers.get(tuple(__value__(argument) for argument in address))
+
+"""-----------------------------------------------------------------------"""
+
+def __forget__(name, arguments):
+    """
+        forget the shadowed values a setter call overwrites (-1 addresses every channel, or node)
+    """
+    if len(arguments) == 0:
+        return
+    registers = __shadow__.get(__value__(arguments[0]), {}).get(name)
+    if not registers:
+        return
+    address = tuple(__value__(argument) for argument in arguments[1:-1])
+    for key in [key for key in registers if key == address or -1 in key or -1 in address]:
+        del registers[key]
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __value__(argument):
+    """
+        return the value of a ctypes argument, or the argument itself
+    """
+    return getattr(argument, "value", argument)
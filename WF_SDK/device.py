@@ -1,4 +1,4 @@
-""" DEVICE CONTROL FUNCTIONS: open, check_error, close, temperature """
+""" DEVICE CONTROL FUNCTIONS: open, check_error, close, temperature, wait, instrument, node """
 
 """
 import ctypes                            # import the C compatible data types
@@ -21,28 +21,17 @@ else:
 """-----------------------------------------------------------------------"""
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
+import builtins                   # the built-in open, hidden by device.open
+import copy                       # copies of the cached lists
 import inspect                    # caller function data
+import json                       # capability cache format
+import os                         # capability cache file handling
+import threading                  # devices opened from several threads
+from time import sleep, perf_counter  # needed for waiting on instruments
 
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
+# import constants and the library
+from WF_SDK.loader import constants, cache_path
+from WF_SDK.backend import dwf, checked, invalidate
 
 """-----------------------------------------------------------------------"""
 
@@ -87,8 +76,26 @@ class warning(Exception):
     def __str__(self):
         return "Warning: " + self.instrument + " -> " + self.function + " -> " + self.message
 
+class wait_policy:
+    """ controls how the instruments wait for an acquisition to finish """
+    sleep_fraction = 0.9    # part of the estimated acquisition time spent sleeping
+    min_sleep = 1e-03       # shorter estimated acquisition times are not slept through
+    min_interval = 1e-04    # first polling interval in seconds
+    max_interval = 10e-03   # longest polling interval in seconds
+    backoff = 2             # polling interval multiplier
+    timeout = 0             # timeout in seconds, 0 means no timeout
+
+class capability_cache:
+    """ controls the on-disk cache of the device information read by open """
+    enabled = True              # set to False to read the information from the device on every open
+    file_name = "capabilities.json"
+
 class data:
-    """ stores the device handle, the device name and the device data """
+    """
+        stores the device handle, the device name and the device data
+
+        device.open() returns a new instance for every device, the class attributes are the defaults
+    """
     handle = ctypes.c_int(0)
     name = ""
     version = ""
@@ -127,6 +134,7 @@ class data:
             max_read_range = []
             set_steps = []
             read_steps = []
+            index = {}      # (channel label, node name): (channel, node), built by open
     class digital:
         class input:
             channel_count = 0
@@ -134,6 +142,33 @@ class data:
         class output:
             channel_count = 0
             max_buffer_size = 0
+    def __init__(self):
+        # every device owns its handle, its information and the state of its instruments
+        self.handle = ctypes.c_int(0)
+        self.name = ""
+        self.version = ""
+        self.analog = __namespace__(data.analog)
+        self.digital = __namespace__(data.digital)
+        self.instruments = {}
+        return
+
+class __namespace__:
+    """ a copy of a class-level namespace, owned by a single device """
+    def __init__(self, template):
+        for name, value in vars(template).items():
+            if name in vars(__empty__):
+                continue
+            if isinstance(value, type):
+                value = __namespace__(value)
+            elif isinstance(value, (list, dict)):
+                value = copy.copy(value)
+            elif isinstance(value, type(threading.Lock())):
+                value = threading.Lock()    # every device gets its own lock
+            setattr(self, name, value)
+        return
+
+class __empty__:
+    """ lists the attributes every class has """
 
 """-----------------------------------------------------------------------"""
 
@@ -141,6 +176,11 @@ def open(device=None, config=0):
     """
         open a specific device
 
+        the device information is cached on disk (see capability_cache), keyed by the device ID, revision,
+        serial number, configuration and WaveForms version, so reopening a known device does not query it again
+
+        every call returns a new device data object, so several devices can be used at the same time
+
         parameters: - device type: None (first device), "Analog Discovery", "Analog Discovery 2", "Analog Discovery Studio", "Digital Discovery", "Analog Discovery Pro 3X50", "Analog Discovery Pro 5250"
                     - configuration: 0 = auto, default = auto
 
@@ -179,10 +219,12 @@ def open(device=None, config=0):
 
     # check connected device type
     device_name = ""
+    device_key = None
     if device_handle.value != 0:
         device_id = ctypes.c_int()
         device_rev = ctypes.c_int()
         dwf.FDwfEnumDeviceType(ctypes.c_int(index - 1), ctypes.byref(device_id), ctypes.byref(device_rev))
+        device_key = __info_key__(index - 1, device_id.value, device_rev.value, config)
 
         # decode device id
         for pair in device_names:
@@ -192,33 +234,41 @@ def open(device=None, config=0):
 
     # check for errors
     # if the device handle is empty after a connection attempt
-    if device_handle == constants.hdwfNone:
+    if device_handle.value == constants.hdwfNone.value:
         # check for errors
         err_nr = ctypes.c_int() # variable for error number
         dwf.FDwfGetLastError(ctypes.byref(err_nr));  # get error number
         # if there is an error
-        if err_nr != constants.dwfercNoErc:
+        if err_nr.value != constants.dwfercNoErc.value:
             # check the error message
             check_error()
-
-    global data
-    data.handle = device_handle
-    data.name = device_name
-    data = __get_info__(data)
-    return data
+        raise error("Every connected device is busy", "open", "device")
+
+    device_data = data()
+    device_data.handle = device_handle
+    device_data.name = device_name
+    # use the cached device information if this device was already seen
+    if not __load_info__(device_data, device_key):
+        device_data = __get_info__(device_data)
+        __save_info__(device_data, device_key)
+    __index_nodes__(device_data)
+    return device_data
 
 """-----------------------------------------------------------------------"""
 
-def check_error():
+def check_error(depth=1):
     """
         check for errors
+
+        parameters: - depth of the caller in the call stack, default is 1 (the function calling check_error)
     """
     err_msg = ctypes.create_string_buffer(512)        # variable for the error message
     dwf.FDwfGetLastErrorMsg(err_msg)                  # get the error message
     err_msg = err_msg.value.decode("ascii")           # format the message
     if err_msg != "":
-        err_func = inspect.stack()[1].function        # get caller function
-        err_inst = inspect.stack()[1].filename        # get caller file name
+        caller = inspect.stack()[depth]
+        err_func = caller.function                    # get caller function
+        err_inst = caller.filename                    # get caller file name
         # delete the extension
         err_inst = err_inst.split('.')[0]
         # delete the path
@@ -234,11 +284,17 @@ def check_error():
 def close(device_data):
     """
         close a specific device
+
+        parameters: - device data, passing the device.data class closes every device (for error handlers)
     """
-    if device_data.handle != 0:
+    if device_data is data:
+        dwf.FDwfDeviceCloseAll()
+        invalidate()
+    elif device_data.handle.value != 0:
         dwf.FDwfDeviceClose(device_data.handle)
-    data.handle = ctypes.c_int(0)
-    data.name = ""
+        invalidate(device_data.handle)
+    device_data.handle = ctypes.c_int(0)
+    device_data.name = ""
     return
 
 """-----------------------------------------------------------------------"""
@@ -247,44 +303,108 @@ def temperature(device_data):
     """
         return the board temperature
     """
-    channel = -1
-    node = -1
-    # find the system monitor
-    for channel_index in range(device_data.analog.IO.channel_count):
-        if device_data.analog.IO.channel_label[channel_index] == "System":
-            channel = channel_index
-            break
-    if channel < 0:
-        return 0
-    
-    # find the temperature node
-    for node_index in range(device_data.analog.IO.node_count[channel]):
-        if device_data.analog.IO.node_name[channel][node_index] == "Temp":
-            node = node_index
-            break
-    if node < 0:
+    # find the temperature node of the system monitor
+    channel, node_index = node(device_data, "System", "Temp")
+    if node_index < 0:
         return 0
     
     # read the temperature
-    if dwf.FDwfAnalogIOStatus(device_data.handle) == 0:
-        check_error()
+    checked.FDwfAnalogIOStatus(device_data.handle)
     temperature = ctypes.c_double()
-    if dwf.FDwfAnalogIOChannelNodeStatus(device_data.handle, ctypes.c_int(channel), ctypes.c_int(node), ctypes.byref(temperature)) == 0:
-        check_error()
+    checked.FDwfAnalogIOChannelNodeStatus(device_data.handle, channel, node_index, ctypes.byref(temperature))
     return temperature.value
 
 """-----------------------------------------------------------------------"""
 
+def wait(ready, duration=0, function="wait", instrument="device", timeout=None):
+    """
+        wait for an instrument without keeping a CPU core busy
+
+        parameters: - ready: function without parameters, returns True when the instrument is done
+                    - duration: estimated time to completion in seconds, default is 0 (unknown)
+                    - function and instrument name reported on timeout
+                    - timeout in seconds, default is None (wait_policy.timeout), 0 means no timeout
+
+        the estimated time is mostly slept through, then the instrument is polled
+        with growing intervals, as set in wait_policy
+    """
+    start = perf_counter()
+    if timeout is None:
+        timeout = wait_policy.timeout
+
+    # sleep most of the expected time
+    if duration >= wait_policy.min_sleep:
+        sleep(duration * wait_policy.sleep_fraction)
+    
+    # poll with backoff
+    interval = wait_policy.min_interval
+    while not ready():
+        if timeout > 0 and perf_counter() - start > timeout:
+            raise error("Timeout while waiting for the instrument", function, instrument)
+        sleep(interval)
+        interval = min(interval * wait_policy.backoff, wait_policy.max_interval)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def instrument(device_data, template):
+    """
+        return the state of an instrument on a device
+
+        parameters: - device data
+                    - the data class of the instrument module, its class attributes are the defaults
+
+        returns:    - the state owned by the device, created from the defaults on first use
+    """
+    if device_data is data:
+        return template     # no device object, use the module-level state
+    state = device_data.instruments.get(template.__module__)
+    if state is None:
+        # threads using the same instrument must get the same state
+        with __instrument_lock__:
+            state = device_data.instruments.get(template.__module__)
+            if state is None:
+                state = __namespace__(template)
+                device_data.instruments[template.__module__] = state
+    return state
+
+"""-----------------------------------------------------------------------"""
+
+def node(device_data, channel_label, node_name):
+    """
+        find a node of the analog IO channels
+
+        parameters: - device data
+                    - channel label, like "V+", "VDD", or "DMM", or a list of alternative labels
+                    - node name, like "Enable", "Voltage", or "Drive"
+
+        returns:    - (channel index, node index), or (-1, -1) if the device has no such node
+    """
+    if isinstance(channel_label, str):
+        channel_label = [channel_label]
+    for label in channel_label:
+        indices = device_data.analog.IO.index.get((label, node_name))
+        if indices is not None:
+            return indices
+    return -1, -1
+
+"""-----------------------------------------------------------------------"""
+
 def __get_info__(device_data):
     """
         get and return device information
     """
     # check WaveForms version
     version = ctypes.create_string_buffer(16)
-    if dwf.FDwfGetVersion(version) == 0:
-        check_error()
+    checked.FDwfGetVersion(version)
     device_data.version = str(version.value)[2:-1]
 
+    # empty the lists filled by a previous call
+    for _, section in __info_sections__(device_data):
+        for name in __info_fields__(section):
+            if isinstance(getattr(section, name), list):
+                setattr(section, name, [])
+
     # define temporal variables
     temp1 = ctypes.c_int()
     temp2 = ctypes.c_int()
@@ -292,43 +412,36 @@ def __get_info__(device_data):
 
     # analog input information
     # channel count
-    if dwf.FDwfAnalogInChannelCount(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfAnalogInChannelCount(device_data.handle, ctypes.byref(temp1))
     device_data.analog.input.channel_count = temp1.value
     # buffer size
-    if dwf.FDwfAnalogInBufferSizeInfo(device_data.handle, 0, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfAnalogInBufferSizeInfo(device_data.handle, None, ctypes.byref(temp1))
     device_data.analog.input.max_buffer_size = temp1.value
     # ADC resolution
-    if dwf.FDwfAnalogInBitsInfo(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfAnalogInBitsInfo(device_data.handle, ctypes.byref(temp1))
     device_data.analog.input.max_resolution = temp1.value
     # range information
     temp1 = ctypes.c_double()
     temp2 = ctypes.c_double()
     temp3 = ctypes.c_double()
-    if dwf.FDwfAnalogInChannelRangeInfo(device_data.handle, ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3)) == 0:
-        check_error()
+    checked.FDwfAnalogInChannelRangeInfo(device_data.handle, ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3))
     device_data.analog.input.min_range = temp1.value
     device_data.analog.input.max_range = temp2.value
     device_data.analog.input.steps_range = int(temp3.value)
     # offset information
-    if dwf.FDwfAnalogInChannelOffsetInfo(device_data.handle, ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3)) == 0:
-        check_error()
+    checked.FDwfAnalogInChannelOffsetInfo(device_data.handle, ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3))
     device_data.analog.input.min_offset = temp1.value
     device_data.analog.input.max_offset = temp2.value
     device_data.analog.input.steps_offset = int(temp3.value)
 
     # analog output information
     temp1 = ctypes.c_int()
-    if dwf.FDwfAnalogOutCount(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfAnalogOutCount(device_data.handle, ctypes.byref(temp1))
     device_data.analog.output.channel_count = temp1.value
     for channel_index in range(device_data.analog.output.channel_count):
         # check node types and node count
         temp1 = ctypes.c_int()
-        if dwf.FDwfAnalogOutNodeInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.byref(temp1)) == 0:
-            check_error()
+        checked.FDwfAnalogOutNodeInfo(device_data.handle, channel_index, ctypes.byref(temp1))
         templist = []
         for node_index in range(3):
             if ((1 << node_index) & int(temp1.value)) == 0:
@@ -344,8 +457,7 @@ def __get_info__(device_data):
         # buffer size
         templist = []
         for node_index in range(device_data.analog.output.node_count[channel_index]):
-            if dwf.FDwfAnalogOutNodeDataInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), 0, ctypes.byref(temp1)) == 0:
-                check_error()
+            checked.FDwfAnalogOutNodeDataInfo(device_data.handle, channel_index, node_index, None, ctypes.byref(temp1))
             templist.append(temp1.value)
         device_data.analog.output.max_buffer_size.append(templist)
         # amplitude information
@@ -354,8 +466,7 @@ def __get_info__(device_data):
         temp1 = ctypes.c_double()
         temp2 = ctypes.c_double()
         for node_index in range(device_data.analog.output.node_count[channel_index]):
-            if dwf.FDwfAnalogOutNodeAmplitudeInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), ctypes.byref(temp1), ctypes.byref(temp2)) == 0:
-                check_error()
+            checked.FDwfAnalogOutNodeAmplitudeInfo(device_data.handle, channel_index, node_index, ctypes.byref(temp1), ctypes.byref(temp2))
             templist1.append(temp1.value)
             templist2.append(temp2.value)
         device_data.analog.output.min_amplitude.append(templist1)
@@ -364,8 +475,7 @@ def __get_info__(device_data):
         templist1 = []
         templist2 = []
         for node_index in range(device_data.analog.output.node_count[channel_index]):
-            if dwf.FDwfAnalogOutNodeOffsetInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), ctypes.byref(temp1), ctypes.byref(temp2)) == 0:
-                check_error()
+            checked.FDwfAnalogOutNodeOffsetInfo(device_data.handle, channel_index, node_index, ctypes.byref(temp1), ctypes.byref(temp2))
             templist1.append(temp1.value)
             templist2.append(temp2.value)
         device_data.analog.output.min_offset.append(templist1)
@@ -374,8 +484,7 @@ def __get_info__(device_data):
         templist1 = []
         templist2 = []
         for node_index in range(device_data.analog.output.node_count[channel_index]):
-            if dwf.FDwfAnalogOutNodeFrequencyInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), ctypes.byref(temp1), ctypes.byref(temp2)) == 0:
-                check_error()
+            checked.FDwfAnalogOutNodeFrequencyInfo(device_data.handle, channel_index, node_index, ctypes.byref(temp1), ctypes.byref(temp2))
             templist1.append(temp1.value)
             templist2.append(temp2.value)
         device_data.analog.output.min_frequency.append(templist1)
@@ -384,21 +493,18 @@ def __get_info__(device_data):
     # analog IO information
     # channel count
     temp1 = ctypes.c_int()
-    if dwf.FDwfAnalogIOChannelCount(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfAnalogIOChannelCount(device_data.handle, ctypes.byref(temp1))
     device_data.analog.IO.channel_count = temp1.value
     for channel_index in range(device_data.analog.IO.channel_count):
         # channel names and labels
         temp1 = ctypes.create_string_buffer(256)
         temp2 = ctypes.create_string_buffer(256)
-        if dwf.FDwfAnalogIOChannelName(device_data.handle, ctypes.c_int(channel_index), temp1, temp2) == 0:
-            check_error()
+        checked.FDwfAnalogIOChannelName(device_data.handle, channel_index, temp1, temp2)
         device_data.analog.IO.channel_name.append(str(temp1.value)[2:-1])
         device_data.analog.IO.channel_label.append(str(temp2.value)[2:-1])
         # check node count
         temp1 = ctypes.c_int()
-        if dwf.FDwfAnalogIOChannelInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.byref(temp1)) == 0:
-            check_error()
+        checked.FDwfAnalogIOChannelInfo(device_data.handle, channel_index, ctypes.byref(temp1))
         device_data.analog.IO.node_count.append(temp1.value)
         # node names and units
         templist1 = []
@@ -406,8 +512,7 @@ def __get_info__(device_data):
         for node_index in range(device_data.analog.IO.node_count[channel_index]):
             temp1 = ctypes.create_string_buffer(256)
             temp2 = ctypes.create_string_buffer(256)
-            if dwf.FDwfAnalogIOChannelNodeName(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), temp1, temp2) == 0:
-                check_error()
+            checked.FDwfAnalogIOChannelNodeName(device_data.handle, channel_index, node_index, temp1, temp2)
             templist1.append(str(temp1.value)[2:-1])
             templist2.append(str(temp2.value)[2:-1])
         device_data.analog.IO.node_name.append(templist1)
@@ -420,8 +525,7 @@ def __get_info__(device_data):
         temp2 = ctypes.c_double()
         temp3 = ctypes.c_int()
         for node_index in range(device_data.analog.IO.node_count[channel_index]):
-            if dwf.FDwfAnalogIOChannelNodeSetInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3)) == 0:
-                check_error()
+            checked.FDwfAnalogIOChannelNodeSetInfo(device_data.handle, channel_index, node_index, ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3))
             templist1.append(temp1.value)
             templist2.append(temp2.value)
             templist3.append(temp3.value)
@@ -433,8 +537,7 @@ def __get_info__(device_data):
         templist2 = []
         templist3 = []
         for node_index in range(device_data.analog.IO.node_count[channel_index]):
-            if dwf.FDwfAnalogIOChannelNodeStatusInfo(device_data.handle, ctypes.c_int(channel_index), ctypes.c_int(node_index), ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3)) == 0:
-                check_error()
+            checked.FDwfAnalogIOChannelNodeStatusInfo(device_data.handle, channel_index, node_index, ctypes.byref(temp1), ctypes.byref(temp2), ctypes.byref(temp3))
             templist1.append(temp1.value)
             templist2.append(temp2.value)
             templist3.append(temp3.value)
@@ -445,22 +548,132 @@ def __get_info__(device_data):
     # digital input information
     # channel count
     temp1 = ctypes.c_int()
-    if dwf.FDwfDigitalInBitsInfo(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfDigitalInBitsInfo(device_data.handle, ctypes.byref(temp1))
     device_data.digital.input.channel_count = temp1.value
     # buffer size
-    if dwf.FDwfDigitalInBufferSizeInfo(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfDigitalInBufferSizeInfo(device_data.handle, ctypes.byref(temp1))
     device_data.digital.input.max_buffer_size = temp1.value
 
     # digital output information
     # channel count
-    if dwf.FDwfDigitalOutCount(device_data.handle, ctypes.byref(temp1)) == 0:
-        check_error()
+    checked.FDwfDigitalOutCount(device_data.handle, ctypes.byref(temp1))
     device_data.digital.output.channel_count = temp1.value
     # buffer size
-    if dwf.FDwfDigitalOutDataInfo(device_data.handle, ctypes.c_int(0), ctypes.byref(temp1)) == 0:
-        check_error()
+    temp1 = ctypes.c_uint()
+    checked.FDwfDigitalOutDataInfo(device_data.handle, 0, ctypes.byref(temp1))
     device_data.digital.output.max_buffer_size = temp1.value
 
     return device_data
+
+"""-----------------------------------------------------------------------"""
+
+def __index_nodes__(device_data):
+    """
+        map every (channel label, node name) pair of the analog IO channels to its indices
+    """
+    device_data.analog.IO.index = {}
+    for channel_index in range(device_data.analog.IO.channel_count):
+        label = device_data.analog.IO.channel_label[channel_index]
+        for node_index in range(device_data.analog.IO.node_count[channel_index]):
+            # keep the first node if a name is repeated, like the linear search did
+            device_data.analog.IO.index.setdefault((label, device_data.analog.IO.node_name[channel_index][node_index]), (channel_index, node_index))
+    return
+
+"""-----------------------------------------------------------------------"""
+
+# the cached device information, read from the disk on the first open
+__info_cache__ = None
+__info_lock__ = threading.Lock()   # devices can be opened from several threads
+__instrument_lock__ = threading.Lock()   # the state of an instrument is created once, even from several threads
+
+def __info_sections__(device_data):
+    """
+        return the (name, namespace) pairs of the device information
+    """
+    sections = []
+    for path in ["analog.input", "analog.output", "analog.IO", "digital.input", "digital.output"]:
+        section = device_data
+        for name in path.split("."):
+            section = getattr(section, name)
+        sections.append((path, section))
+    return sections
+
+"""-----------------------------------------------------------------------"""
+
+def __info_fields__(section):
+    """
+        return the names of the values stored in a device information namespace (the node index is rebuilt by open)
+    """
+    return [name for name in vars(section) if not name.startswith("__") and name != "index"]
+
+"""-----------------------------------------------------------------------"""
+
+def __info_key__(index, device_id, device_rev, config):
+    """
+        return the cache key of an enumerated device, or None if it can't be identified
+    """
+    serial = ctypes.create_string_buffer(32)
+    version = ctypes.create_string_buffer(32)
+    if dwf.FDwfEnumSN(index, serial) == 0 or dwf.FDwfGetVersion(version) == 0:
+        return None
+    return "/".join([str(device_id), str(device_rev), serial.value.decode("ascii"), str(config), version.value.decode("ascii")])
+
+"""-----------------------------------------------------------------------"""
+
+def __read_info_cache__():
+    """
+        read every cached device information with a single read, once per session
+    """
+    global __info_cache__
+    if __info_cache__ is None:
+        __info_cache__ = {}
+        try:
+            with builtins.open(os.path.join(cache_path(), capability_cache.file_name), "r") as file:
+                __info_cache__ = json.loads(file.read())
+        except (OSError, ValueError):
+            pass
+    return __info_cache__
+
+"""-----------------------------------------------------------------------"""
+
+def __load_info__(device_data, key):
+    """
+        fill the device data from the cache, return False if the device is not cached
+    """
+    if not capability_cache.enabled or key is None:
+        return False
+    with __info_lock__:
+        info = __read_info_cache__().get(key)
+    if info is None:
+        return False
+    device_data.version = info["version"]
+    for path, section in __info_sections__(device_data):
+        for name, value in info[path].items():
+            setattr(section, name, copy.deepcopy(value))
+    return True
+
+"""-----------------------------------------------------------------------"""
+
+def __save_info__(device_data, key):
+    """
+        add the device data to the cache and rewrite the cache file
+    """
+    if not capability_cache.enabled or key is None:
+        return
+    info = {"version": device_data.version}
+    for path, section in __info_sections__(device_data):
+        info[path] = {name: getattr(section, name) for name in __info_fields__(section)}
+    with __info_lock__:
+        cache = __read_info_cache__()
+        cache[key] = info
+        # write to a temporary file first, so another process never reads a partial file
+        try:
+            os.makedirs(cache_path(), exist_ok=True)
+            file_path = os.path.join(cache_path(), capability_cache.file_name)
+            temporary_path = file_path + "." + str(os.getpid())
+            with builtins.open(temporary_path, "w") as file:
+                file.write(json.dumps(cache))
+            os.replace(temporary_path, file_path)
+        except OSError:
+            pass
+    return
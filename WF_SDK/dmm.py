@@ -1,28 +1,13 @@
-""" DIGITAL MULTIMETER CONTROL FUNCTIONS: open, measure, close """
+""" DIGITAL MULTIMETER CONTROL FUNCTIONS: open, measure, plan, measure_all, stream, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+import numpy                      # fast array handling
+from time import sleep, perf_counter  # needed for timing the readings
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import dwf, checked, shadowed
+from WF_SDK.device import check_error, error, instrument, node
 
 """-----------------------------------------------------------------------"""
 
@@ -42,7 +27,7 @@ class mode:
 """-----------------------------------------------------------------------"""
 
 class data:
-    """ storers instrument information """
+    """ stores instrument information (the defaults, every device keeps its own copy) """
     __channel__ = -1
     class __nodes__:
         __enable__ = -1
@@ -58,32 +43,19 @@ def open(device_data):
     """
         initialize the digital multimeter
     """
-    # find channel
-    for channel_index in range(device_data.analog.IO.channel_count):
-        if device_data.analog.IO.channel_label[channel_index] == "DMM":
-            data.__channel__ = channel_index
-            break
-    
-    # find nodes
-    if data.__channel__ >= 0:
-        for node_index in range(device_data.analog.IO.node_count[data.__channel__]):
-            if device_data.analog.IO.node_name[data.__channel__][node_index] == "Enable":
-                data.__nodes__.__enable__ = node_index
-            elif device_data.analog.IO.node_name[data.__channel__][node_index] == "Mode":
-                data.__nodes__.__mode__ = node_index
-            elif device_data.analog.IO.node_name[data.__channel__][node_index] == "Range":
-                data.__nodes__.__range__ = node_index
-            elif device_data.analog.IO.node_name[data.__channel__][node_index] == "Meas":
-                data.__nodes__.__meas__ = node_index
-            elif device_data.analog.IO.node_name[data.__channel__][node_index] == "Raw":
-                data.__nodes__.__raw__ = node_index
-            elif device_data.analog.IO.node_name[data.__channel__][node_index] == "Input":
-                data.__nodes__.__input__ = node_index
+    dmm_data = instrument(device_data, data)
+
+    # find the channel and the nodes
+    dmm_data.__channel__, dmm_data.__nodes__.__enable__ = node(device_data, "DMM", "Enable")
+    dmm_data.__nodes__.__mode__ = node(device_data, "DMM", "Mode")[1]
+    dmm_data.__nodes__.__range__ = node(device_data, "DMM", "Range")[1]
+    dmm_data.__nodes__.__meas__ = node(device_data, "DMM", "Meas")[1]
+    dmm_data.__nodes__.__raw__ = node(device_data, "DMM", "Raw")[1]
+    dmm_data.__nodes__.__input__ = node(device_data, "DMM", "Input")[1]
 
     # enable the DMM
-    if data.__channel__ >= 0 and data.__nodes__.__enable__ >= 0:
-        if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__enable__), ctypes.c_double(1.0)) == 0:
-            check_error()
+    if dmm_data.__channel__ >= 0 and dmm_data.__nodes__.__enable__ >= 0:
+        checked.FDwfAnalogIOChannelNodeSet(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__enable__, 1.0)
     return
 
 """-----------------------------------------------------------------------"""
@@ -92,6 +64,8 @@ def measure(device_data, mode, range=0, high_impedance=False):
     """
         measure a voltage/current/resistance/continuity/temperature
 
+        the input impedance, the mode and the range are only sent to the device when they change
+
         parameters: - device data
                     - mode: dmm.mode.ac_voltage/dc_voltage/ac_high_current/dc_high_current/ac_low_current/dc_low_current/resistance/continuity/diode/temperature
                     - range: voltage/current/resistance/temperature range, 0 means auto, default is auto
@@ -99,25 +73,11 @@ def measure(device_data, mode, range=0, high_impedance=False):
         
         returns:    - the measured value in V/A/Ω/°C, or None on error
     """
-    if data.__channel__ >= 0:
-        # set input impedance
-        if data.__nodes__.__input__ >= 0:
-            if high_impedance:
-                if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__input__), ctypes.c_double(1)) == 0:
-                    check_error()
-            else:
-                if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__input__), ctypes.c_double(0)) == 0:
-                    check_error()
-
-        # set mode
-        if data.__nodes__.__mode__ >= 0:
-            if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__mode__), mode) == 0:
-                check_error()
-
-        # set range
-        if data.__nodes__.__range__ >= 0:
-            if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__range__), range) == 0:
-                check_error()
+    dmm_data = instrument(device_data, data)
+
+    if dmm_data.__channel__ >= 0:
+        # set input impedance, mode and range
+        __configure__(device_data, mode, range, high_impedance)
 
         # fetch analog IO status
         if dwf.FDwfAnalogIOStatus(device_data.handle) == 0:
@@ -126,24 +86,166 @@ def measure(device_data, mode, range=0, high_impedance=False):
             return None
         
         # get reading
-        if data.__nodes__.__meas__ >= 0:
+        if dmm_data.__nodes__.__meas__ >= 0:
             measurement = ctypes.c_double()
-            if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__meas__), ctypes.byref(measurement)) == 0:
-                check_error()
+            checked.FDwfAnalogIOChannelNodeStatus(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__meas__, ctypes.byref(measurement))
             return measurement.value
     return None
 
 """-----------------------------------------------------------------------"""
 
+def plan(measurements):
+    """
+        order a batch of measurements to switch the mode and the range as rarely as possible
+
+        the measurements are grouped by mode, then by input impedance and range, the groups follow the first appearance of their settings
+
+        parameters: - list of measurements, every measurement is a tuple: (mode, range, high_impedance, tag),
+                      range, high_impedance and tag can be left out (defaults: 0, False, None)
+
+        returns:    - a list of (mode, range, high_impedance, indices) groups, in the order of execution,
+                      where indices are the positions of the measurements in the batch
+    """
+    modes = {}
+    for index, measurement in enumerate(measurements):
+        mode, range, high_impedance, tag = __unpack__(measurement)
+        settings = modes.setdefault(getattr(mode, "value", mode), {})
+        group = settings.setdefault((bool(high_impedance), range), (mode, range, high_impedance, []))
+        group[3].append(index)
+    return [group for settings in modes.values() for group in settings.values()]
+
+"""-----------------------------------------------------------------------"""
+
+def measure_all(device_data, measurements):
+    """
+        measure a batch of values, grouped to switch the mode and the range as rarely as possible (see plan())
+
+        parameters: - device data
+                    - list of measurements, as in plan()
+
+        returns:    - a list of (tag, value) pairs, in the order of the measurements, value is None on error
+                    - a list of (mode, range, high_impedance, count, duration) tuples, one for every group in the
+                      order of execution, duration is the time spent on the group in seconds (with the switching)
+    """
+    results = [None] * len(measurements)
+    timing = []
+    for mode, range, high_impedance, indices in plan(measurements):
+        start = perf_counter()
+        for index in indices:
+            results[index] = (__unpack__(measurements[index])[3], measure(device_data, mode, range, high_impedance))
+        timing.append((mode, range, high_impedance, len(indices), perf_counter() - start))
+    return results, timing
+
+"""-----------------------------------------------------------------------"""
+
+def stream(device_data, mode, range=0, high_impedance=False, rate=10, chunk_size=100, duration=0):
+    """
+        measure continuously at a fixed rate
+
+        the instrument is set up once, then the readings are taken on a schedule counted from the start,
+        so late readings don't shift the following ones (if a reading is more than a period late, the missed ones are skipped)
+
+        parameters: - device data
+                    - mode, range and high_impedance, as in measure()
+                    - rate: readings per second, default is 10, 0 means as fast as possible
+                    - chunk size in readings, default is 100
+                    - duration in seconds, default is 0 (infinite)
+
+        returns:    - a generator of (chunk, achieved rate) tuples, where chunk is a NumPy array with two rows:
+                      the time of the readings in seconds from the start, and the measured values in V/A/Ω/°C,
+                      and achieved rate is the number of readings per second since the start
+                      (the last chunk of a finite stream can be shorter)
+    """
+    dmm_data = instrument(device_data, data)
+    if dmm_data.__channel__ < 0 or dmm_data.__nodes__.__meas__ < 0:
+        raise error("There is no digital multimeter on the device", "stream", "dmm")
+
+    # set up the instrument once
+    __configure__(device_data, mode, range, high_impedance)
+
+    chunk = numpy.empty((2, chunk_size), dtype=numpy.float64)
+    position = 0
+    count = 0           # readings taken
+    slot = 0            # readings scheduled
+    measurement = ctypes.c_double()
+    begin = perf_counter()
+    while True:
+        # wait for the next reading
+        now = perf_counter() - begin
+        if rate > 0:
+            delay = slot / rate - now
+            if delay > 0:
+                sleep(delay)
+                now = perf_counter() - begin
+            elif -delay > 1 / rate:
+                slot = int(now * rate)  # skip the missed readings
+            slot += 1
+        if duration > 0 and now >= duration:
+            break
+
+        # read the DMM
+        checked.FDwfAnalogIOStatus(device_data.handle)
+        checked.FDwfAnalogIOChannelNodeStatus(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__meas__, ctypes.byref(measurement))
+        chunk[0, position] = now
+        chunk[1, position] = measurement.value
+        position += 1
+        count += 1
+
+        if position == chunk_size:
+            yield chunk, count / max(perf_counter() - begin, 1e-09)
+            chunk = numpy.empty((2, chunk_size), dtype=numpy.float64)
+            position = 0
+
+    # return the readings of the last, partial chunk
+    if position > 0:
+        yield chunk[:, :position], count / max(perf_counter() - begin, 1e-09)
+    return
+
+"""-----------------------------------------------------------------------"""
+
 def close(device_data):
     """
         reset the instrument
     """
+    dmm_data = instrument(device_data, data)
+
     # disable the DMM
-    if data.__channel__ >= 0 and data.__nodes__.__enable__ >= 0:
-        if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, ctypes.c_int(data.__channel__), ctypes.c_int(data.__nodes__.__enable__), ctypes.c_double(0)) == 0:
-            check_error()
+    if dmm_data.__channel__ >= 0 and dmm_data.__nodes__.__enable__ >= 0:
+        checked.FDwfAnalogIOChannelNodeSet(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__enable__, 0)
     # reset the instrument
-    if dwf.FDwfAnalogIOReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfAnalogIOReset(device_data.handle)
     return
+
+"""-----------------------------------------------------------------------"""
+
+def __configure__(device_data, mode, range, high_impedance):
+    """
+        set the input impedance, the mode and the range (only the changed ones are sent to the device)
+    """
+    dmm_data = instrument(device_data, data)
+
+    # set input impedance
+    if dmm_data.__nodes__.__input__ >= 0:
+        if high_impedance:
+            shadowed.FDwfAnalogIOChannelNodeSet(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__input__, 1)
+        else:
+            shadowed.FDwfAnalogIOChannelNodeSet(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__input__, 0)
+
+    # set mode
+    if dmm_data.__nodes__.__mode__ >= 0:
+        shadowed.FDwfAnalogIOChannelNodeSet(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__mode__, mode)
+
+    # set range
+    if dmm_data.__nodes__.__range__ >= 0:
+        shadowed.FDwfAnalogIOChannelNodeSet(device_data.handle, dmm_data.__channel__, dmm_data.__nodes__.__range__, range)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __unpack__(measurement):
+    """
+        return the mode, range, high_impedance and tag of a planned measurement, filling in the defaults
+    """
+    if not isinstance(measurement, (tuple, list)):
+        measurement = (measurement,)
+    return tuple(measurement) + (0, False, None)[len(measurement) - 1:]
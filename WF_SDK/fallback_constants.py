@@ -0,0 +1,125 @@
+""" FALLBACK CONSTANTS: the values of dwfconstants used by the package, for running the simulator without WaveForms installed """
+
+from ctypes import c_int, c_ubyte, c_double   # the constants have the C types of dwfconstants
+
+"""-----------------------------------------------------------------------"""
+
+# device handle and enumeration
+hdwfNone = c_int(0)
+enumfilterAll = c_int(0)
+devidEExplorer = c_int(1)
+devidDiscovery = c_int(2)
+devidDiscovery2 = c_int(3)
+devidDDiscovery = c_int(4)
+devidADP3X50 = c_int(6)
+devidADP5250 = c_int(8)
+dwfercNoErc = c_int(0)
+
+# trigger sources
+trigsrcNone = c_ubyte(0)
+trigsrcPC = c_ubyte(1)
+trigsrcDetectorAnalogIn = c_ubyte(2)
+trigsrcDetectorDigitalIn = c_ubyte(3)
+trigsrcAnalogIn = c_ubyte(4)
+trigsrcDigitalIn = c_ubyte(5)
+trigsrcDigitalOut = c_ubyte(6)
+trigsrcAnalogOut1 = c_ubyte(7)
+trigsrcAnalogOut2 = c_ubyte(8)
+trigsrcAnalogOut3 = c_ubyte(9)
+trigsrcAnalogOut4 = c_ubyte(10)
+trigsrcExternal1 = c_ubyte(11)
+trigsrcExternal2 = c_ubyte(12)
+trigsrcExternal3 = c_ubyte(13)
+trigsrcExternal4 = c_ubyte(14)
+
+# instrument states
+DwfStateReady = c_ubyte(0)
+DwfStateConfig = c_ubyte(4)
+DwfStatePrefill = c_ubyte(5)
+DwfStateArmed = c_ubyte(1)
+DwfStateWait = c_ubyte(7)
+DwfStateTriggered = c_ubyte(3)
+DwfStateRunning = c_ubyte(3)
+DwfStateDone = c_ubyte(2)
+stsRdy = c_ubyte(0)
+stsArm = c_ubyte(1)
+stsDone = c_ubyte(2)
+stsTrig = c_ubyte(3)
+stsCfg = c_ubyte(4)
+stsPrefill = c_ubyte(5)
+stsNotDone = c_ubyte(6)
+stsTrigDly = c_ubyte(7)
+stsError = c_ubyte(8)
+stsBusy = c_ubyte(9)
+stsStop = c_ubyte(10)
+
+# acquisition
+acqmodeSingle = c_int(0)
+acqmodeScanShift = c_int(1)
+acqmodeScanScreen = c_int(2)
+acqmodeRecord = c_int(3)
+acqmodeOvers = c_int(4)
+acqmodeSingle1 = c_int(5)
+filterDecimate = c_int(0)
+filterAverage = c_int(1)
+filterMinMax = c_int(2)
+trigtypeEdge = c_int(0)
+trigtypePulse = c_int(1)
+trigtypeTransition = c_int(2)
+trigtypeWindow = c_int(3)
+trigcondRisingPositive = c_int(0)
+trigcondFallingNegative = c_int(1)
+DwfTriggerSlopeRise = c_int(0)
+DwfTriggerSlopeFall = c_int(1)
+DwfTriggerSlopeEither = c_int(2)
+
+# waveform generator
+AnalogOutNodeCarrier = c_int(0)
+AnalogOutNodeFM = c_int(1)
+AnalogOutNodeAM = c_int(2)
+funcDC = c_ubyte(0)
+funcSine = c_ubyte(1)
+funcSquare = c_ubyte(2)
+funcTriangle = c_ubyte(3)
+funcRampUp = c_ubyte(4)
+funcRampDown = c_ubyte(5)
+funcNoise = c_ubyte(6)
+funcPulse = c_ubyte(7)
+funcTrapezium = c_ubyte(8)
+funcSinePower = c_ubyte(9)
+funcCustom = c_ubyte(30)
+funcPlay = c_ubyte(31)
+
+# pattern generator
+DwfDigitalOutTypePulse = c_int(0)
+DwfDigitalOutTypeCustom = c_int(1)
+DwfDigitalOutTypeRandom = c_int(2)
+DwfDigitalOutTypeROM = c_int(3)
+DwfDigitalOutTypeState = c_int(4)
+DwfDigitalOutTypePlay = c_int(5)
+DwfDigitalOutIdleInit = c_int(0)
+DwfDigitalOutIdleLow = c_int(1)
+DwfDigitalOutIdleHigh = c_int(2)
+DwfDigitalOutIdleZet = c_int(3)
+
+# spectrum windows
+DwfWindowRectangular = c_int(0)
+DwfWindowTriangular = c_int(1)
+DwfWindowHamming = c_int(2)
+DwfWindowHann = c_int(3)
+DwfWindowCosine = c_int(4)
+DwfWindowBlackmanHarris = c_int(5)
+DwfWindowFlatTop = c_int(6)
+DwfWindowKaiser = c_int(7)
+
+# digital multimeter modes
+DwfDmmResistance = c_double(1)
+DwfDmmContinuity = c_double(2)
+DwfDmmDiode = c_double(3)
+DwfDmmDCVoltage = c_double(4)
+DwfDmmACVoltage = c_double(5)
+DwfDmmDCCurrent = c_double(6)
+DwfDmmACCurrent = c_double(7)
+DwfDmmDCLowCurrent = c_double(8)
+DwfDmmACLowCurrent = c_double(9)
+DwfDmmTemperature = c_double(10)
@@ -0,0 +1,118 @@
+""" LIBRARY LOADER: library_path, constants_path, cache_path, load_library """
+
+import ctypes                     # import the C compatible data types
+from sys import platform, modules # this is needed to check the OS type and to register the constants
+from os import sep, environ       # OS specific file path separators and environment variables
+from os.path import expanduser    # the home folder of the user
+import importlib.util             # load the constants without changing the PATH
+
+"""-----------------------------------------------------------------------"""
+
+def library_path():
+    """
+        return the path of the WaveForms dynamic library
+
+        the WF_SDK_LIBRARY environment variable overrides the OS specific default
+    """
+    if "WF_SDK_LIBRARY" in environ:
+        return environ["WF_SDK_LIBRARY"]
+    if platform.startswith("win"):
+        # on Windows
+        return "dwf"
+    elif platform.startswith("darwin"):
+        # on macOS
+        return sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
+    else:
+        # on Linux
+        return "libdwf.so"
+
+"""-----------------------------------------------------------------------"""
+
+def constants_path():
+    """
+        return the folder containing dwfconstants.py
+
+        the WF_SDK_CONSTANTS_PATH environment variable overrides the OS specific default
+    """
+    if "WF_SDK_CONSTANTS_PATH" in environ:
+        return environ["WF_SDK_CONSTANTS_PATH"]
+    if platform.startswith("win"):
+        # on Windows
+        return "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
+    elif platform.startswith("darwin"):
+        # on macOS
+        return sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
+    else:
+        # on Linux
+        return sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
+
+"""-----------------------------------------------------------------------"""
+
+def cache_path():
+    """
+        return the folder of the files cached between sessions (the device capabilities)
+
+        the WF_SDK_CACHE_PATH environment variable overrides the OS specific default
+    """
+    if "WF_SDK_CACHE_PATH" in environ:
+        return environ["WF_SDK_CACHE_PATH"]
+    if platform.startswith("win"):
+        # on Windows
+        return environ.get("LOCALAPPDATA", expanduser("~")) + sep + "WF_SDK" + sep + "Cache"
+    elif platform.startswith("darwin"):
+        # on macOS
+        return expanduser("~") + sep + "Library" + sep + "Caches" + sep + "WF_SDK"
+    else:
+        # on Linux
+        return environ.get("XDG_CACHE_HOME", expanduser("~") + sep + ".cache") + sep + "WF_SDK"
+
+"""-----------------------------------------------------------------------"""
+
+def load_library(path=None):
+    """
+        load the WaveForms dynamic library
+
+        parameters: - path of the library, default is None (use library_path())
+
+        returns:    - the loaded library
+    """
+    if path is None:
+        path = library_path()
+    return ctypes.cdll.LoadLibrary(path)
+
+"""-----------------------------------------------------------------------"""
+
+def __load_constants__():
+    """
+        import dwfconstants once, without appending to the PATH
+
+        without WaveForms installed, the values used by the package are taken from fallback_constants,
+        so the simulated backend runs on machines without the SDK
+    """
+    # an explicit path wins, then a module which is already importable, then the default folder
+    if "WF_SDK_CONSTANTS_PATH" not in environ:
+        try:
+            import dwfconstants
+            return dwfconstants
+        except ImportError:
+            pass
+    file_path = constants_path() + sep + "dwfconstants.py"
+    specification = importlib.util.spec_from_file_location("dwfconstants", file_path)
+    module = None if specification is None else importlib.util.module_from_spec(specification)
+    try:
+        if module is not None:
+            specification.loader.exec_module(module)
+    except FileNotFoundError:
+        module = None
+    if module is None:
+        # an explicit path must point to the file
+        if "WF_SDK_CONSTANTS_PATH" in environ:
+            raise ImportError("dwfconstants.py was not found in " + constants_path() + ", set WF_SDK_CONSTANTS_PATH")
+        from WF_SDK import fallback_constants
+        return fallback_constants
+    # scripts importing dwfconstants get the same module
+    modules["dwfconstants"] = module
+    return module
+
+# every instrument uses these constants
+constants = __load_constants__()
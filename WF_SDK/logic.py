@@ -1,36 +1,30 @@
-""" LOGIC ANALYZER CONTROL FUNCTIONS: open, trigger, record, close """
+""" LOGIC ANALYZER CONTROL FUNCTIONS: open, trigger, record, record_all, stream, unpack, done, fetch, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+import numpy                      # fast array handling
+from time import sleep            # needed for delays
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
+from WF_SDK.device import wait, wait_policy, instrument
 
 """-----------------------------------------------------------------------"""
 
 class data:
-    """ stores the sampling frequency and the buffer size """
+    """ stores the sampling frequency and the buffer size (the defaults, every device keeps its own copy) """
     sampling_frequency = 100e06
     buffer_size = 4096
     max_buffer_size = 0
+    position = 0        # samples recorded before the trigger
+
+"""-----------------------------------------------------------------------"""
+
+class trigger_source:
+    """ trigger source names """
+    none = constants.trigsrcNone
+    digital = constants.trigsrcDetectorDigitalIn
+    external = [None, constants.trigsrcExternal1, constants.trigsrcExternal2, constants.trigsrcExternal3, constants.trigsrcExternal4]
 
 """-----------------------------------------------------------------------"""
 
@@ -42,34 +36,37 @@ def open(device_data, sampling_frequency=100e06, buffer_size=0):
                     - sampling frequency in Hz, default is 100MHz
                     - buffer size, default is 0 (maximum)
     """
-    # set global variables
-    data.sampling_frequency = sampling_frequency
-    data.max_buffer_size = device_data.digital.input.max_buffer_size
+    logic_data = instrument(device_data, data)
+
+    # store the settings of this device
+    logic_data.sampling_frequency = sampling_frequency
+    logic_data.max_buffer_size = device_data.digital.input.max_buffer_size
 
     # get internal clock frequency
     internal_frequency = ctypes.c_double()
-    if dwf.FDwfDigitalInInternalClockInfo(device_data.handle, ctypes.byref(internal_frequency)) == 0:
-        check_error()
+    checked.FDwfDigitalInInternalClockInfo(device_data.handle, ctypes.byref(internal_frequency))
     
     # set clock frequency divider (needed for lower frequency input signals)
-    if dwf.FDwfDigitalInDividerSet(device_data.handle, ctypes.c_int(int(internal_frequency.value / sampling_frequency))) == 0:
-        check_error()
+    checked.FDwfDigitalInDividerSet(device_data.handle, int(internal_frequency.value / sampling_frequency))
     
     # set 16-bit sample format
-    if dwf.FDwfDigitalInSampleFormatSet(device_data.handle, ctypes.c_int(16)) == 0:
-        check_error()
+    checked.FDwfDigitalInSampleFormatSet(device_data.handle, 16)
     
     # set buffer size
     if buffer_size == 0:
-        buffer_size = data.max_buffer_size
-    data.buffer_size = buffer_size
-    if dwf.FDwfDigitalInBufferSizeSet(device_data.handle, ctypes.c_int(buffer_size)) == 0:
-        check_error()
+        buffer_size = logic_data.max_buffer_size
+    logic_data.buffer_size = buffer_size
+    checked.FDwfDigitalInBufferSizeSet(device_data.handle, buffer_size)
+
+    # the module-level data follows the last opened logic analyzer, for scripts reading logic.data
+    data.sampling_frequency = logic_data.sampling_frequency
+    data.buffer_size = logic_data.buffer_size
+    data.max_buffer_size = logic_data.max_buffer_size
     return
 
 """-----------------------------------------------------------------------"""
 
-def trigger(device_data, enable, channel, position=0, timeout=0, rising_edge=True, length_min=0, length_max=20, count=0):
+def trigger(device_data, enable, channel, position=0, timeout=0, rising_edge=True, length_min=0, length_max=20, count=0, source=trigger_source.digital):
     """
         set up triggering
 
@@ -83,47 +80,43 @@ def trigger(device_data, enable, channel, position=0, timeout=0, rising_edge=Tru
                     - length_min - trigger sequence minimum time in seconds, the default is 0
                     - length_max - trigger sequence maximum time in seconds, the default is 20
                     - count - instance count, the default is 0 (immediate)
+                    - source - trigger_source.digital (default), or trigger_source.external[1-4], the channel is not used for external triggers
     """
-    # set trigger source to digital I/O lines, or turn it off
-    if enable:
-        if dwf.FDwfDigitalInTriggerSourceSet(device_data.handle, constants.trigsrcDetectorDigitalIn) == 0:
-            check_error()
+    logic_data = instrument(device_data, data)
+
+    # set trigger source to digital I/O lines, or an external trigger line, or turn it off
+    if enable and source != constants.trigsrcNone:
+        checked.FDwfDigitalInTriggerSourceSet(device_data.handle, source)
     else:
-        if dwf.FDwfDigitalInTriggerSourceSet(device_data.handle, constants.trigsrcNone) == 0:
-            check_error()
+        checked.FDwfDigitalInTriggerSourceSet(device_data.handle, constants.trigsrcNone)
+        logic_data.position = 0
         return
     
     # set starting position and prefill
-    position = min(data.buffer_size, max(0, position))
-    if dwf.FDwfDigitalInTriggerPositionSet(device_data.handle, ctypes.c_int(data.buffer_size - position)) == 0:
-        check_error()
-    if dwf.FDwfDigitalInTriggerPrefillSet(device_data.handle, ctypes.c_int(position)) == 0:
-        check_error()
+    position = min(logic_data.buffer_size, max(0, position))
+    logic_data.position = position
+    checked.FDwfDigitalInTriggerPositionSet(device_data.handle, logic_data.buffer_size - position)
+    checked.FDwfDigitalInTriggerPrefillSet(device_data.handle, position)
+
+    # set auto triggering
+    checked.FDwfDigitalInTriggerAutoTimeoutSet(device_data.handle, timeout)
+    if source != constants.trigsrcDetectorDigitalIn:
+        return
 
     # set trigger condition
-    channel = ctypes.c_int(1 << channel)
+    channel = 1 << channel
     if not rising_edge:
-        if dwf.FDwfDigitalInTriggerSet(device_data.handle, channel, ctypes.c_int(0), ctypes.c_int(0), ctypes.c_int(0)) == 0:
-            check_error()
-        if dwf.FDwfDigitalInTriggerResetSet(device_data.handle, ctypes.c_int(0), ctypes.c_int(0), ctypes.c_int(0), channel) == 0:
-            check_error()
+        checked.FDwfDigitalInTriggerSet(device_data.handle, channel, 0, 0, 0)
+        checked.FDwfDigitalInTriggerResetSet(device_data.handle, 0, 0, 0, channel)
     else:
-        if dwf.FDwfDigitalInTriggerSet(device_data.handle, ctypes.c_int(0), channel, ctypes.c_int(0), ctypes.c_int(0)) == 0:
-            check_error()
-        if dwf.FDwfDigitalInTriggerResetSet(device_data.handle, ctypes.c_int(0), ctypes.c_int(0), channel, ctypes.c_int(0)) == 0:
-            check_error()
-    
-    # set auto triggering
-    if dwf.FDwfDigitalInTriggerAutoTimeoutSet(device_data.handle, ctypes.c_double(timeout)) == 0:
-        check_error()
+        checked.FDwfDigitalInTriggerSet(device_data.handle, 0, channel, 0, 0)
+        checked.FDwfDigitalInTriggerResetSet(device_data.handle, 0, 0, channel, 0)
     
     # set sequence length to activate trigger
-    if dwf.FDwfDigitalInTriggerLengthSet(device_data.handle, ctypes.c_double(length_min), ctypes.c_double(length_max), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalInTriggerLengthSet(device_data.handle, length_min, length_max, 0)
 
     # set event counter
-    if dwf.FDwfDigitalInTriggerCountSet(device_data.handle, ctypes.c_int(count), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalInTriggerCountSet(device_data.handle, count, 0)
     return
 
 """-----------------------------------------------------------------------"""
@@ -137,31 +130,163 @@ def record(device_data, channel):
 
         returns:    - a list with the recorded logic values
     """
+    # record every line and keep the selected one
+    buffer = record_all(device_data)
+    return unpack(buffer, [channel])[:, 0].tolist()
+
+"""-----------------------------------------------------------------------"""
+
+def record_all(device_data):
+    """
+        record every DIO line with a single acquisition
+
+        parameters: - device data
+
+        returns:    - a NumPy array of 16-bit sample words, bit n holds the value of DIO line n
+    """
+    logic_data = instrument(device_data, data)
+
     # set up the instrument
-    if dwf.FDwfDigitalInConfigure(device_data.handle, ctypes.c_bool(False), ctypes.c_bool(True)) == 0:
-        check_error()
+    checked.FDwfDigitalInConfigure(device_data.handle, False, True)
     
     # read data to an internal buffer
-    while True:
-        status = ctypes.c_byte()    # variable to store buffer status
-        if dwf.FDwfDigitalInStatus(device_data.handle, ctypes.c_bool(True), ctypes.byref(status)) == 0:
-            check_error()
-    
-        if status.value == constants.stsDone.value:
-            # exit loop when finished
-            break
+    wait(lambda: done(device_data), logic_data.buffer_size / logic_data.sampling_frequency, "record", "logic")
     
     # get samples
-    buffer = (ctypes.c_uint16 * data.buffer_size)()
-    if dwf.FDwfDigitalInStatusData(device_data.handle, buffer, ctypes.c_int(2 * data.buffer_size)) == 0:
-        check_error()
-    
-    # convert buffer to list of lists of integers
-    result = []
-    for point in buffer:
-        result.append((int(point) & (1 << channel)) >> channel)
-    
-    return result
+    return fetch(device_data)
+
+"""-----------------------------------------------------------------------"""
+
+def stream(device_data, chunk_size=0, duration=0):
+    """
+        record every DIO line continuously, without gaps between buffers
+
+        parameters: - device data
+                    - chunk size in samples, default is 0 (the buffer size)
+                    - duration of the recording in seconds, default is 0 (infinite)
+
+        returns:    - a generator of (chunk, lost, corrupted) tuples, where chunk is a NumPy array
+                      of 16-bit sample words, lost and corrupted are the number of samples dropped,
+                      or possibly damaged while filling that chunk (the last chunk of a finite
+                      recording can be shorter)
+
+        only one chunk is held in memory at a time, so the recording can run for any length
+    """
+    logic_data = instrument(device_data, data)
+
+    if chunk_size == 0:
+        chunk_size = logic_data.buffer_size
+
+    # set up the instrument for record mode
+    checked.FDwfDigitalInAcquisitionModeSet(device_data.handle, constants.acqmodeRecord)
+    checked.FDwfDigitalInTriggerPositionSet(device_data.handle, int(duration * logic_data.sampling_frequency))
+    checked.FDwfDigitalInConfigure(device_data.handle, False, True)
+
+    # buffers for the newly arrived samples and for the chunk being filled
+    staging = numpy.empty(logic_data.buffer_size, dtype=numpy.uint16)
+    chunk = numpy.empty(chunk_size, dtype=numpy.uint16)
+    position = 0
+    lost_count = 0
+    corrupted_count = 0
+
+    # variables to store the buffer status
+    status = ctypes.c_ubyte()
+    available = ctypes.c_int()
+    lost = ctypes.c_int()
+    corrupted = ctypes.c_int()
+
+    try:
+        while True:
+            # read the acquisition state
+            checked.FDwfDigitalInStatus(device_data.handle, True, ctypes.byref(status))
+            checked.FDwfDigitalInStatusRecord(device_data.handle, ctypes.byref(available), ctypes.byref(lost), ctypes.byref(corrupted))
+            lost_count += lost.value
+            corrupted_count += corrupted.value
+
+            # wait for new samples
+            count = available.value
+            if count == 0 and status.value != constants.stsDone.value:
+                sleep(wait_policy.min_interval)
+                continue
+
+            # copy the new samples
+            if count > staging.size:
+                staging = numpy.empty(count, dtype=numpy.uint16)
+            if count > 0:
+                checked.FDwfDigitalInStatusData(device_data.handle, staging.ctypes.data_as(ctypes.POINTER(ctypes.c_uint16)), 2 * count)
+
+            # distribute the new samples into chunks
+            index = 0
+            while index < count:
+                length = min(chunk_size - position, count - index)
+                chunk[position:position + length] = staging[index:index + length]
+                position += length
+                index += length
+                if position == chunk_size:
+                    yield chunk, lost_count, corrupted_count
+                    chunk = numpy.empty(chunk_size, dtype=numpy.uint16)
+                    position = 0
+                    lost_count = 0
+                    corrupted_count = 0
+
+            # stop when a finite recording is finished
+            if status.value == constants.stsDone.value:
+                if position > 0:
+                    yield chunk[:position], lost_count, corrupted_count
+                break
+    finally:
+        # stop the acquisition and return to single acquisition mode
+        checked.FDwfDigitalInConfigure(device_data.handle, False, False)
+        checked.FDwfDigitalInAcquisitionModeSet(device_data.handle, constants.acqmodeSingle)
+        # keep the prefill set by trigger()
+        checked.FDwfDigitalInTriggerPositionSet(device_data.handle, logic_data.buffer_size - logic_data.position)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def unpack(buffer, channels=None):
+    """
+        split sample words into separate logic values
+
+        parameters: - buffer: NumPy array of sample words, as returned by record_all
+                    - channels: list of DIO line numbers, default is None (all 16 lines)
+
+        returns:    - a NumPy array of 0/1 values with one row for every sample
+                      and one column for every selected channel
+    """
+    if channels is None:
+        channels = range(16)
+    shifts = numpy.asarray(channels, dtype=numpy.uint16)
+    return ((numpy.asarray(buffer, dtype=numpy.uint16)[:, None] >> shifts) & 1).astype(numpy.uint8)
+
+"""-----------------------------------------------------------------------"""
+
+def done(device_data):
+    """
+        check if the acquisition is done, for acquisitions started without record()
+
+        parameters: - device data
+
+        returns:    - True if the acquisition is done
+    """
+    status = ctypes.c_ubyte()    # variable to store buffer status
+    checked.FDwfDigitalInStatus(device_data.handle, True, ctypes.byref(status))
+    return status.value == constants.stsDone.value
+
+"""-----------------------------------------------------------------------"""
+
+def fetch(device_data):
+    """
+        copy the sample words of a finished acquisition into a NumPy array
+
+        parameters: - device data
+
+        returns:    - a NumPy array of 16-bit sample words, see unpack
+    """
+    logic_data = instrument(device_data, data)
+    buffer = numpy.empty(logic_data.buffer_size, dtype=numpy.uint16)
+    checked.FDwfDigitalInStatusData(device_data.handle, buffer.ctypes.data_as(ctypes.POINTER(ctypes.c_uint16)), 2 * logic_data.buffer_size)
+    return buffer
 
 """-----------------------------------------------------------------------"""
 
@@ -169,6 +294,5 @@ def close(device_data):
     """
         reset the instrument
     """
-    if dwf.FDwfDigitalInReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalInReset(device_data.handle)
     return
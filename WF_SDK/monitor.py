@@ -0,0 +1,166 @@
+""" ANALOG IO MONITOR FUNCTIONS: read, start, samples, stop """
+
+import ctypes                     # import the C compatible data types
+import threading                  # background sampling
+import numpy                      # fast array handling
+from time import perf_counter     # needed for timing the samples
+
+# import constants and the library
+from WF_SDK.backend import checked
+from WF_SDK.device import instrument
+
+"""-----------------------------------------------------------------------"""
+
+class data:
+    """ stores the readable nodes and the sampler (the defaults, every device keeps its own copy) """
+    nodes = []          # (channel, node) indices of the readable nodes
+    dtype = None        # record type: time, then one field for every readable node, named "label.node"
+    rate = 0            # sampling rate of the background sampler in Hz
+    buffer = None       # ring buffer of records
+    count = 0           # number of records written to the ring buffer
+    __thread__ = None
+    __stop__ = None
+    __lock__ = None
+    __error__ = None
+
+"""-----------------------------------------------------------------------"""
+
+def read(device_data):
+    """
+        read every readable node of every analog IO channel (supply voltages and currents, USB monitor, temperature, ...)
+
+        the readings come from a single status fetch, so they belong to the same moment
+
+        parameters: - device data
+
+        returns:    - a NumPy record, with the time of the reading (perf_counter seconds) in the "time" field
+                      and the readings in fields named after the channel label and the node name, like "V+.Voltage"
+    """
+    monitor_data = __layout__(device_data)
+    record = numpy.zeros(1, dtype=monitor_data.dtype)[0]
+    __fill__(device_data, monitor_data, record)
+    return record
+
+"""-----------------------------------------------------------------------"""
+
+def start(device_data, rate=10, size=1000):
+    """
+        start reading the analog IO nodes in the background
+
+        parameters: - device data
+                    - sampling rate in Hz, default is 10Hz
+                    - size of the ring buffer in records, default is 1000 (the oldest records are overwritten)
+    """
+    stop(device_data)
+    monitor_data = __layout__(device_data)
+    monitor_data.rate = rate
+    monitor_data.buffer = numpy.zeros(size, dtype=monitor_data.dtype)
+    monitor_data.count = 0
+    monitor_data.__stop__ = threading.Event()
+    monitor_data.__lock__ = threading.Lock()
+    monitor_data.__error__ = None
+    monitor_data.__thread__ = threading.Thread(target=__sample__, args=(device_data, monitor_data), daemon=True)
+    monitor_data.__thread__.start()
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def samples(device_data):
+    """
+        return the records in the ring buffer
+
+        parameters: - device data
+
+        returns:    - a NumPy array of records (see read), oldest first
+    """
+    monitor_data = __layout__(device_data)
+    if monitor_data.buffer is None:
+        return numpy.zeros(0, dtype=monitor_data.dtype)
+    if monitor_data.__error__ is not None:
+        raise monitor_data.__error__
+    with monitor_data.__lock__:
+        size = len(monitor_data.buffer)
+        if monitor_data.count <= size:
+            return monitor_data.buffer[:monitor_data.count].copy()
+        # unroll the ring buffer
+        position = monitor_data.count % size
+        return numpy.concatenate((monitor_data.buffer[position:], monitor_data.buffer[:position]))
+
+"""-----------------------------------------------------------------------"""
+
+def stop(device_data):
+    """
+        stop the background sampler, the recorded samples are kept (stop it before closing the device)
+
+        parameters: - device data
+    """
+    monitor_data = instrument(device_data, data)
+    if monitor_data.__thread__ is not None:
+        monitor_data.__stop__.set()
+        monitor_data.__thread__.join()
+        monitor_data.__thread__ = None
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __layout__(device_data):
+    """
+        find the readable nodes and build the record type, once for every device
+    """
+    monitor_data = instrument(device_data, data)
+    if monitor_data.dtype is None:
+        monitor_data.nodes = []
+        fields = [("time", numpy.float64)]
+        for channel_index in range(device_data.analog.IO.channel_count):
+            for node_index in range(device_data.analog.IO.node_count[channel_index]):
+                # nodes without a read range can only be set
+                if device_data.analog.IO.max_read_range[channel_index][node_index] <= device_data.analog.IO.min_read_range[channel_index][node_index]:
+                    continue
+                name = device_data.analog.IO.channel_label[channel_index] + "." + device_data.analog.IO.node_name[channel_index][node_index]
+                if name in [field[0] for field in fields]:
+                    continue
+                monitor_data.nodes.append((channel_index, node_index))
+                fields.append((name, numpy.float64))
+        monitor_data.dtype = numpy.dtype(fields)
+    return monitor_data
+
+"""-----------------------------------------------------------------------"""
+
+def __fill__(device_data, monitor_data, record):
+    """
+        fetch the status once, then copy every readable node into the record
+    """
+    checked.FDwfAnalogIOStatus(device_data.handle)
+    record["time"] = perf_counter()
+    value = ctypes.c_double()
+    for field, (channel, node) in enumerate(monitor_data.nodes):
+        checked.FDwfAnalogIOChannelNodeStatus(device_data.handle, channel, node, ctypes.byref(value))
+        record[field + 1] = value.value
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __sample__(device_data, monitor_data):
+    """
+        background sampler: fill the ring buffer at the sampling rate, until stop() is called
+    """
+    record = numpy.zeros(1, dtype=monitor_data.dtype)[0]
+    period = 1 / monitor_data.rate
+    begin = perf_counter()
+    count = 0
+    try:
+        while not monitor_data.__stop__.is_set():
+            __fill__(device_data, monitor_data, record)
+            with monitor_data.__lock__:
+                monitor_data.buffer[monitor_data.count % len(monitor_data.buffer)] = record
+                monitor_data.count += 1
+            # the schedule is kept from the start, so the delays don't add up
+            count += 1
+            delay = begin + count * period - perf_counter()
+            if delay > 0:
+                monitor_data.__stop__.wait(delay)
+            else:
+                count = int((perf_counter() - begin) / period)  # skip the missed samples
+    except Exception as exception:
+        monitor_data.__error__ = exception
+    return
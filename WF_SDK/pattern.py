@@ -1,28 +1,14 @@
-""" PATTERN GENERATOR CONTROL FUNCTIONS: generate, close, enable, disable """
+""" PATTERN GENERATOR CONTROL FUNCTIONS: generate, generate_bus, play, done, close, enable, disable """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+import numpy                      # fast array handling
+from time import sleep, perf_counter  # needed for timing the playback
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
+from WF_SDK.device import wait_policy, wait, error
+from WF_SDK import tools
 
 """-----------------------------------------------------------------------"""
 
@@ -74,13 +60,11 @@ def generate(device_data, channel, function, frequency, duty_cycle=50, data=[],
         
     # get internal clock frequency
     internal_frequency = ctypes.c_double()
-    if dwf.FDwfDigitalOutInternalClockInfo(device_data.handle, ctypes.byref(internal_frequency)) == 0:
-        check_error()
+    checked.FDwfDigitalOutInternalClockInfo(device_data.handle, ctypes.byref(internal_frequency))
     
     # get counter value range
     counter_limit = ctypes.c_uint()
-    if dwf.FDwfDigitalOutCounterInfo(device_data.handle, ctypes.c_int(channel), ctypes.c_int(0), ctypes.byref(counter_limit)) == 0:
-        check_error()
+    checked.FDwfDigitalOutCounterInfo(device_data.handle, channel, None, ctypes.byref(counter_limit))
     
     # calculate the divider for the given signal frequency
     if function == constants.DwfDigitalOutTypePulse:
@@ -89,20 +73,16 @@ def generate(device_data, channel, function, frequency, duty_cycle=50, data=[],
         divider = int(internal_frequency.value / frequency)
     
     # enable the respective channel
-    if dwf.FDwfDigitalOutEnableSet(device_data.handle, ctypes.c_int(channel), ctypes.c_int(1)) == 0:
-        check_error()
+    checked.FDwfDigitalOutEnableSet(device_data.handle, channel, 1)
     
     # set output type
-    if dwf.FDwfDigitalOutTypeSet(device_data.handle, ctypes.c_int(channel), function) == 0:
-        check_error()
+    checked.FDwfDigitalOutTypeSet(device_data.handle, channel, function)
     
     # set frequency
-    if dwf.FDwfDigitalOutDividerSet(device_data.handle, ctypes.c_int(channel), ctypes.c_int(divider)) == 0:
-        check_error()
+    checked.FDwfDigitalOutDividerSet(device_data.handle, channel, divider)
 
     # set idle state
-    if dwf.FDwfDigitalOutIdleSet(device_data.handle, ctypes.c_int(channel), idle) == 0:
-        check_error()
+    checked.FDwfDigitalOutIdleSet(device_data.handle, channel, idle)
 
     # set PWM signal duty cycle
     if function == constants.DwfDigitalOutTypePulse:
@@ -111,73 +91,264 @@ def generate(device_data, channel, function, frequency, duty_cycle=50, data=[],
         # calculate steps for low and high parts of the period
         high_steps = int(steps * duty_cycle / 100)
         low_steps = int(steps - high_steps)
-        if dwf.FDwfDigitalOutCounterSet(device_data.handle, ctypes.c_int(channel), ctypes.c_int(low_steps), ctypes.c_int(high_steps)) == 0:
-            check_error()
+        checked.FDwfDigitalOutCounterSet(device_data.handle, channel, low_steps, high_steps)
     
     # load custom signal data
     elif function == constants.DwfDigitalOutTypeCustom:
         # format data
-        buffer = (ctypes.c_ubyte * ((len(data) + 7) >> 3))(0)
-        for index in range(len(data)):
-            if data[index] != 0:
-                buffer[index >> 3] |= 1 << (index & 7)
+        buffer = __pack__(numpy.asarray(data) != 0)
     
         # load data
-        if dwf.FDwfDigitalOutDataSet(device_data.handle, ctypes.c_int(channel), ctypes.byref(buffer), ctypes.c_int(len(data))) == 0:
-            check_error()
+        checked.FDwfDigitalOutDataSet(device_data.handle, channel, buffer.ctypes.data_as(ctypes.c_void_p), len(data))
     
     # calculate run length
     if run_time == "auto":
         run_time = len(data) / frequency
     
     # set wait time
-    if dwf.FDwfDigitalOutWaitSet(device_data.handle, ctypes.c_double(wait)) == 0:
-        check_error()
+    checked.FDwfDigitalOutWaitSet(device_data.handle, wait)
     
     # set repeat count
-    if dwf.FDwfDigitalOutRepeatSet(device_data.handle, ctypes.c_int(repeat)) == 0:
-        check_error()
+    checked.FDwfDigitalOutRepeatSet(device_data.handle, repeat)
     
     # set run length
-    if dwf.FDwfDigitalOutRunSet(device_data.handle, ctypes.c_double(run_time)) == 0:
-        check_error()
+    checked.FDwfDigitalOutRunSet(device_data.handle, run_time)
 
     # enable triggering
-    if dwf.FDwfDigitalOutRepeatTriggerSet(device_data.handle, ctypes.c_int(trigger_enabled)) == 0:
-        check_error()
+    checked.FDwfDigitalOutRepeatTriggerSet(device_data.handle, trigger_enabled)
     
     if trigger_enabled:
         # set trigger source
-        if dwf.FDwfDigitalOutTriggerSourceSet(device_data.handle, trigger_source) == 0:
-            check_error()
+        checked.FDwfDigitalOutTriggerSourceSet(device_data.handle, trigger_source)
     
         # set trigger slope
         if trigger_edge_rising == True:
             # rising edge
-            if dwf.FDwfDigitalOutTriggerSlopeSet(device_data.handle, constants.DwfTriggerSlopeRise) == 0:
-                check_error()
+            checked.FDwfDigitalOutTriggerSlopeSet(device_data.handle, constants.DwfTriggerSlopeRise)
         elif trigger_edge_rising == False:
             # falling edge
-            if dwf.FDwfDigitalOutTriggerSlopeSet(device_data.handle, constants.DwfTriggerSlopeFall) == 0:
-                check_error()
+            checked.FDwfDigitalOutTriggerSlopeSet(device_data.handle, constants.DwfTriggerSlopeFall)
         elif trigger_edge_rising == None:
             # either edge
-            if dwf.FDwfDigitalOutTriggerSlopeSet(device_data.handle, constants.DwfTriggerSlopeEither) == 0:
-                check_error()
+            checked.FDwfDigitalOutTriggerSlopeSet(device_data.handle, constants.DwfTriggerSlopeEither)
 
     # start generating the signal
-    if dwf.FDwfDigitalOutConfigure(device_data.handle, ctypes.c_int(True)) == 0:
-        check_error()
+    checked.FDwfDigitalOutConfigure(device_data.handle, True)
     return
 
 """-----------------------------------------------------------------------"""
 
+def generate_bus(device_data, channels, data, frequency, wait=0, repeat=0, run_time=0, idle=idle_state.initial):
+    """
+        generate a parallel bus signal on several DIO lines, every line starts at the same moment
+
+        parameters: - device data
+                    - channels - list of the DIO line numbers, the first one carries the least significant bit
+                    - data - a NumPy array (or nested list) with one row of line states for every sample,
+                      or a vector of integer words, one word for every sample
+                    - frequency in Hz (samples per second)
+                    - wait time in seconds, default is 0 seconds
+                    - repeat count, default is infinite (0)
+                    - run_time: in seconds, 0=infinite, "auto"=auto
+                    - idle - possible: initial, high, low, high_impedance, or a list with one of them for every line, default = initial
+    """
+    # check the data before any line is set up
+    data = numpy.asarray(data)
+    if data.ndim == 1:
+        words = data.astype(numpy.int64)
+        if numpy.any(words < 0) or numpy.any(words >> len(channels)):
+            raise error("The words don't fit in the " + str(len(channels)) + " lines", "generate_bus", "pattern")
+        # split the words into bits
+        bits = (words[:, numpy.newaxis] >> numpy.arange(len(channels))) & 1
+    elif data.ndim == 2 and data.shape[1] == len(channels):
+        bits = data
+    else:
+        raise error("The data needs a column for each of the " + str(len(channels)) + " lines", "generate_bus", "pattern")
+    if isinstance(idle, list) and len(idle) != len(channels):
+        raise error("The idle list needs a state for each of the " + str(len(channels)) + " lines", "generate_bus", "pattern")
+    # one row of packed bits for every line
+    buffer = __pack__(bits.T != 0)
+    sample_count = bits.shape[0]
+
+    if device_data.name == "Digital Discovery":
+        channels = [channel - 24 for channel in channels]
+
+    # get internal clock frequency and calculate the divider (rounded, as a divided rate may fall just below an integer)
+    internal_frequency = ctypes.c_double()
+    checked.FDwfDigitalOutInternalClockInfo(device_data.handle, ctypes.byref(internal_frequency))
+    divider = round(internal_frequency.value / frequency)
+
+    # the divider register would wrap around silently
+    divider_min, divider_max = ctypes.c_uint(), ctypes.c_uint()
+    for channel in channels:
+        checked.FDwfDigitalOutDividerInfo(device_data.handle, channel, ctypes.byref(divider_min), ctypes.byref(divider_max))
+        if not divider_min.value <= divider <= divider_max.value:
+            raise error("The frequency must be between " + str(internal_frequency.value / divider_max.value) + "Hz and "
+                        + str(internal_frequency.value / max(divider_min.value, 1)) + "Hz", "generate_bus", "pattern")
+
+    # load every line
+    for row, channel in enumerate(channels):
+        checked.FDwfDigitalOutEnableSet(device_data.handle, channel, 1)
+        checked.FDwfDigitalOutTypeSet(device_data.handle, channel, constants.DwfDigitalOutTypeCustom)
+        checked.FDwfDigitalOutDividerSet(device_data.handle, channel, divider)
+        checked.FDwfDigitalOutIdleSet(device_data.handle, channel, idle[row] if isinstance(idle, list) else idle)
+        checked.FDwfDigitalOutDataSet(device_data.handle, channel, buffer[row].ctypes.data_as(ctypes.c_void_p), sample_count)
+
+    # calculate run length
+    if run_time == "auto":
+        run_time = sample_count / frequency
+
+    checked.FDwfDigitalOutWaitSet(device_data.handle, wait)
+    checked.FDwfDigitalOutRepeatSet(device_data.handle, repeat)
+    checked.FDwfDigitalOutRunSet(device_data.handle, run_time)
+    checked.FDwfDigitalOutRepeatTriggerSet(device_data.handle, False)
+
+    # start every line together
+    checked.FDwfDigitalOutConfigure(device_data.handle, True)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def play(device_data, channels, samples, frequency, buffer_size=0, idle=idle_state.initial, strict=False):
+    """
+        play a parallel signal of any length on several DIO lines, the samples are streamed to the device while the lines run
+
+        the device plays a circular buffer, which is refilled behind the playing position,
+        the position is estimated from the start with the clock of the computer, so the buffer is filled
+        only half a buffer ahead of it, which leaves room for the device running behind the estimate
+
+        samples which were not sent before their estimated time to play came are dropped, to keep the rest on time,
+        their places in the buffer still hold older samples, which are played again, so the output
+        has gaps and repeated parts whenever lost is not 0 (use strict=True to stop at the first underrun)
+
+        a signal of known length (not an iterable) ends when the device reports that it is done,
+        the end of an iterable is estimated with the clock of the computer
+
+        parameters: - device data
+                    - channels - list of the DIO line numbers, the first one carries the least significant bit
+                    - samples: integer words in a list, a NumPy array, a memory-mapped file (numpy.memmap),
+                      or an iterable (like a generator) of words, or of arrays of words
+                    - frequency in Hz (samples per second)
+                    - buffer size in samples, default is 0 (the digital output buffer size)
+                    - idle - possible: initial, high, low, high_impedance, or a list with one of them for every line, default = initial
+                    - strict - True raises an error at the first underrun, default is False (the lost samples are counted)
+
+        returns:    - the number of samples sent to the device
+                    - the estimated number of samples lost, because they were not sent before their time to play came
+                      (underruns, counted with the clock of the computer, not measured by the device)
+    """
+    read, length = tools.reader(samples, numpy.int64)
+    if buffer_size == 0:
+        buffer_size = device_data.digital.output.max_buffer_size
+
+    if device_data.name == "Digital Discovery":
+        channels = [channel - 24 for channel in channels]
+
+    # the words of the device carry every line on its own bit
+    bits = 8
+    while bits <= max(channels):
+        bits *= 2
+    dtype = {8: numpy.uint8, 16: numpy.uint16}.get(bits, numpy.uint32)
+    def place(block):
+        words = numpy.zeros(block.size, dtype=dtype)
+        for bit, channel in enumerate(channels):
+            words |= (((block >> bit) & 1) << channel).astype(dtype)
+        return words
+
+    # fill the buffer before the start, a short signal gets a short buffer
+    block = place(read(buffer_size))
+    if block.size == 0:
+        return 0, 0
+    buffer_size = block.size
+    checked.FDwfDigitalOutPlayRateSet(device_data.handle, frequency)
+    checked.FDwfDigitalOutPlayDataSet(device_data.handle, block.ctypes.data_as(ctypes.c_void_p), bits, buffer_size)
+    for row, channel in enumerate(channels):
+        checked.FDwfDigitalOutEnableSet(device_data.handle, channel, 1)
+        checked.FDwfDigitalOutTypeSet(device_data.handle, channel, constants.DwfDigitalOutTypePlay)
+        checked.FDwfDigitalOutIdleSet(device_data.handle, channel, idle[row] if isinstance(idle, list) else idle)
+
+    # a finite signal stops after its last sample
+    checked.FDwfDigitalOutWaitSet(device_data.handle, 0)
+    checked.FDwfDigitalOutRepeatSet(device_data.handle, 1)
+    checked.FDwfDigitalOutRunSet(device_data.handle, 0 if length is None else length / frequency)
+    checked.FDwfDigitalOutRepeatTriggerSet(device_data.handle, False)
+    checked.FDwfDigitalOutConfigure(device_data.handle, True)
+    start = perf_counter()
+
+    sent = buffer_size
+    written = buffer_size   # position of the next sample in the signal
+    lost = 0
+    exhausted = False
+    # the samples are queued at most half a buffer ahead of the estimated position,
+    # the other half is a guard for the device running behind the clock of the computer
+    window = max(buffer_size // 2, 1)
+    # sleep while at least half of the window is queued, but no longer than a quarter of its playing time
+    interval = min(window / frequency / 4, wait_policy.max_interval)
+
+    try:
+        while True:
+            played = int((perf_counter() - start) * frequency)
+            if exhausted:
+                # a finite signal is stopped by the device, wait for it
+                if length is not None:
+                    wait(lambda: done(device_data), max(written - played, 0) / frequency, "play", "pattern")
+                    break
+                # wait for the estimated end of an iterable
+                if played >= written:
+                    break
+                sleep(min(interval, (written - played) / frequency))
+                continue
+
+            # the samples which missed their time are dropped, to keep the rest on time
+            if played > written:
+                if strict:
+                    raise error("Underrun: the samples were not sent in time, lower the frequency or raise the buffer size", "play", "pattern")
+                skipped = read(played - written).size
+                lost += skipped
+                written += skipped
+
+            # send as many new samples as the window has room for, from the position after the last sent sample
+            free = window - (written - played)
+            if free > 0:
+                block = place(read(free))
+                if block.size == 0:
+                    exhausted = True
+                    continue
+                index = written % buffer_size
+                first = min(block.size, buffer_size - index)
+                checked.FDwfDigitalOutPlayUpdateSet(device_data.handle, block.ctypes.data_as(ctypes.c_void_p), index, first)
+                if first < block.size:
+                    checked.FDwfDigitalOutPlayUpdateSet(device_data.handle, block[first:].ctypes.data_as(ctypes.c_void_p), 0, block.size - first)
+                sent += block.size
+                written += block.size
+            if free < window // 2:
+                sleep(interval)
+    finally:
+        # stop the lines (a finite signal is already stopped, unless playback was interrupted)
+        checked.FDwfDigitalOutConfigure(device_data.handle, False)
+    return sent, lost
+
+"""-----------------------------------------------------------------------"""
+
+def done(device_data):
+    """
+        check if the pattern generator finished (a finite run, or every repeat)
+
+        parameters: - device data
+
+        returns:    - True if the pattern generator is done
+    """
+    status = ctypes.c_ubyte()
+    checked.FDwfDigitalOutStatus(device_data.handle, ctypes.byref(status))
+    return status.value == constants.DwfStateDone.value
+
+"""-----------------------------------------------------------------------"""
+
 def close(device_data):
     """
         reset the instrument
     """
-    if dwf.FDwfDigitalOutReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalOutReset(device_data.handle)
     return
 
 """-----------------------------------------------------------------------"""
@@ -186,10 +357,8 @@ def enable(device_data, channel):
     """ enables a digital output channel """
     if device_data.name == "Digital Discovery":
         channel = channel - 24
-    if dwf.FDwfDigitalOutEnableSet(device_data.handle, ctypes.c_int(channel), ctypes.c_int(1)) == 0:
-        check_error()
-    if dwf.FDwfDigitalOutConfigure(device_data.handle, ctypes.c_int(True)) == 0:
-        check_error()
+    checked.FDwfDigitalOutEnableSet(device_data.handle, channel, 1)
+    checked.FDwfDigitalOutConfigure(device_data.handle, True)
     return
 
 """-----------------------------------------------------------------------"""
@@ -198,8 +367,14 @@ def disable(device_data, channel):
     """ disables a digital output channel """
     if device_data.name == "Digital Discovery":
         channel = channel - 24
-    if dwf.FDwfDigitalOutEnableSet(device_data.handle, ctypes.c_int(channel), ctypes.c_int(0)) == 0:
-        check_error()
-    if dwf.FDwfDigitalOutConfigure(device_data.handle, ctypes.c_int(True)) == 0:
-        check_error()
+    checked.FDwfDigitalOutEnableSet(device_data.handle, channel, 0)
+    checked.FDwfDigitalOutConfigure(device_data.handle, True)
     return
+
+"""-----------------------------------------------------------------------"""
+
+def __pack__(bits):
+    """
+        pack the samples of one, or of several lines (rows) into bytes, the first sample goes into the lowest bit
+    """
+    return numpy.ascontiguousarray(numpy.packbits(bits, axis=-1, bitorder="little"))
@@ -1,29 +1,12 @@
 """ PROTOCOL: I2C CONTROL FUNCTIONS: open, read, write, exchange, spy, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
 import inspect                    # get caller information
 
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error, warning
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
+from WF_SDK.device import warning
 
 """-----------------------------------------------------------------------"""
 
@@ -31,8 +14,8 @@ def __check_warning__(device_data, nak):
     """
         check for I2C errors
     """
-    if nak != 0:
-        raise warning("NAK: index " + str(nak), inspect.stack()[1].function, "protocol/i2c")
+    if nak.value != 0:
+        raise warning("NAK: index " + str(nak.value), inspect.stack()[1].function, "protocol/i2c")
     return
 
 """-----------------------------------------------------------------------"""
@@ -48,37 +31,29 @@ def open(device_data, sda, scl, clk_rate=100e03, stretching=True):
                     - stretching (enables/disables clock stretching)
     """
     # reset the interface
-    if dwf.FDwfDigitalI2cReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalI2cReset(device_data.handle)
 
     # clock stretching
     if stretching:
-        if dwf.FDwfDigitalI2cStretchSet(device_data.handle, ctypes.c_int(1)) == 0:
-            check_error()
+        checked.FDwfDigitalI2cStretchSet(device_data.handle, 1)
     else:
-        if dwf.FDwfDigitalI2cStretchSet(device_data.handle, ctypes.c_int(0)) == 0:
-            check_error()
+        checked.FDwfDigitalI2cStretchSet(device_data.handle, 0)
 
     # set clock frequency
-    if dwf.FDwfDigitalI2cRateSet(device_data.handle, ctypes.c_double(clk_rate)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cRateSet(device_data.handle, clk_rate)
 
     #  set communication lines
-    if dwf.FDwfDigitalI2cSclSet(device_data.handle, ctypes.c_int(scl)) == 0:
-        check_error()
-    if dwf.FDwfDigitalI2cSdaSet(device_data.handle, ctypes.c_int(sda)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cSclSet(device_data.handle, scl)
+    checked.FDwfDigitalI2cSdaSet(device_data.handle, sda)
 
     # check bus
     nak = ctypes.c_int()
-    if dwf.FDwfDigitalI2cClear(device_data.handle, ctypes.byref(nak)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cClear(device_data.handle, ctypes.byref(nak))
     if nak.value == 0:
         raise warning("I2C bus lockup", "open", "protocol/i2c")
 
     # write 0 bytes
-    if dwf.FDwfDigitalI2cWrite(device_data.handle, ctypes.c_int(0), ctypes.c_int(0), ctypes.c_int(0), ctypes.byref(nak)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cWrite(device_data.handle, 0, None, 0, ctypes.byref(nak))
     __check_warning__(device_data, nak)
     return
 
@@ -106,8 +81,7 @@ def write(device_data, data, address):
 
     # send
     nak = ctypes.c_int()
-    if dwf.FDwfDigitalI2cWrite(device_data.handle, ctypes.c_int(address << 1), buffer, ctypes.c_int(ctypes.sizeof(buffer)), ctypes.byref(nak)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cWrite(device_data.handle, address << 1, buffer, ctypes.sizeof(buffer), ctypes.byref(nak))
 
     # check for not acknowledged
     __check_warning__(device_data, nak)
@@ -130,8 +104,7 @@ def read(device_data, count, address):
 
     # receive
     nak = ctypes.c_int()
-    if dwf.FDwfDigitalI2cRead(device_data.handle, ctypes.c_int(address << 1), buffer, ctypes.c_int(count), ctypes.byref(nak)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cRead(device_data.handle, address << 1, buffer, count, ctypes.byref(nak))
 
     # decode data
     data = [int(element) for element in buffer]
@@ -170,8 +143,7 @@ def exchange(device_data, data, count, address):
 
     # send and receive
     nak = ctypes.c_int()
-    if dwf.FDwfDigitalI2cWriteRead(device_data.handle, ctypes.c_int(address << 1), tx_buffer, ctypes.c_int(ctypes.sizeof(tx_buffer)), buffer, ctypes.c_int(count), ctypes.byref(nak)) == 0:
-        check_error()
+    checked.FDwfDigitalI2cWriteRead(device_data.handle, address << 1, tx_buffer, ctypes.sizeof(tx_buffer), buffer, count, ctypes.byref(nak))
 
     # decode data
     rec_data = [int(element) for element in buffer]
@@ -252,6 +224,5 @@ def close(device_data):
     """
         reset the i2c interface
     """
-    if dwf.FDwfDigitalI2cReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalI2cReset(device_data.handle)
     return
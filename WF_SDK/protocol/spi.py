@@ -1,28 +1,10 @@
 """ PROTOCOL: SPI CONTROL FUNCTIONS: open, read, write, exchange, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
 
 """-----------------------------------------------------------------------"""
 
@@ -40,52 +22,41 @@ def open(device_data, cs, sck, miso=None, mosi=None, clk_frequency=1e06, mode=0,
                     - order (endianness, True means MSB first - default, False means LSB first)
     """
     # set the clock frequency
-    if dwf.FDwfDigitalSpiFrequencySet(device_data.handle, ctypes.c_double(clk_frequency)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiFrequencySet(device_data.handle, clk_frequency)
 
     # set the clock pin
-    if dwf.FDwfDigitalSpiClockSet(device_data.handle, ctypes.c_int(sck)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiClockSet(device_data.handle, sck)
 
     if mosi != None:
         # set the mosi pin
-        if dwf.FDwfDigitalSpiDataSet(device_data.handle, ctypes.c_int(0), ctypes.c_int(mosi)) == 0:
-            check_error()
+        checked.FDwfDigitalSpiDataSet(device_data.handle, 0, mosi)
 
         # set the initial state
-        if dwf.FDwfDigitalSpiIdleSet(device_data.handle, ctypes.c_int(0), constants.DwfDigitalOutIdleZet) == 0:
-            check_error()
+        checked.FDwfDigitalSpiIdleSet(device_data.handle, 0, constants.DwfDigitalOutIdleZet)
 
     if miso != None:
         # set the miso pin
-        if dwf.FDwfDigitalSpiDataSet(device_data.handle, ctypes.c_int(1), ctypes.c_int(miso)) == 0:
-            check_error()
+        checked.FDwfDigitalSpiDataSet(device_data.handle, 1, miso)
 
         # set the initial state
-        if dwf.FDwfDigitalSpiIdleSet(device_data.handle, ctypes.c_int(1), constants.DwfDigitalOutIdleZet) == 0:
-            check_error()
+        checked.FDwfDigitalSpiIdleSet(device_data.handle, 1, constants.DwfDigitalOutIdleZet)
 
     # set the SPI mode
-    if dwf.FDwfDigitalSpiModeSet(device_data.handle, ctypes.c_int(mode)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiModeSet(device_data.handle, mode)
 
     # set endianness
     if order:
         # MSB first
-        if dwf.FDwfDigitalSpiOrderSet(device_data.handle, ctypes.c_int(1)) == 0:
-            check_error()
+        checked.FDwfDigitalSpiOrderSet(device_data.handle, 1)
     else:
         # LSB first
-        if dwf.FDwfDigitalSpiOrderSet(device_data.handle, ctypes.c_int(0)) == 0:
-            check_error()
+        checked.FDwfDigitalSpiOrderSet(device_data.handle, 0)
 
     # set the cs pin HIGH
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(1)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 1)
 
     # dummy write
-    if dwf.FDwfDigitalSpiWriteOne(device_data.handle, ctypes.c_int(1), ctypes.c_int(0), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiWriteOne(device_data.handle, 1, 0, 0)
     return
 
 """-----------------------------------------------------------------------"""
@@ -101,19 +72,16 @@ def read(device_data, count, cs):
         return:     - integer list containing the received bytes
     """
     # enable the chip select line
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 0)
 
     # create buffer to store data
     buffer = (ctypes.c_ubyte*count)()
 
     # read array of 8 bit elements
-    if dwf.FDwfDigitalSpiRead(device_data.handle, ctypes.c_int(1), ctypes.c_int(8), buffer, ctypes.c_int(len(buffer))) == 0:
-        check_error()
+    checked.FDwfDigitalSpiRead(device_data.handle, 1, 8, buffer, len(buffer))
 
     # disable the chip select line
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(1)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 1)
 
     # decode data
     data = [int(element) for element in buffer]
@@ -137,8 +105,7 @@ def write(device_data, data, cs):
         data = "".join(chr(element) for element in data)
 
     # enable the chip select line
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 0)
 
     # create buffer to write
     data = bytes(data, "utf-8")
@@ -147,12 +114,10 @@ def write(device_data, data, cs):
         buffer[index] = ctypes.c_ubyte(data[index])
 
     # write array of 8 bit elements
-    if dwf.FDwfDigitalSpiWrite(device_data.handle, ctypes.c_int(1), ctypes.c_int(8), buffer, ctypes.c_int(len(buffer))) == 0:
-        check_error()
+    checked.FDwfDigitalSpiWrite(device_data.handle, 1, 8, buffer, len(buffer))
 
     # disable the chip select line
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(1)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 1)
 
     return
 
@@ -176,8 +141,7 @@ def exchange(device_data, data, count, cs):
         data = "".join(chr(element) for element in data)
 
     # enable the chip select line
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 0)
 
     # create buffer to write
     data = bytes(data, "utf-8")
@@ -189,12 +153,10 @@ def exchange(device_data, data, count, cs):
     rx_buffer = (ctypes.c_ubyte*count)()
 
     # write to MOSI and read from MISO
-    if dwf.FDwfDigitalSpiWriteRead(device_data.handle, ctypes.c_int(1), ctypes.c_int(8), tx_buffer, ctypes.c_int(len(tx_buffer)), rx_buffer, ctypes.c_int(len(rx_buffer))) == 0:
-        check_error()
+    checked.FDwfDigitalSpiWriteRead(device_data.handle, 1, 8, tx_buffer, len(tx_buffer), rx_buffer, len(rx_buffer))
 
     # disable the chip select line
-    if dwf.FDwfDigitalSpiSelect(device_data.handle, ctypes.c_int(cs), ctypes.c_int(1)) == 0:
-        check_error()
+    checked.FDwfDigitalSpiSelect(device_data.handle, cs, 1)
 
     # decode data
     data = [int(element) for element in rx_buffer]
@@ -318,6 +280,5 @@ def close(device_data):
     """
         reset the spi interface
     """
-    if dwf.FDwfDigitalSpiReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalSpiReset(device_data.handle)
     return
@@ -1,28 +1,11 @@
 """ PROTOCOL: UART CONTROL FUNCTIONS: open, read, write, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error, warning
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
+from WF_SDK.device import warning
 
 """-----------------------------------------------------------------------"""
 
@@ -39,18 +22,14 @@ def open(device_data, rx, tx, baud_rate=9600, parity=None, data_bits=8, stop_bit
                     - stop_bits (default is 1)
     """
     # set baud rate
-    if dwf.FDwfDigitalUartRateSet(device_data.handle, ctypes.c_double(baud_rate)) == 0:
-        check_error()
+    checked.FDwfDigitalUartRateSet(device_data.handle, baud_rate)
 
     # set communication channels
-    if dwf.FDwfDigitalUartTxSet(device_data.handle, ctypes.c_int(tx)) == 0:
-        check_error()
-    if dwf.FDwfDigitalUartRxSet(device_data.handle, ctypes.c_int(rx)) == 0:
-        check_error()
+    checked.FDwfDigitalUartTxSet(device_data.handle, tx)
+    checked.FDwfDigitalUartRxSet(device_data.handle, rx)
 
     # set data bit count
-    if dwf.FDwfDigitalUartBitsSet(device_data.handle, ctypes.c_int(data_bits)) == 0:
-        check_error()
+    checked.FDwfDigitalUartBitsSet(device_data.handle, data_bits)
 
     # set parity bit requirements
     if parity == True:
@@ -59,25 +38,21 @@ def open(device_data, rx, tx, baud_rate=9600, parity=None, data_bits=8, stop_bit
         parity = 1
     else:
         parity = 0
-    if dwf.FDwfDigitalUartParitySet(device_data.handle, ctypes.c_int(parity)) == 0:
-        check_error()
+    checked.FDwfDigitalUartParitySet(device_data.handle, parity)
 
     # set stop bit count
-    if dwf.FDwfDigitalUartStopSet(device_data.handle, ctypes.c_double(stop_bits)) == 0:
-        check_error()
+    checked.FDwfDigitalUartStopSet(device_data.handle, stop_bits)
 
     # initialize channels with idle levels
 
     # dummy read
     dummy_buffer = ctypes.create_string_buffer(0)
-    dummy_buffer = ctypes.c_int(0)
+    dummy_count = ctypes.c_int(0)
     dummy_parity_flag = ctypes.c_int(0)
-    if dwf.FDwfDigitalUartRx(device_data.handle, dummy_buffer, ctypes.c_int(0), ctypes.byref(dummy_buffer), ctypes.byref(dummy_parity_flag)) == 0:
-        check_error()
+    checked.FDwfDigitalUartRx(device_data.handle, dummy_buffer, 0, ctypes.byref(dummy_count), ctypes.byref(dummy_parity_flag))
 
     # dummy write
-    if dwf.FDwfDigitalUartTx(device_data.handle, dummy_buffer, ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfDigitalUartTx(device_data.handle, dummy_buffer, 0)
     return
 
 """-----------------------------------------------------------------------"""
@@ -103,8 +78,7 @@ def read(device_data):
     parity_flag= ctypes.c_int(0)
 
     # read up to 8k characters
-    if dwf.FDwfDigitalUartRx(device_data.handle, data, ctypes.c_int(ctypes.sizeof(data)-1), ctypes.byref(count), ctypes.byref(parity_flag)) == 0:
-        check_error()
+    checked.FDwfDigitalUartRx(device_data.handle, data, ctypes.sizeof(data)-1, ctypes.byref(count), ctypes.byref(parity_flag))
 
     # append current data chunks
     for index in range(0, count.value):
@@ -122,8 +96,7 @@ def read(device_data):
         parity_flag= ctypes.c_int(0)
 
         # read up to 8k characters
-        if dwf.FDwfDigitalUartRx(device_data.handle, data, ctypes.c_int(ctypes.sizeof(data)-1), ctypes.byref(count), ctypes.byref(parity_flag)) == 0:
-            check_error()
+        checked.FDwfDigitalUartRx(device_data.handle, data, ctypes.sizeof(data)-1, ctypes.byref(count), ctypes.byref(parity_flag))
         # append current data chunks
         for index in range(0, count.value):
             rx_data.append(int(data[index]))
@@ -153,8 +126,7 @@ def write(device_data, data):
     data = ctypes.create_string_buffer(data.encode("UTF-8"))
 
     # send text, trim zero ending
-    if dwf.FDwfDigitalUartTx(device_data.handle, data, ctypes.c_int(ctypes.sizeof(data)-1)) == 0:
-        check_error()
+    checked.FDwfDigitalUartTx(device_data.handle, data, ctypes.sizeof(data)-1)
 
     return
 
@@ -164,6 +136,5 @@ def close(device_data):
     """
         reset the uart interface
     """
-    if dwf.FDwfDigitalUartReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalUartReset(device_data.handle)
     return
@@ -0,0 +1,233 @@
+""" FUNCTION PROTOTYPES: table, declare """
+
+import ctypes                     # import the C compatible data types
+
+"""-----------------------------------------------------------------------"""
+
+# the C types of dwf.h
+HDWF = ctypes.c_int                           # device handle
+BOOL = ctypes.c_int                           # every function returns 0 on failure
+STS = ctypes.c_ubyte                          # instrument state
+TRIGSRC = ctypes.c_ubyte                      # trigger source
+FUNC = ctypes.c_ubyte                         # generated function
+ENUM = ctypes.c_int                           # every other enumeration (filters, modes, nodes, slopes ...)
+
+# pointers to the output parameters
+P_INT = ctypes.POINTER(ctypes.c_int)
+P_UINT = ctypes.POINTER(ctypes.c_uint)
+P_DOUBLE = ctypes.POINTER(ctypes.c_double)
+P_UBYTE = ctypes.POINTER(ctypes.c_ubyte)
+P_STS = ctypes.POINTER(STS)
+
+# shorter names for the value parameters
+INT = ctypes.c_int
+UINT = ctypes.c_uint
+DOUBLE = ctypes.c_double
+UBYTE = ctypes.c_ubyte
+STRING = ctypes.c_char_p
+VOID_P = ctypes.c_void_p
+
+"""-----------------------------------------------------------------------"""
+
+# argument types of every WaveForms function used by the package
+# pointers can be passed as ctypes.byref(), as a ctypes array, or as None when the value is not needed
+# (the UART buffers are void pointers, as both strings and byte arrays are used)
+table = {
+    # system and device
+    "FDwfGetLastError": (P_INT,),
+    "FDwfGetLastErrorMsg": (STRING,),
+    "FDwfGetVersion": (STRING,),
+    "FDwfEnum": (ENUM, P_INT),
+    "FDwfEnumDeviceType": (INT, P_INT, P_INT),
+    "FDwfEnumSN": (INT, STRING),
+    "FDwfDeviceOpen": (INT, P_INT),
+    "FDwfDeviceConfigOpen": (INT, INT, P_INT),
+    "FDwfDeviceClose": (HDWF,),
+    "FDwfDeviceCloseAll": (),
+    "FDwfDeviceTriggerSet": (HDWF, INT, TRIGSRC),
+    "FDwfDeviceTriggerPC": (HDWF,),
+
+    # analog input
+    "FDwfAnalogInReset": (HDWF,),
+    "FDwfAnalogInConfigure": (HDWF, INT, INT),
+    "FDwfAnalogInStatus": (HDWF, INT, P_STS),
+    "FDwfAnalogInStatusSample": (HDWF, INT, P_DOUBLE),
+    "FDwfAnalogInStatusData": (HDWF, INT, P_DOUBLE, INT),
+    "FDwfAnalogInStatusRecord": (HDWF, P_INT, P_INT, P_INT),
+    "FDwfAnalogInBitsInfo": (HDWF, P_INT),
+    "FDwfAnalogInBufferSizeInfo": (HDWF, P_INT, P_INT),
+    "FDwfAnalogInBufferSizeSet": (HDWF, INT),
+    "FDwfAnalogInFrequencySet": (HDWF, DOUBLE),
+    "FDwfAnalogInAcquisitionModeSet": (HDWF, ENUM),
+    "FDwfAnalogInRecordLengthSet": (HDWF, DOUBLE),
+    "FDwfAnalogInChannelCount": (HDWF, P_INT),
+    "FDwfAnalogInChannelEnableSet": (HDWF, INT, INT),
+    "FDwfAnalogInChannelFilterSet": (HDWF, INT, ENUM),
+    "FDwfAnalogInChannelRangeInfo": (HDWF, P_DOUBLE, P_DOUBLE, P_DOUBLE),
+    "FDwfAnalogInChannelRangeSet": (HDWF, INT, DOUBLE),
+    "FDwfAnalogInChannelOffsetInfo": (HDWF, P_DOUBLE, P_DOUBLE, P_DOUBLE),
+    "FDwfAnalogInChannelOffsetSet": (HDWF, INT, DOUBLE),
+    "FDwfAnalogInTriggerSourceSet": (HDWF, TRIGSRC),
+    "FDwfAnalogInTriggerPositionSet": (HDWF, DOUBLE),
+    "FDwfAnalogInTriggerAutoTimeoutSet": (HDWF, DOUBLE),
+    "FDwfAnalogInTriggerChannelSet": (HDWF, INT),
+    "FDwfAnalogInTriggerTypeSet": (HDWF, ENUM),
+    "FDwfAnalogInTriggerLevelSet": (HDWF, DOUBLE),
+    "FDwfAnalogInTriggerConditionSet": (HDWF, ENUM),
+
+    # analog output
+    "FDwfAnalogOutCount": (HDWF, P_INT),
+    "FDwfAnalogOutReset": (HDWF, INT),
+    "FDwfAnalogOutConfigure": (HDWF, INT, INT),
+    "FDwfAnalogOutStatus": (HDWF, INT, P_STS),
+    "FDwfAnalogOutNodeInfo": (HDWF, INT, P_INT),
+    "FDwfAnalogOutNodeEnableSet": (HDWF, INT, ENUM, INT),
+    "FDwfAnalogOutNodeFunctionSet": (HDWF, INT, ENUM, FUNC),
+    "FDwfAnalogOutNodeFrequencyInfo": (HDWF, INT, ENUM, P_DOUBLE, P_DOUBLE),
+    "FDwfAnalogOutNodeFrequencySet": (HDWF, INT, ENUM, DOUBLE),
+    "FDwfAnalogOutNodeAmplitudeInfo": (HDWF, INT, ENUM, P_DOUBLE, P_DOUBLE),
+    "FDwfAnalogOutNodeAmplitudeSet": (HDWF, INT, ENUM, DOUBLE),
+    "FDwfAnalogOutNodeOffsetInfo": (HDWF, INT, ENUM, P_DOUBLE, P_DOUBLE),
+    "FDwfAnalogOutNodeOffsetSet": (HDWF, INT, ENUM, DOUBLE),
+    "FDwfAnalogOutNodeSymmetrySet": (HDWF, INT, ENUM, DOUBLE),
+    "FDwfAnalogOutNodeDataInfo": (HDWF, INT, ENUM, P_INT, P_INT),
+    "FDwfAnalogOutNodeDataSet": (HDWF, INT, ENUM, P_DOUBLE, INT),
+    "FDwfAnalogOutNodePlayStatus": (HDWF, INT, ENUM, P_INT, P_INT, P_INT),
+    "FDwfAnalogOutNodePlayData": (HDWF, INT, ENUM, P_DOUBLE, INT),
+    "FDwfAnalogOutRunSet": (HDWF, INT, DOUBLE),
+    "FDwfAnalogOutWaitSet": (HDWF, INT, DOUBLE),
+    "FDwfAnalogOutRepeatSet": (HDWF, INT, INT),
+
+    # analog I/O
+    "FDwfAnalogIOReset": (HDWF,),
+    "FDwfAnalogIOConfigure": (HDWF,),
+    "FDwfAnalogIOStatus": (HDWF,),
+    "FDwfAnalogIOEnableSet": (HDWF, INT),
+    "FDwfAnalogIOChannelCount": (HDWF, P_INT),
+    "FDwfAnalogIOChannelName": (HDWF, INT, STRING, STRING),
+    "FDwfAnalogIOChannelInfo": (HDWF, INT, P_INT),
+    "FDwfAnalogIOChannelNodeName": (HDWF, INT, INT, STRING, STRING),
+    "FDwfAnalogIOChannelNodeSetInfo": (HDWF, INT, INT, P_DOUBLE, P_DOUBLE, P_INT),
+    "FDwfAnalogIOChannelNodeSet": (HDWF, INT, INT, DOUBLE),
+    "FDwfAnalogIOChannelNodeGet": (HDWF, INT, INT, P_DOUBLE),
+    "FDwfAnalogIOChannelNodeStatusInfo": (HDWF, INT, INT, P_DOUBLE, P_DOUBLE, P_INT),
+    "FDwfAnalogIOChannelNodeStatus": (HDWF, INT, INT, P_DOUBLE),
+
+    # digital I/O
+    "FDwfDigitalIOReset": (HDWF,),
+    "FDwfDigitalIOConfigure": (HDWF,),
+    "FDwfDigitalIOStatus": (HDWF,),
+    "FDwfDigitalIOOutputEnableSet": (HDWF, UINT),
+    "FDwfDigitalIOOutputEnableGet": (HDWF, P_UINT),
+    "FDwfDigitalIOOutputSet": (HDWF, UINT),
+    "FDwfDigitalIOOutputGet": (HDWF, P_UINT),
+    "FDwfDigitalIOInputStatus": (HDWF, P_UINT),
+
+    # digital input
+    "FDwfDigitalInReset": (HDWF,),
+    "FDwfDigitalInConfigure": (HDWF, INT, INT),
+    "FDwfDigitalInStatus": (HDWF, INT, P_STS),
+    "FDwfDigitalInStatusData": (HDWF, VOID_P, INT),
+    "FDwfDigitalInStatusRecord": (HDWF, P_INT, P_INT, P_INT),
+    "FDwfDigitalInInternalClockInfo": (HDWF, P_DOUBLE),
+    "FDwfDigitalInDividerSet": (HDWF, UINT),
+    "FDwfDigitalInBitsInfo": (HDWF, P_INT),
+    "FDwfDigitalInSampleFormatSet": (HDWF, INT),
+    "FDwfDigitalInBufferSizeInfo": (HDWF, P_INT),
+    "FDwfDigitalInBufferSizeSet": (HDWF, INT),
+    "FDwfDigitalInAcquisitionModeSet": (HDWF, ENUM),
+    "FDwfDigitalInTriggerSourceSet": (HDWF, TRIGSRC),
+    "FDwfDigitalInTriggerPositionSet": (HDWF, UINT),
+    "FDwfDigitalInTriggerPrefillSet": (HDWF, UINT),
+    "FDwfDigitalInTriggerAutoTimeoutSet": (HDWF, DOUBLE),
+    "FDwfDigitalInTriggerSet": (HDWF, UINT, UINT, UINT, UINT),
+    "FDwfDigitalInTriggerResetSet": (HDWF, UINT, UINT, UINT, UINT),
+    "FDwfDigitalInTriggerCountSet": (HDWF, INT, INT),
+    "FDwfDigitalInTriggerLengthSet": (HDWF, DOUBLE, DOUBLE, INT),
+
+    # digital output
+    "FDwfDigitalOutReset": (HDWF,),
+    "FDwfDigitalOutConfigure": (HDWF, INT),
+    "FDwfDigitalOutStatus": (HDWF, P_STS),
+    "FDwfDigitalOutInternalClockInfo": (HDWF, P_DOUBLE),
+    "FDwfDigitalOutTriggerSourceSet": (HDWF, TRIGSRC),
+    "FDwfDigitalOutTriggerSlopeSet": (HDWF, ENUM),
+    "FDwfDigitalOutRunSet": (HDWF, DOUBLE),
+    "FDwfDigitalOutWaitSet": (HDWF, DOUBLE),
+    "FDwfDigitalOutRepeatSet": (HDWF, UINT),
+    "FDwfDigitalOutRepeatTriggerSet": (HDWF, INT),
+    "FDwfDigitalOutCount": (HDWF, P_INT),
+    "FDwfDigitalOutEnableSet": (HDWF, INT, INT),
+    "FDwfDigitalOutTypeSet": (HDWF, INT, ENUM),
+    "FDwfDigitalOutIdleSet": (HDWF, INT, ENUM),
+    "FDwfDigitalOutDividerInfo": (HDWF, INT, P_UINT, P_UINT),
+    "FDwfDigitalOutDividerSet": (HDWF, INT, UINT),
+    "FDwfDigitalOutCounterInfo": (HDWF, INT, P_UINT, P_UINT),
+    "FDwfDigitalOutCounterSet": (HDWF, INT, UINT, UINT),
+    "FDwfDigitalOutDataInfo": (HDWF, INT, P_UINT),
+    "FDwfDigitalOutDataSet": (HDWF, INT, VOID_P, UINT),
+    "FDwfDigitalOutPlayRateSet": (HDWF, DOUBLE),
+    "FDwfDigitalOutPlayDataSet": (HDWF, VOID_P, UINT, UINT),
+    "FDwfDigitalOutPlayUpdateSet": (HDWF, VOID_P, UINT, UINT),
+
+    # UART
+    "FDwfDigitalUartReset": (HDWF,),
+    "FDwfDigitalUartRateSet": (HDWF, DOUBLE),
+    "FDwfDigitalUartBitsSet": (HDWF, INT),
+    "FDwfDigitalUartParitySet": (HDWF, INT),
+    "FDwfDigitalUartStopSet": (HDWF, DOUBLE),
+    "FDwfDigitalUartTxSet": (HDWF, INT),
+    "FDwfDigitalUartRxSet": (HDWF, INT),
+    "FDwfDigitalUartTx": (HDWF, VOID_P, INT),
+    "FDwfDigitalUartRx": (HDWF, VOID_P, INT, P_INT, P_INT),
+
+    # SPI
+    "FDwfDigitalSpiReset": (HDWF,),
+    "FDwfDigitalSpiFrequencySet": (HDWF, DOUBLE),
+    "FDwfDigitalSpiClockSet": (HDWF, INT),
+    "FDwfDigitalSpiDataSet": (HDWF, INT, INT),
+    "FDwfDigitalSpiIdleSet": (HDWF, INT, ENUM),
+    "FDwfDigitalSpiModeSet": (HDWF, INT),
+    "FDwfDigitalSpiOrderSet": (HDWF, INT),
+    "FDwfDigitalSpiSelect": (HDWF, INT, INT),
+    "FDwfDigitalSpiWriteRead": (HDWF, INT, INT, P_UBYTE, INT, P_UBYTE, INT),
+    "FDwfDigitalSpiRead": (HDWF, INT, INT, P_UBYTE, INT),
+    "FDwfDigitalSpiWrite": (HDWF, INT, INT, P_UBYTE, INT),
+    "FDwfDigitalSpiWriteOne": (HDWF, INT, INT, UINT),
+
+    # I2C
+    "FDwfDigitalI2cReset": (HDWF,),
+    "FDwfDigitalI2cClear": (HDWF, P_INT),
+    "FDwfDigitalI2cStretchSet": (HDWF, INT),
+    "FDwfDigitalI2cRateSet": (HDWF, DOUBLE),
+    "FDwfDigitalI2cSclSet": (HDWF, INT),
+    "FDwfDigitalI2cSdaSet": (HDWF, INT),
+    "FDwfDigitalI2cWriteRead": (HDWF, UBYTE, P_UBYTE, INT, P_UBYTE, INT, P_INT),
+    "FDwfDigitalI2cRead": (HDWF, UBYTE, P_UBYTE, INT, P_INT),
+    "FDwfDigitalI2cWrite": (HDWF, UBYTE, P_UBYTE, INT, P_INT),
+    "FDwfDigitalI2cSpyStart": (HDWF,),
+    "FDwfDigitalI2cSpyStatus": (HDWF, P_INT, P_INT, P_UBYTE, P_INT, P_INT),
+
+    # spectrum tools
+    "FDwfSpectrumWindow": (P_DOUBLE, INT, ENUM, DOUBLE, P_DOUBLE),
+    "FDwfSpectrumTransform": (P_DOUBLE, INT, P_DOUBLE, P_DOUBLE, INT, DOUBLE, DOUBLE)
+}
+
+"""-----------------------------------------------------------------------"""
+
+def declare(library):
+    """
+        set the argument and the return types of every known function
+
+        parameters: - the loaded WaveForms library
+
+        returns:    - the same library
+    """
+    for name, argument_types in table.items():
+        # older library versions can miss some functions
+        function = getattr(library, name, None)
+        if function is None:
+            continue
+        function.argtypes = argument_types
+        function.restype = BOOL
+    return library
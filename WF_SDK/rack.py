@@ -0,0 +1,190 @@
+""" MULTI-DEVICE ACQUISITION FUNCTIONS: open, trigger, record, close """
+
+import threading                  # one worker for every device
+import numpy                      # fast array handling
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
+from WF_SDK import device, scope, logic
+from WF_SDK.device import instrument, wait
+
+"""-----------------------------------------------------------------------"""
+
+class data:
+    """ stores the shared trigger of a device (the defaults, every device keeps its own copy) """
+    line = 0            # external trigger line (1-4), 0 means no shared trigger
+    master = False      # True if the device drives the trigger line
+
+"""-----------------------------------------------------------------------"""
+
+class capture:
+    """ the recording of one device, the time axes are in seconds, relative to the shared trigger """
+    def __init__(self, device_data):
+        self.device = device_data
+        self.scope = None           # NumPy array with one row of voltages for each channel
+        self.scope_time = None
+        self.logic = None           # NumPy array of 16-bit sample words, see logic.unpack
+        self.logic_time = None
+        return
+
+"""-----------------------------------------------------------------------"""
+
+def open(count=0, device_type=None, config=0):
+    """
+        open several devices
+
+        parameters: - number of devices, default is 0 (every free device)
+                    - device type, as in device.open(), default is None (any device)
+                    - configuration, as in device.open(), default is 0 (auto)
+
+        returns:    - a list of device data
+    """
+    devices = []
+    try:
+        while count == 0 or len(devices) < count:
+            devices.append(device.open(device_type, config))
+    except device.error:
+        # there are no more free devices
+        if count > 0 or len(devices) == 0:
+            close(devices)
+            raise
+    return devices
+
+"""-----------------------------------------------------------------------"""
+
+def trigger(devices, line=1, master=0, rising_edge=True, position=0, timeout=0):
+    """
+        trigger the scope and the logic analyzer of every device from an external trigger line
+
+        parameters: - list of device data
+                    - external trigger line (1-4) wired to every device, default is 1, 0 turns the shared trigger off
+                    - index of the device driving the line when record() starts, default is 0,
+                      None means the line is driven by other equipment
+                    - trigger edge rising - True means rising, False means falling, default is rising
+                    - samples recorded by the logic analyzer before the trigger, default is 0
+                      (the scope records half of its buffer before the trigger)
+                    - auto trigger timeout in seconds, default is 0 (wait for the trigger)
+    """
+    for index, device_data in enumerate(devices):
+        rack_data = instrument(device_data, data)
+
+        # turn off the shared trigger
+        if line == 0:
+            if rack_data.master:
+                checked.FDwfDeviceTriggerSet(device_data.handle, rack_data.line - 1, constants.trigsrcNone)
+            rack_data.line = 0
+            rack_data.master = False
+            scope.trigger(device_data, False)
+            logic.trigger(device_data, False, 0)
+            continue
+
+        rack_data.line = line
+        rack_data.master = (index == master)
+
+        # the master device drives the line when the software trigger is fired
+        if rack_data.master:
+            checked.FDwfDeviceTriggerSet(device_data.handle, line - 1, constants.trigsrcPC)
+
+        # the trigger is in the middle of the scope buffer
+        scope.trigger(device_data, True, scope.trigger_source.external[line], timeout=timeout, edge_rising=rising_edge)
+        checked.FDwfAnalogInTriggerPositionSet(device_data.handle, 0)
+        logic.trigger(device_data, True, 0, position=position, timeout=timeout, rising_edge=rising_edge, source=logic.trigger_source.external[line])
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def record(devices, channels=[1, 2], digital=True, timeout=0):
+    """
+        record with the scope and the logic analyzer of every device at the same time
+
+        every device is armed by its own thread, then the shared trigger is fired
+        (if trigger() selected a master device), and the threads collect the recordings in parallel
+
+        parameters: - list of device data
+                    - list of the recorded oscilloscope channels, default is [1, 2], an empty list disables the scope
+                    - digital - True records the DIO lines with the logic analyzer, default is True
+                    - timeout in seconds, default is 0 (wait_policy.timeout)
+
+        returns:    - a list of capture objects, in the order of the devices
+    """
+    results = [capture(device_data) for device_data in devices]
+    errors = [None] * len(devices)
+    armed = threading.Barrier(len(devices) + 1)
+
+    def worker(index):
+        device_data = devices[index]
+        try:
+            # arm the instruments
+            if len(channels) > 0:
+                checked.FDwfAnalogInConfigure(device_data.handle, False, True)
+            if digital:
+                checked.FDwfDigitalInConfigure(device_data.handle, False, True)
+            armed.wait()
+
+            # wait for the recordings and copy them
+            if len(channels) > 0:
+                scope_data = instrument(device_data, scope.data)
+                wait(lambda: scope.done(device_data), scope_data.buffer_size / scope_data.sampling_frequency, "record", "rack", timeout or None)
+                results[index].scope = scope.fetch(device_data, channels)
+                results[index].scope_time = __time__(device_data, scope_data.buffer_size, scope_data.sampling_frequency, scope_data.buffer_size // 2)
+            if digital:
+                logic_data = instrument(device_data, logic.data)
+                wait(lambda: logic.done(device_data), logic_data.buffer_size / logic_data.sampling_frequency, "record", "rack", timeout or None)
+                results[index].logic = logic.fetch(device_data)
+                results[index].logic_time = __time__(device_data, logic_data.buffer_size, logic_data.sampling_frequency, logic_data.position)
+        except Exception as exception:
+            errors[index] = exception
+            armed.abort()
+        return
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(devices))]
+    for thread in threads:
+        thread.start()
+
+    # fire the shared trigger when every device is armed
+    try:
+        armed.wait()
+        for device_data in devices:
+            if instrument(device_data, data).master:
+                checked.FDwfDeviceTriggerPC(device_data.handle)
+    except threading.BrokenBarrierError:
+        pass
+    for thread in threads:
+        thread.join()
+
+    # stop the acquisitions of every device, then report the first error
+    failures = [exception for exception in errors if exception is not None and not isinstance(exception, threading.BrokenBarrierError)]
+    if len(failures) > 0:
+        for device_data in devices:
+            try:
+                if len(channels) > 0:
+                    checked.FDwfAnalogInConfigure(device_data.handle, False, False)
+                if digital:
+                    checked.FDwfDigitalInConfigure(device_data.handle, False, False)
+            except Exception:
+                pass    # the device of the failure may be unusable
+        raise failures[0]
+    return results
+
+"""-----------------------------------------------------------------------"""
+
+def close(devices):
+    """
+        reset the instruments and close every device
+    """
+    for device_data in devices:
+        scope.close(device_data)
+        logic.close(device_data)
+        device.close(device_data)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __time__(device_data, buffer_size, sampling_frequency, position):
+    """
+        return the time of every sample relative to the trigger, or to the start without a shared trigger
+    """
+    if instrument(device_data, data).line == 0:
+        position = 0
+    return (numpy.arange(buffer_size) - position) / sampling_frequency
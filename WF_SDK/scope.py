@@ -1,33 +1,18 @@
-""" OSCILLOSCOPE CONTROL FUNCTIONS: open, measure, trigger, record, close """
+""" OSCILLOSCOPE CONTROL FUNCTIONS: open, measure, trigger, record, record_channels, stream, done, fetch, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+import numpy                      # fast array handling
+from time import sleep            # needed for delays
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked, shadowed
+from WF_SDK.device import wait, wait_policy, instrument
 
 """-----------------------------------------------------------------------"""
 
 class data:
-    """ stores the sampling frequency and the buffer size """
+    """ stores the sampling frequency and the buffer size (the defaults, every device keeps its own copy) """
     sampling_frequency = 20e06
     buffer_size = 8192
     max_buffer_size = 0
@@ -47,42 +32,45 @@ def open(device_data, sampling_frequency=20e06, buffer_size=0, offset=0, amplitu
     """
         initialize the oscilloscope
 
+        the settings equal to the ones written by the previous call are not sent to the device again
+
         parameters: - device data
                     - sampling frequency in Hz, default is 20MHz
                     - buffer size, default is 0 (maximum)
                     - offset voltage in Volts, default is 0V
                     - amplitude range in Volts, default is ±5V
     """
-    # set global variables
-    data.sampling_frequency = sampling_frequency
-    data.max_buffer_size = device_data.analog.input.max_buffer_size
+    scope_data = instrument(device_data, data)
+
+    # store the settings of this device
+    scope_data.sampling_frequency = sampling_frequency
+    scope_data.max_buffer_size = device_data.analog.input.max_buffer_size
 
     # enable all channels
-    if dwf.FDwfAnalogInChannelEnableSet(device_data.handle, ctypes.c_int(-1), ctypes.c_bool(True)) == 0:
-        check_error()
+    shadowed.FDwfAnalogInChannelEnableSet(device_data.handle, -1, True)
     
     # set offset voltage (in Volts)
-    if dwf.FDwfAnalogInChannelOffsetSet(device_data.handle, ctypes.c_int(-1), ctypes.c_double(offset)) == 0:
-        check_error()
+    shadowed.FDwfAnalogInChannelOffsetSet(device_data.handle, -1, offset)
     
     # set range (maximum signal amplitude in Volts)
-    if dwf.FDwfAnalogInChannelRangeSet(device_data.handle, ctypes.c_int(-1), ctypes.c_double(amplitude_range)) == 0:
-        check_error()
+    shadowed.FDwfAnalogInChannelRangeSet(device_data.handle, -1, amplitude_range)
     
     # set the buffer size (data point in a recording)
     if buffer_size == 0:
-        buffer_size = data.max_buffer_size
-    data.buffer_size = buffer_size
-    if dwf.FDwfAnalogInBufferSizeSet(device_data.handle, ctypes.c_int(buffer_size)) == 0:
-        check_error()
+        buffer_size = scope_data.max_buffer_size
+    scope_data.buffer_size = buffer_size
+    shadowed.FDwfAnalogInBufferSizeSet(device_data.handle, buffer_size)
     
     # set the acquisition frequency (in Hz)
-    if dwf.FDwfAnalogInFrequencySet(device_data.handle, ctypes.c_double(sampling_frequency)) == 0:
-        check_error()
+    shadowed.FDwfAnalogInFrequencySet(device_data.handle, sampling_frequency)
     
     # disable averaging (for more info check the documentation)
-    if dwf.FDwfAnalogInChannelFilterSet(device_data.handle, ctypes.c_int(-1), constants.filterDecimate) == 0:
-        check_error()
+    shadowed.FDwfAnalogInChannelFilterSet(device_data.handle, -1, constants.filterDecimate)
+
+    # the module-level data follows the last opened scope, for scripts reading scope.data
+    data.sampling_frequency = scope_data.sampling_frequency
+    data.buffer_size = scope_data.buffer_size
+    data.max_buffer_size = scope_data.max_buffer_size
     return
 
 """-----------------------------------------------------------------------"""
@@ -97,17 +85,14 @@ def measure(device_data, channel):
         returns:    - the measured voltage in Volts
     """
     # set up the instrument
-    if dwf.FDwfAnalogInConfigure(device_data.handle, ctypes.c_bool(False), ctypes.c_bool(False)) == 0:
-        check_error()
+    checked.FDwfAnalogInConfigure(device_data.handle, False, False)
     
     # read data to an internal buffer
-    if dwf.FDwfAnalogInStatus(device_data.handle, ctypes.c_bool(False), ctypes.c_int(0)) == 0:
-        check_error()
+    checked.FDwfAnalogInStatus(device_data.handle, False, None)
     
     # extract data from that buffer
     voltage = ctypes.c_double()   # variable to store the measured voltage
-    if dwf.FDwfAnalogInStatusSample(device_data.handle, ctypes.c_int(channel - 1), ctypes.byref(voltage)) == 0:
-        check_error()
+    checked.FDwfAnalogInStatusSample(device_data.handle, channel - 1, ctypes.byref(voltage))
     
     # store the result as float
     voltage = voltage.value
@@ -129,83 +114,217 @@ def trigger(device_data, enable, source=trigger_source.none, channel=1, timeout=
     """
     if enable and source != constants.trigsrcNone:
         # enable/disable auto triggering
-        if dwf.FDwfAnalogInTriggerAutoTimeoutSet(device_data.handle, ctypes.c_double(timeout)) == 0:
-            check_error()
+        checked.FDwfAnalogInTriggerAutoTimeoutSet(device_data.handle, timeout)
 
         # set trigger source
-        if dwf.FDwfAnalogInTriggerSourceSet(device_data.handle, source) == 0:
-            check_error()
+        checked.FDwfAnalogInTriggerSourceSet(device_data.handle, source)
 
         # set trigger channel
         if source == constants.trigsrcDetectorAnalogIn:
             channel -= 1    # decrement analog channel index
-        if dwf.FDwfAnalogInTriggerChannelSet(device_data.handle, ctypes.c_int(channel)) == 0:
-            check_error()
+        checked.FDwfAnalogInTriggerChannelSet(device_data.handle, channel)
 
         # set trigger type
-        if dwf.FDwfAnalogInTriggerTypeSet(device_data.handle, constants.trigtypeEdge) == 0:
-            check_error()
+        checked.FDwfAnalogInTriggerTypeSet(device_data.handle, constants.trigtypeEdge)
 
         # set trigger level
-        if dwf.FDwfAnalogInTriggerLevelSet(device_data.handle, ctypes.c_double(level)) == 0:
-            check_error()
+        checked.FDwfAnalogInTriggerLevelSet(device_data.handle, level)
 
         # set trigger edge
         if edge_rising:
             # rising edge
-            if dwf.FDwfAnalogInTriggerConditionSet(device_data.handle, constants.trigcondRisingPositive) == 0:
-                check_error()
+            checked.FDwfAnalogInTriggerConditionSet(device_data.handle, constants.trigcondRisingPositive)
         else:
             # falling edge
-            if dwf.FDwfAnalogInTriggerConditionSet(device_data.handle, constants.trigcondFallingNegative) == 0:
-                check_error()
+            checked.FDwfAnalogInTriggerConditionSet(device_data.handle, constants.trigcondFallingNegative)
     else:
         # turn off the trigger
-        if dwf.FDwfAnalogInTriggerSourceSet(device_data.handle, constants.trigsrcNone) == 0:
-            check_error()
+        checked.FDwfAnalogInTriggerSourceSet(device_data.handle, constants.trigsrcNone)
     return
 
 """-----------------------------------------------------------------------"""
 
-def record(device_data, channel):
+def record(device_data, channel, as_array=False):
     """
         record an analog signal
 
         parameters: - device data
                     - the selected oscilloscope channel (1-2, or 1-4)
+                    - as_array: True returns a NumPy array view over the recorded buffer, default is False (list)
 
-        returns:    - a list with the recorded voltages
+        returns:    - a list (or a NumPy array) with the recorded voltages
     """
-    # set up the instrument
-    if dwf.FDwfAnalogInConfigure(device_data.handle, ctypes.c_bool(False), ctypes.c_bool(True)) == 0:
-        check_error()
-    
-    # read data to an internal buffer
-    while True:
-        status = ctypes.c_byte()    # variable to store buffer status
-        if dwf.FDwfAnalogInStatus(device_data.handle, ctypes.c_bool(True), ctypes.byref(status)) == 0:
-            check_error()
-    
-        # check internal buffer status
-        if status.value == constants.DwfStateDone.value:
-                # exit loop when ready
-                break
+    scope_data = instrument(device_data, data)
+
+    # start the acquisition and wait for it to finish
+    __acquire__(device_data)
     
     # copy buffer
-    buffer = (ctypes.c_double * data.buffer_size)()   # create an empty buffer
-    if dwf.FDwfAnalogInStatusData(device_data.handle, ctypes.c_int(channel - 1), buffer, ctypes.c_int(data.buffer_size)) == 0:
-        check_error()
+    buffer = (ctypes.c_double * scope_data.buffer_size)()   # create an empty buffer
+    checked.FDwfAnalogInStatusData(device_data.handle, channel - 1, buffer, scope_data.buffer_size)
     
+    # wrap the buffer without copying
+    if as_array:
+        return numpy.ctypeslib.as_array(buffer)
+
     # convert into list
     buffer = [float(element) for element in buffer]
     return buffer
 
 """-----------------------------------------------------------------------"""
 
+def record_channels(device_data, channels=[1, 2]):
+    """
+        record analog signals on several channels with a single acquisition
+
+        parameters: - device data
+                    - list of the selected oscilloscope channels (1-2, or 1-4), default is [1, 2]
+
+        returns:    - a NumPy array with one row of recorded voltages for each channel
+    """
+    # start the acquisition and wait for it to finish
+    __acquire__(device_data)
+
+    # copy every channel into its own row of a single buffer
+    return fetch(device_data, channels)
+
+"""-----------------------------------------------------------------------"""
+
+def stream(device_data, channels=[1], chunk_size=0, duration=0):
+    """
+        record analog signals continuously, without gaps between buffers
+
+        parameters: - device data
+                    - list of the selected oscilloscope channels (1-2, or 1-4), default is [1]
+                    - chunk size in samples, default is 0 (the buffer size)
+                    - duration of the recording in seconds, default is 0 (infinite)
+
+        returns:    - a generator of (chunk, lost, corrupted) tuples, where chunk is a NumPy array
+                      with one row of voltages for each channel, lost and corrupted are the number
+                      of samples dropped, or possibly damaged while filling that chunk
+                      (the last chunk of a finite recording can be shorter)
+    """
+    scope_data = instrument(device_data, data)
+
+    if chunk_size == 0:
+        chunk_size = scope_data.buffer_size
+    channel_count = len(channels)
+
+    # set up the instrument for record mode
+    checked.FDwfAnalogInAcquisitionModeSet(device_data.handle, constants.acqmodeRecord)
+    checked.FDwfAnalogInRecordLengthSet(device_data.handle, duration)
+    checked.FDwfAnalogInConfigure(device_data.handle, False, True)
+
+    # buffers for the newly arrived samples and for the chunk being filled
+    staging = numpy.empty((channel_count, scope_data.buffer_size), dtype=numpy.float64)
+    chunk = numpy.empty((channel_count, chunk_size), dtype=numpy.float64)
+    position = 0
+    lost_count = 0
+    corrupted_count = 0
+
+    # variables to store the buffer status
+    status = ctypes.c_ubyte()
+    available = ctypes.c_int()
+    lost = ctypes.c_int()
+    corrupted = ctypes.c_int()
+
+    try:
+        while True:
+            # read the acquisition state
+            checked.FDwfAnalogInStatus(device_data.handle, True, ctypes.byref(status))
+            checked.FDwfAnalogInStatusRecord(device_data.handle, ctypes.byref(available), ctypes.byref(lost), ctypes.byref(corrupted))
+            lost_count += lost.value
+            corrupted_count += corrupted.value
+
+            # wait for new samples
+            count = available.value
+            if count == 0 and status.value != constants.DwfStateDone.value:
+                sleep(wait_policy.min_interval)
+                continue
+
+            # copy the new samples of every channel
+            if count > staging.shape[1]:
+                staging = numpy.empty((channel_count, count), dtype=numpy.float64)
+            for row, channel in enumerate(channels):
+                if count > 0:
+                    checked.FDwfAnalogInStatusData(device_data.handle, channel - 1, staging[row].ctypes.data_as(ctypes.POINTER(ctypes.c_double)), count)
+
+            # distribute the new samples into chunks
+            index = 0
+            while index < count:
+                length = min(chunk_size - position, count - index)
+                chunk[:, position:position + length] = staging[:, index:index + length]
+                position += length
+                index += length
+                if position == chunk_size:
+                    yield chunk, lost_count, corrupted_count
+                    chunk = numpy.empty((channel_count, chunk_size), dtype=numpy.float64)
+                    position = 0
+                    lost_count = 0
+                    corrupted_count = 0
+
+            # stop when a finite recording is finished
+            if status.value == constants.DwfStateDone.value:
+                if position > 0:
+                    yield chunk[:, :position], lost_count, corrupted_count
+                break
+    finally:
+        # stop the acquisition and return to single acquisition mode
+        checked.FDwfAnalogInConfigure(device_data.handle, False, False)
+        checked.FDwfAnalogInAcquisitionModeSet(device_data.handle, constants.acqmodeSingle)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def done(device_data):
+    """
+        check if the acquisition is done, for acquisitions started without record()
+
+        parameters: - device data
+
+        returns:    - True if the acquisition is done
+    """
+    status = ctypes.c_ubyte()    # variable to store buffer status
+    checked.FDwfAnalogInStatus(device_data.handle, True, ctypes.byref(status))
+    return status.value == constants.DwfStateDone.value
+
+"""-----------------------------------------------------------------------"""
+
+def fetch(device_data, channels):
+    """
+        copy the recorded channels of a finished acquisition into the rows of a NumPy array
+
+        parameters: - device data
+                    - list of the selected oscilloscope channels (1-2, or 1-4)
+
+        returns:    - a NumPy array with one row of voltages for every channel
+    """
+    scope_data = instrument(device_data, data)
+    buffer = numpy.empty((len(channels), scope_data.buffer_size), dtype=numpy.float64)
+    for row, channel in enumerate(channels):
+        checked.FDwfAnalogInStatusData(device_data.handle, channel - 1, buffer[row].ctypes.data_as(ctypes.POINTER(ctypes.c_double)), scope_data.buffer_size)
+    return buffer
+
+"""-----------------------------------------------------------------------"""
+
 def close(device_data):
     """
         reset the scope
     """
-    if dwf.FDwfAnalogInReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfAnalogInReset(device_data.handle)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __acquire__(device_data):
+    """
+        start a single acquisition and wait until it is done
+    """
+    scope_data = instrument(device_data, data)
+
+    # set up the instrument
+    checked.FDwfAnalogInConfigure(device_data.handle, False, True)
+    
+    # read data to an internal buffer
+    wait(lambda: done(device_data), scope_data.buffer_size / scope_data.sampling_frequency, "record", "scope")
     return
@@ -0,0 +1,136 @@
+""" DIO SEQUENCER FUNCTIONS: assemble, run """
+
+import ctypes                     # import the C compatible data types
+import numpy                      # fast array handling
+
+# import constants and the library
+from WF_SDK.backend import checked
+from WF_SDK import device, pattern
+
+"""-----------------------------------------------------------------------"""
+
+class program:
+    """ an assembled sequence, the sample words of a parallel pattern """
+    def __init__(self, lines, words, frequency, initial):
+        self.lines = lines              # DIO line numbers, the first one is carried by the lowest bit of the words
+        self.words = words              # NumPy array with one word for every sample
+        self.frequency = frequency      # samples per second
+        self.initial = initial          # state of the lines before the start, bit n is DIO line n
+        return
+
+"""-----------------------------------------------------------------------"""
+
+def assemble(device_data, steps, frequency=1e06, initial=0):
+    """
+        assemble a sequence of DIO line changes into a pattern
+
+        the time of every step is rounded to the nearest sample, if a line has more steps in the same sample, the last one wins,
+        then the rate is lowered as long as every step stays on a sample, and the clock divider of the device can hold it,
+        so long waits take fewer samples
+
+        parameters: - device data
+                    - list of steps, every step is a tuple: (time in seconds from the start, DIO line number, True/False or 1/0),
+                      a pulse is two steps on the same line
+                    - frequency in Hz (samples per second), sets the time resolution, default is 1MHz
+                    - initial state of the lines before their first step, bit n is DIO line n, default is 0 (every line LOW)
+
+        returns:    - a program, which can be passed to run()
+    """
+    steps = sorted(steps, key=lambda step: step[0])     # stable, so steps at the same time keep their order
+    lines = sorted(set(step[1] for step in steps))
+    indices = numpy.array([int(round(step[0] * frequency)) for step in steps], dtype=numpy.int64)
+    if indices.size > 0 and indices[0] < 0:
+        raise device.error("The time of a step is negative", "assemble", "sequencer")
+
+    # the rate can be divided by any divisor of the step times without moving a step,
+    # but the clock divider of the device must not overflow
+    divisor = __divisor__(int(numpy.gcd.reduce(indices)) if indices.size > 0 else 0, __divider_room__(device_data, frequency))
+    if divisor > 1:
+        indices //= divisor
+        frequency /= divisor
+
+    # the state after the last step is held for one sample
+    count = int(indices.max()) + 1 if indices.size > 0 else 1
+    positions = numpy.arange(count)
+    words = numpy.zeros(count, dtype=numpy.int64)
+    for bit, line in enumerate(lines):
+        selected = [index for index, step in enumerate(steps) if step[1] == line]
+        values = numpy.array([1 if steps[index][2] else 0 for index in selected], dtype=numpy.int64)
+        # the last step of the line at, or before every sample
+        last = numpy.searchsorted(indices[selected], positions, side="right") - 1
+        level = numpy.where(last >= 0, values[numpy.maximum(last, 0)], (initial >> line) & 1)
+        words |= level << bit
+    return program(lines, words, frequency, initial)
+
+"""-----------------------------------------------------------------------"""
+
+def run(device_data, steps, frequency=1e06, initial=0, repeat=1, blocking=True, hold=False):
+    """
+        play a sequence of DIO line changes with the timing of the pattern generator
+
+        every line is loaded, then started with a single configure
+
+        the pattern generator drives the idle state of the lines while it is not running:
+        by default the lines are held in their initial state from loading until the start, and return to it after the end,
+        with hold=True they keep their last state after the end, but they take it already when the sequence is loaded
+
+        parameters: - device data
+                    - list of steps, as in assemble(), or an assembled program
+                    - frequency and initial state, as in assemble(), used only if the steps are not assembled
+                    - repeat count, default is 1, 0 means infinite
+                    - blocking - True waits for the end of the sequence, default is True
+                    - hold - True drives the last state while the sequence is not running, default is False (the initial state)
+    """
+    if not isinstance(steps, program):
+        steps = assemble(device_data, steps, frequency, initial)
+    if len(steps.lines) == 0:
+        return
+
+    # the whole sequence must fit in the buffer, streaming it could drop steps
+    buffer_size = device_data.digital.output.max_buffer_size
+    if steps.words.size > buffer_size:
+        raise device.error("The sequence needs " + str(steps.words.size) + " samples at " + str(steps.frequency) + "Hz, but the buffer holds "
+                           + str(buffer_size) + ", assemble it at " + str(int(steps.frequency * buffer_size / steps.words.size)) + "Hz, or lower, "
+                           + "or use step times which are multiples of a longer period", "run", "sequencer")
+
+    # the idle state is driven before the start and after the end
+    if hold:
+        idle = [(int(steps.words[-1]) >> bit) & 1 for bit in range(len(steps.lines))]
+    else:
+        idle = [(steps.initial >> line) & 1 for line in steps.lines]
+    idle = [pattern.idle_state.high if level else pattern.idle_state.low for level in idle]
+
+    pattern.generate_bus(device_data, steps.lines, steps.words, steps.frequency, repeat=repeat, run_time="auto", idle=idle)
+    if blocking and repeat > 0:
+        device.wait(lambda: pattern.done(device_data), steps.words.size * repeat / steps.frequency, "run", "sequencer")
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __divider_room__(device_data, frequency):
+    """
+        return how many times the rate can be divided before the clock divider of the pattern generator overflows
+    """
+    internal_frequency = ctypes.c_double()
+    checked.FDwfDigitalOutInternalClockInfo(device_data.handle, ctypes.byref(internal_frequency))
+    divider_min, divider_max = ctypes.c_uint(), ctypes.c_uint()
+    checked.FDwfDigitalOutDividerInfo(device_data.handle, 0, ctypes.byref(divider_min), ctypes.byref(divider_max))
+    return divider_max.value // max(round(internal_frequency.value / frequency), 1)
+
+"""-----------------------------------------------------------------------"""
+
+def __divisor__(number, limit):
+    """
+        return the largest divisor of a number, which is not above the limit (1 if there is none)
+    """
+    if number <= limit:
+        return max(number, 1)
+    best = 1
+    factor = 1
+    while factor * factor <= number:
+        if number % factor == 0:
+            for candidate in (factor, number // factor):
+                if best < candidate <= limit:
+                    best = candidate
+        factor += 1
+    return best
@@ -0,0 +1,1208 @@
+""" SIMULATED DEVICE: in-process replacement of the WaveForms library, used without hardware """
+
+import ctypes                     # import the C compatible data types
+from time import perf_counter     # needed to simulate acquisition times
+import numpy                      # fast array handling
+
+# import constants
+from WF_SDK.loader import constants
+
+"""-----------------------------------------------------------------------"""
+
+class settings:
+    """ simulation settings, change them before opening a device """
+    device_count = 1        # number of simulated devices
+    realtime = True         # True: acquisitions take as long as on the hardware, False: they finish instantly
+    version = "3.22.2"      # reported WaveForms version
+
+class limits:
+    """ capabilities of the simulated device (an Analog Discovery 2 with every AnalogIO channel) """
+    device_id = 3
+    device_revision = 8
+    analog_in_channels = 2
+    analog_in_buffer = 8192
+    analog_in_bits = 14
+    analog_in_frequency = 100e06
+    analog_in_range = (0.5, 50.0, 2)
+    analog_in_offset = (-25.0, 25.0, 2)
+    analog_out_channels = 2
+    analog_out_nodes = 0b111
+    analog_out_buffer = 4096
+    analog_out_amplitude = (0.0, 5.0)
+    analog_out_offset = (-5.0, 5.0)
+    analog_out_frequency = (0.0, 12e06)
+    digital_in_bits = 16
+    digital_in_buffer = 4096
+    digital_in_frequency = 100e06
+    digital_out_channels = 16
+    digital_out_buffer = 1024
+    digital_out_frequency = 100e06
+    digital_out_counter = 32768
+    digital_out_divider = 2 ** 32 - 1
+    # AnalogIO channels: (name, label, [(node name, unit, set range, read range)])
+    analog_io = [
+        ("Positive Supply", "V+", [("Enable", "", (0, 1, 2), None), ("Voltage", "V", (0.5, 5.0, 256), (0.0, 5.5, 4096)), ("Current", "A", (0.0, 0.7, 256), (0.0, 1.0, 4096))]),
+        ("Negative Supply", "V-", [("Enable", "", (0, 1, 2), None), ("Voltage", "V", (-5.0, -0.5, 256), (-5.5, 0.0, 4096)), ("Current", "A", (0.0, 0.7, 256), (0.0, 1.0, 4096))]),
+        ("Digital Supply", "VDD", [("Enable", "", (0, 1, 2), None), ("Voltage", "V", (1.2, 3.3, 256), (0.0, 3.6, 4096)), ("Current", "A", (0.0, 0.1, 256), (0.0, 0.2, 4096)),
+                                   ("Drive", "A", (0.002, 0.016, 6), None), ("DIOPE", "", (0, 65535, 65536), None), ("DIOPP", "", (0, 65535, 65536), None), ("DINPP", "", (0, 65535, 65536), None)]),
+        ("USB Monitor", "USB", [("Voltage", "V", None, (0.0, 6.0, 4096)), ("Current", "A", None, (0.0, 1.0, 4096))]),
+        ("System Monitor", "System", [("Temp", "C", None, (-40.0, 125.0, 4096))]),
+        ("Digital Multimeter", "DMM", [("Enable", "", (0, 1, 2), None), ("Mode", "", (0, 10, 11), None), ("Range", "", (0, 1000, 0), None), ("Meas", "", None, (-1e09, 1e09, 0)),
+                                       ("Raw", "", None, (-1e09, 1e09, 0)), ("Input", "", (0, 1, 2), None)]),
+    ]
+
+"""-----------------------------------------------------------------------"""
+
+class __state__:
+    """ state of one simulated device """
+    def __init__(self, index):
+        self.index = index
+        self.start = perf_counter()
+        # analog input
+        self.analog_in = __namespace__(frequency=20e06, buffer_size=limits.analog_in_buffer, mode=constants.acqmodeSingle.value,
+                                       record_length=0.0, running=False, configured=0.0, consumed=0, samples=None,
+                                       range=[5.0] * limits.analog_in_channels, offset=[0.0] * limits.analog_in_channels,
+                                       enable=[True] * limits.analog_in_channels, trigger_source=0, triggered=False)
+        # analog output
+        self.analog_out = [__namespace__(enable=False, function=constants.funcSine.value, frequency=1e03, amplitude=1.0, offset=0.0,
+                                         symmetry=50.0, data=numpy.zeros(0), running=False, started=0.0, run=0.0, wait=0.0, repeat=0,
+                                         queued=0)
+                           for _ in range(limits.analog_out_channels)]
+        # analog IO
+        self.analog_io_enable = False
+        self.analog_io = [[0.0] * len(channel[2]) for channel in limits.analog_io]
+        self.analog_io_status = [[0.0] * len(channel[2]) for channel in limits.analog_io]
+        # digital input
+        self.digital_in = __namespace__(divider=1, format=16, buffer_size=limits.digital_in_buffer, mode=constants.acqmodeSingle.value,
+                                        position=0, running=False, configured=0.0, consumed=0, samples=None, trigger_source=0, triggered=False)
+        # digital output
+        self.digital_out = [__namespace__(enable=False, type=constants.DwfDigitalOutTypePulse.value, divider=1, low=1, high=1,
+                                          idle=0, data=numpy.zeros(0, dtype=numpy.uint8)) for _ in range(limits.digital_out_channels)]
+        self.digital_out_running = False
+        self.digital_out_started = 0.0
+        self.digital_out_run = 0.0
+        self.digital_out_repeat = 0
+        self.digital_play = __namespace__(rate=1e06, bits=8, data=numpy.zeros(0, dtype=numpy.uint32))
+        # digital IO
+        self.io_enable = 0
+        self.io_output = 0
+        self.io_input = 0           # levels driven by the simulated outside world
+        self.io_status = 0
+        # trigger pins and software trigger
+        self.trigger_pins = {}
+        self.pc_trigger = None
+        # protocols
+        self.uart = bytearray()
+        return
+
+class __namespace__:
+    """ simple attribute container """
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+        return
+
+__devices__ = {}      # open devices, keyed by handle
+__last_error__ = ""   # last error message
+__external_triggers__ = [None] * 4    # moment of the last pulse on the external trigger lines, shared by every device
+
+"""-----------------------------------------------------------------------"""
+
+def set_inputs(handle, mask):
+    """
+        set the levels driven into the DIO lines of a simulated device by the outside world
+
+        parameters: - device handle
+                    - bit mask of the DIO line levels
+    """
+    __devices__[__value__(handle)].io_input = int(mask)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def __value__(argument):
+    """ return the Python value of a ctypes, or Python argument """
+    return getattr(argument, "value", argument)
+
+def __store__(reference, value):
+    """ write a value through a ctypes reference, None means the value is not needed """
+    if reference is not None:
+        getattr(reference, "_obj", reference).value = value
+    return
+
+def __address__(argument):
+    """ return the memory address of a ctypes array, pointer, or reference """
+    if hasattr(argument, "_obj"):
+        return ctypes.addressof(argument._obj)
+    return ctypes.cast(argument, ctypes.c_void_p).value
+
+def __array__(argument, ctype, count):
+    """ return a NumPy view over a ctypes array, pointer, or reference """
+    if count <= 0:
+        return numpy.zeros(0, dtype=numpy.dtype(ctype))
+    return numpy.ctypeslib.as_array((ctype * count).from_address(__address__(argument)))
+
+def __fail__(message):
+    """ record an error and return the failure code """
+    global __last_error__
+    __last_error__ = message
+    return 0
+
+def __device__(handle):
+    """ return the state of an open device, or None """
+    return __devices__.get(__value__(handle))
+
+def __elapsed__(start):
+    """ return the simulated time since a given moment """
+    return perf_counter() - start
+
+def __setter__(instrument, attribute, convert=float):
+    """ create a function setting one instrument parameter """
+    def function(handle, value):
+        device = __device__(handle)
+        if device is None:
+            return __fail__("Invalid device handle")
+        setattr(getattr(device, instrument), attribute, convert(__value__(value)))
+        return 1
+    return function
+
+def __accept__(*arguments):
+    """ accept a call without simulating its effect """
+    return 1
+
+def __triggered__(device, instrument):
+    """ move the start of an acquisition to its trigger event, return False while it waits for the trigger """
+    source = instrument.trigger_source
+    if source == constants.trigsrcPC.value:
+        moment = device.pc_trigger
+    elif constants.trigsrcExternal1.value <= source <= constants.trigsrcExternal4.value:
+        moment = __external_triggers__[source - constants.trigsrcExternal1.value]
+    else:
+        return True
+    if instrument.triggered:
+        return True
+    if moment is None or moment < instrument.configured:
+        return False
+    instrument.configured = moment
+    instrument.triggered = True
+    return True
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfGetLastError(error_code):
+    __store__(error_code, 0 if __last_error__ == "" else 1)
+    return 1
+
+def FDwfGetLastErrorMsg(message):
+    global __last_error__
+    message.value = __last_error__.encode("ascii")
+    __last_error__ = ""
+    return 1
+
+def FDwfGetVersion(version):
+    version.value = settings.version.encode("ascii")
+    return 1
+
+def FDwfEnum(enum_filter, count):
+    __store__(count, settings.device_count)
+    return 1
+
+def FDwfEnumDeviceType(index, device_id, device_revision):
+    if not 0 <= __value__(index) < settings.device_count:
+        return __fail__("Invalid device index")
+    __store__(device_id, limits.device_id)
+    __store__(device_revision, limits.device_revision)
+    return 1
+
+def FDwfEnumSN(index, serial):
+    if not 0 <= __value__(index) < settings.device_count:
+        return __fail__("Invalid device index")
+    serial.value = ("SN:SIM%06d" % __value__(index)).encode("ascii")
+    return 1
+
+def FDwfDeviceOpen(index, handle):
+    return FDwfDeviceConfigOpen(index, 0, handle)
+
+def FDwfDeviceConfigOpen(index, config, handle):
+    index = __value__(index)
+    if index < 0:
+        index = next((device for device in range(settings.device_count) if device + 1 not in __devices__), settings.device_count)
+    if not 0 <= index < settings.device_count:
+        __store__(handle, 0)
+        return __fail__("Invalid device index")
+    if index + 1 in __devices__:
+        __store__(handle, 0)
+        return __fail__("Device is busy")
+    __devices__[index + 1] = __state__(index)
+    __store__(handle, index + 1)
+    return 1
+
+def FDwfDeviceClose(handle):
+    __devices__.pop(__value__(handle), None)
+    return 1
+
+def FDwfDeviceCloseAll():
+    __devices__.clear()
+    return 1
+
+def FDwfDeviceTriggerSet(handle, pin, source):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    if not 0 <= __value__(pin) < len(__external_triggers__):
+        return __fail__("Invalid trigger pin")
+    device.trigger_pins[__value__(pin)] = __value__(source)
+    return 1
+
+def FDwfDeviceTriggerPC(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    moment = perf_counter()
+    device.pc_trigger = moment
+    # the trigger pins driven by the software trigger pulse the lines shared by every device
+    for pin, source in device.trigger_pins.items():
+        if source == constants.trigsrcPC.value:
+            __external_triggers__[pin] = moment
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def __analog_output__(device, channel, time):
+    """ return the voltages generated on an analog output channel at the given moments """
+    if channel >= len(device.analog_out):
+        return numpy.zeros(len(time))
+    output = device.analog_out[channel]
+    if not (output.enable and output.running):
+        return numpy.zeros(len(time))
+    phase = numpy.mod(time * output.frequency, 1.0)
+    symmetry = min(max(output.symmetry / 100.0, 1e-06), 1 - 1e-06)
+    function = output.function
+    if function == constants.funcDC.value:
+        shape = numpy.zeros(len(time))
+    elif function == constants.funcSine.value:
+        shape = numpy.sin(2 * numpy.pi * phase)
+    elif function == constants.funcSquare.value:
+        shape = numpy.where(phase < symmetry, 1.0, -1.0)
+    elif function == constants.funcTriangle.value:
+        shape = numpy.where(phase < symmetry, -1 + 2 * phase / symmetry, 1 - 2 * (phase - symmetry) / (1 - symmetry))
+    elif function == constants.funcRampUp.value:
+        shape = -1 + 2 * phase
+    elif function == constants.funcRampDown.value:
+        shape = 1 - 2 * phase
+    elif function == constants.funcPulse.value:
+        shape = numpy.where(phase < symmetry, 1.0, 0.0)
+    elif function == constants.funcTrapezium.value:
+        shape = numpy.clip(2 * numpy.where(phase < 0.5, -1 + 4 * phase, 3 - 4 * phase), -1, 1)
+    elif function == constants.funcSinePower.value:
+        shape = numpy.sin(2 * numpy.pi * phase) ** 3
+    elif function == constants.funcNoise.value:
+        shape = numpy.random.default_rng(channel).uniform(-1, 1, len(time))
+    elif function == constants.funcCustom.value and output.data.size > 0:
+        shape = output.data[(phase * output.data.size).astype(int)]
+    else:
+        shape = numpy.zeros(len(time))
+    return output.offset + output.amplitude * shape
+
+def __analog_input__(device, first, count):
+    """ return the voltages sampled on every analog input channel, starting at the given sample """
+    analog_in = device.analog_in
+    time = (first + numpy.arange(count)) / analog_in.frequency
+    samples = numpy.empty((limits.analog_in_channels, count))
+    step = 1.0 / (1 << limits.analog_in_bits)
+    for channel in range(limits.analog_in_channels):
+        low = analog_in.offset[channel] - analog_in.range[channel] / 2
+        high = analog_in.offset[channel] + analog_in.range[channel] / 2
+        voltage = numpy.clip(__analog_output__(device, channel, time), low, high)
+        # quantize to the ADC resolution
+        samples[channel] = numpy.round(voltage / (analog_in.range[channel] * step)) * analog_in.range[channel] * step
+    return samples
+
+def __produced__(instrument, frequency, buffer_size):
+    """ return the number of samples acquired since the instrument was started """
+    if not settings.realtime:
+        return instrument.consumed + buffer_size
+    return int(__elapsed__(instrument.configured) * frequency)
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfAnalogInChannelCount(handle, count):
+    __store__(count, limits.analog_in_channels)
+    return 1
+
+def FDwfAnalogInBufferSizeInfo(handle, minimum, maximum):
+    __store__(maximum, limits.analog_in_buffer)
+    return 1
+
+def FDwfAnalogInBitsInfo(handle, bits):
+    __store__(bits, limits.analog_in_bits)
+    return 1
+
+def FDwfAnalogInChannelRangeInfo(handle, minimum, maximum, steps):
+    for reference, value in zip((minimum, maximum, steps), limits.analog_in_range):
+        __store__(reference, value)
+    return 1
+
+def FDwfAnalogInChannelOffsetInfo(handle, minimum, maximum, steps):
+    for reference, value in zip((minimum, maximum, steps), limits.analog_in_offset):
+        __store__(reference, value)
+    return 1
+
+def __analog_in_channels__(device, channel):
+    """ return the list of channel indexes addressed by a channel parameter """
+    channel = __value__(channel)
+    if channel < 0:
+        return list(range(limits.analog_in_channels))
+    if channel >= limits.analog_in_channels:
+        return None
+    return [channel]
+
+def __analog_in_channel_setter__(attribute, convert):
+    """ create a function setting one parameter of one, or every analog input channel """
+    def function(handle, channel, value):
+        device = __device__(handle)
+        if device is None:
+            return __fail__("Invalid device handle")
+        channels = __analog_in_channels__(device, channel)
+        if channels is None:
+            return __fail__("Invalid channel index")
+        for index in channels:
+            getattr(device.analog_in, attribute)[index] = convert(__value__(value))
+        return 1
+    return function
+
+FDwfAnalogInChannelEnableSet = __analog_in_channel_setter__("enable", bool)
+FDwfAnalogInChannelOffsetSet = __analog_in_channel_setter__("offset", float)
+FDwfAnalogInChannelRangeSet = __analog_in_channel_setter__("range", lambda value: min(max(float(value), limits.analog_in_range[0]), limits.analog_in_range[1]))
+FDwfAnalogInChannelFilterSet = __accept__
+FDwfAnalogInFrequencySet = __setter__("analog_in", "frequency", lambda value: min(float(value), limits.analog_in_frequency))
+FDwfAnalogInBufferSizeSet = __setter__("analog_in", "buffer_size", lambda value: min(max(int(value), 16), limits.analog_in_buffer))
+FDwfAnalogInAcquisitionModeSet = __setter__("analog_in", "mode", int)
+FDwfAnalogInRecordLengthSet = __setter__("analog_in", "record_length", float)
+FDwfAnalogInTriggerSourceSet = __setter__("analog_in", "trigger_source", int)
+FDwfAnalogInTriggerAutoTimeoutSet = __accept__
+FDwfAnalogInTriggerPositionSet = __accept__
+FDwfAnalogInTriggerChannelSet = __accept__
+FDwfAnalogInTriggerTypeSet = __accept__
+FDwfAnalogInTriggerLevelSet = __accept__
+FDwfAnalogInTriggerConditionSet = __accept__
+
+def FDwfAnalogInConfigure(handle, reconfigure, start):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.analog_in.running = bool(__value__(start))
+    device.analog_in.configured = perf_counter()
+    device.analog_in.consumed = 0
+    device.analog_in.triggered = False
+    device.analog_in.samples = None
+    return 1
+
+def FDwfAnalogInStatus(handle, read_data, status):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    analog_in = device.analog_in
+    if not analog_in.running:
+        __store__(status, constants.DwfStateReady.value)
+        return 1
+    if not __triggered__(device, analog_in):
+        __store__(status, constants.DwfStateArmed.value)
+        return 1
+    produced = __produced__(analog_in, analog_in.frequency, analog_in.buffer_size)
+    if analog_in.mode == constants.acqmodeRecord.value:
+        # record mode: the status reports the newly arrived samples
+        total = int(analog_in.record_length * analog_in.frequency)
+        if total > 0:
+            produced = min(produced, total)
+        available = produced - analog_in.consumed
+        lost = max(0, available - analog_in.buffer_size)
+        first = analog_in.consumed + lost
+        analog_in.samples = (__analog_input__(device, first, available - lost), lost)
+        analog_in.consumed = produced
+        if total > 0 and produced >= total:
+            analog_in.running = False
+            __store__(status, constants.DwfStateDone.value)
+        else:
+            __store__(status, constants.DwfStateRunning.value)
+        return 1
+    if produced >= analog_in.buffer_size:
+        # single acquisition finished
+        if __value__(read_data):
+            analog_in.samples = (__analog_input__(device, 0, analog_in.buffer_size), 0)
+        analog_in.running = False
+        __store__(status, constants.DwfStateDone.value)
+    else:
+        __store__(status, constants.DwfStateTriggered.value)
+    return 1
+
+def FDwfAnalogInStatusRecord(handle, available, lost, corrupted):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    samples, lost_count = device.analog_in.samples if device.analog_in.samples is not None else (numpy.zeros((0, 0)), 0)
+    __store__(available, samples.shape[1])
+    __store__(lost, lost_count)
+    __store__(corrupted, 0)
+    return 1
+
+def FDwfAnalogInStatusData(handle, channel, buffer, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    channel = __value__(channel)
+    count = __value__(count)
+    if not 0 <= channel < limits.analog_in_channels:
+        return __fail__("Invalid channel index")
+    if device.analog_in.samples is None:
+        return __fail__("No data available")
+    samples = device.analog_in.samples[0][channel]
+    count = min(count, samples.size)
+    __array__(buffer, ctypes.c_double, count)[:] = samples[samples.size - count:]
+    return 1
+
+def FDwfAnalogInStatusSample(handle, channel, voltage):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    channel = __value__(channel)
+    if not 0 <= channel < limits.analog_in_channels:
+        return __fail__("Invalid channel index")
+    time = __elapsed__(device.start)
+    __store__(voltage, float(__analog_input__(device, int(time * device.analog_in.frequency), 1)[channel][0]))
+    return 1
+
+def FDwfAnalogInReset(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.analog_in = __state__(device.index).analog_in
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfAnalogOutCount(handle, count):
+    __store__(count, limits.analog_out_channels)
+    return 1
+
+def FDwfAnalogOutNodeInfo(handle, channel, nodes):
+    __store__(nodes, limits.analog_out_nodes)
+    return 1
+
+def FDwfAnalogOutNodeDataInfo(handle, channel, node, minimum, maximum):
+    __store__(maximum, limits.analog_out_buffer)
+    return 1
+
+def FDwfAnalogOutNodeAmplitudeInfo(handle, channel, node, minimum, maximum):
+    __store__(minimum, limits.analog_out_amplitude[0])
+    __store__(maximum, limits.analog_out_amplitude[1])
+    return 1
+
+def FDwfAnalogOutNodeOffsetInfo(handle, channel, node, minimum, maximum):
+    __store__(minimum, limits.analog_out_offset[0])
+    __store__(maximum, limits.analog_out_offset[1])
+    return 1
+
+def FDwfAnalogOutNodeFrequencyInfo(handle, channel, node, minimum, maximum):
+    __store__(minimum, limits.analog_out_frequency[0])
+    __store__(maximum, limits.analog_out_frequency[1])
+    return 1
+
+def __analog_out_channels__(device, channel):
+    """ return the list of analog output states addressed by a channel parameter """
+    channel = __value__(channel)
+    if channel < 0:
+        return device.analog_out
+    if channel >= len(device.analog_out):
+        return None
+    return [device.analog_out[channel]]
+
+def __analog_out_setter__(attribute, convert, node=True):
+    """ create a function setting one parameter of one, or every analog output channel """
+    def function(handle, channel, *arguments):
+        device = __device__(handle)
+        if device is None:
+            return __fail__("Invalid device handle")
+        outputs = __analog_out_channels__(device, channel)
+        if outputs is None:
+            return __fail__("Invalid channel index")
+        # only the carrier node is simulated
+        if node and __value__(arguments[0]) != constants.AnalogOutNodeCarrier.value:
+            return 1
+        for output in outputs:
+            setattr(output, attribute, convert(__value__(arguments[-1])))
+        return 1
+    return function
+
+FDwfAnalogOutNodeEnableSet = __analog_out_setter__("enable", bool)
+FDwfAnalogOutNodeFunctionSet = __analog_out_setter__("function", int)
+FDwfAnalogOutNodeFrequencySet = __analog_out_setter__("frequency", float)
+FDwfAnalogOutNodeAmplitudeSet = __analog_out_setter__("amplitude", float)
+FDwfAnalogOutNodeOffsetSet = __analog_out_setter__("offset", float)
+FDwfAnalogOutNodeSymmetrySet = __analog_out_setter__("symmetry", float)
+FDwfAnalogOutRunSet = __analog_out_setter__("run", float, node=False)
+FDwfAnalogOutWaitSet = __analog_out_setter__("wait", float, node=False)
+FDwfAnalogOutRepeatSet = __analog_out_setter__("repeat", int, node=False)
+
+def FDwfAnalogOutNodeDataSet(handle, channel, node, data, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    outputs = __analog_out_channels__(device, channel)
+    if outputs is None:
+        return __fail__("Invalid channel index")
+    count = __value__(count)
+    if count > limits.analog_out_buffer:
+        return __fail__("Data size exceeds the buffer size")
+    samples = numpy.clip(__array__(data, ctypes.c_double, count), -1, 1).copy()
+    for output in outputs:
+        output.data = samples
+        output.queued = count   # the first samples of a playback
+    return 1
+
+def __played__(output):
+    """ return the number of samples played since the channel was started """
+    if not output.running:
+        return 0
+    elapsed = __elapsed__(output.started)
+    if output.run > 0:
+        elapsed = min(elapsed, output.run)
+    return int(elapsed * output.frequency)
+
+def FDwfAnalogOutNodePlayStatus(handle, channel, node, free, lost, corrupted):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    outputs = __analog_out_channels__(device, channel)
+    if outputs is None or len(outputs) != 1:
+        return __fail__("Invalid channel index")
+    output = outputs[0]
+    played = __played__(output)
+    # the samples played from an empty buffer are lost
+    missing = max(played - output.queued, 0)
+    output.queued += missing
+    __store__(free, limits.analog_out_buffer - (output.queued - played))
+    __store__(lost, missing)
+    __store__(corrupted, 0)
+    return 1
+
+def FDwfAnalogOutNodePlayData(handle, channel, node, data, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    outputs = __analog_out_channels__(device, channel)
+    if outputs is None or len(outputs) != 1:
+        return __fail__("Invalid channel index")
+    output = outputs[0]
+    count = __value__(count)
+    if count > limits.analog_out_buffer - (output.queued - __played__(output)):
+        return __fail__("Data size exceeds the free space of the buffer")
+    output.data = numpy.clip(__array__(data, ctypes.c_double, count), -1, 1).copy()
+    output.queued += count
+    return 1
+
+def FDwfAnalogOutConfigure(handle, channel, start):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    outputs = __analog_out_channels__(device, channel)
+    if outputs is None:
+        return __fail__("Invalid channel index")
+    start = __value__(start)
+    for output in outputs:
+        if start == 0:
+            output.running = False
+        elif start == 1 or not output.running:
+            output.running = True
+            output.started = perf_counter()
+    return 1
+
+def FDwfAnalogOutStatus(handle, channel, status):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    outputs = __analog_out_channels__(device, channel)
+    if outputs is None:
+        return __fail__("Invalid channel index")
+    # a playback stops after its run time
+    for output in outputs:
+        if output.running and output.function == constants.funcPlay.value and 0 < output.run <= __elapsed__(output.started):
+            output.running = False
+    running = any(output.running for output in outputs)
+    __store__(status, constants.DwfStateRunning.value if running else constants.DwfStateDone.value)
+    return 1
+
+def FDwfAnalogOutReset(handle, channel):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    channel = __value__(channel)
+    fresh = __state__(device.index).analog_out
+    if channel < 0:
+        device.analog_out = fresh
+    elif channel < len(device.analog_out):
+        device.analog_out[channel] = fresh[channel]
+    else:
+        return __fail__("Invalid channel index")
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfAnalogIOChannelCount(handle, count):
+    __store__(count, len(limits.analog_io))
+    return 1
+
+def __analog_io_node__(handle, channel, node):
+    """ return the device state and the node description, or None """
+    device = __device__(handle)
+    channel = __value__(channel)
+    node = __value__(node)
+    if device is None or not 0 <= channel < len(limits.analog_io) or not 0 <= node < len(limits.analog_io[channel][2]):
+        return None, None
+    return device, limits.analog_io[channel][2][node]
+
+def FDwfAnalogIOChannelName(handle, channel, name, label):
+    channel = __value__(channel)
+    if not 0 <= channel < len(limits.analog_io):
+        return __fail__("Invalid channel index")
+    name.value = limits.analog_io[channel][0].encode("ascii")
+    label.value = limits.analog_io[channel][1].encode("ascii")
+    return 1
+
+def FDwfAnalogIOChannelInfo(handle, channel, count):
+    channel = __value__(channel)
+    if not 0 <= channel < len(limits.analog_io):
+        return __fail__("Invalid channel index")
+    __store__(count, len(limits.analog_io[channel][2]))
+    return 1
+
+def FDwfAnalogIOChannelNodeName(handle, channel, node, name, unit):
+    device, description = __analog_io_node__(handle, channel, node)
+    if description is None:
+        return __fail__("Invalid channel, or node index")
+    name.value = description[0].encode("ascii")
+    unit.value = description[1].encode("ascii")
+    return 1
+
+def FDwfAnalogIOChannelNodeSetInfo(handle, channel, node, minimum, maximum, steps):
+    device, description = __analog_io_node__(handle, channel, node)
+    if description is None:
+        return __fail__("Invalid channel, or node index")
+    for reference, value in zip((minimum, maximum, steps), description[2] or (0.0, 0.0, 0)):
+        __store__(reference, value)
+    return 1
+
+def FDwfAnalogIOChannelNodeStatusInfo(handle, channel, node, minimum, maximum, steps):
+    device, description = __analog_io_node__(handle, channel, node)
+    if description is None:
+        return __fail__("Invalid channel, or node index")
+    for reference, value in zip((minimum, maximum, steps), description[3] or (0.0, 0.0, 0)):
+        __store__(reference, value)
+    return 1
+
+def FDwfAnalogIOChannelNodeSet(handle, channel, node, value):
+    device, description = __analog_io_node__(handle, channel, node)
+    if description is None:
+        return __fail__("Invalid channel, or node index")
+    if description[2] is None:
+        return __fail__("The node is read-only")
+    value = float(__value__(value))
+    if description[2][2] > 0:
+        value = min(max(value, description[2][0]), description[2][1])
+    device.analog_io[__value__(channel)][__value__(node)] = value
+    return 1
+
+def FDwfAnalogIOChannelNodeGet(handle, channel, node, value):
+    device, description = __analog_io_node__(handle, channel, node)
+    if description is None:
+        return __fail__("Invalid channel, or node index")
+    __store__(value, device.analog_io[__value__(channel)][__value__(node)])
+    return 1
+
+def FDwfAnalogIOEnableSet(handle, enable):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.analog_io_enable = bool(__value__(enable))
+    return 1
+
+def __analog_io_reading__(device, channel, node):
+    """ return the simulated reading of an AnalogIO node """
+    label = limits.analog_io[channel][1]
+    name = limits.analog_io[channel][2][node][0]
+    nodes = [description[0] for description in limits.analog_io[channel][2]]
+    values = device.analog_io[channel]
+    time = __elapsed__(device.start)
+    if label in ("V+", "V-", "VDD"):
+        enabled = device.analog_io_enable and values[nodes.index("Enable")] != 0
+        if name == "Voltage":
+            return values[nodes.index("Voltage")] if enabled else 0.0
+        if name == "Current":
+            return 0.01 * abs(values[nodes.index("Voltage")]) if enabled else 0.0
+    elif label == "USB":
+        return 5.0 if name == "Voltage" else 0.25 + 0.005 * numpy.sin(time)
+    elif label == "System":
+        return 40.0 + min(time, 600.0) / 60.0
+    elif label == "DMM" and name in ("Meas", "Raw"):
+        if values[nodes.index("Enable")] == 0:
+            return 0.0
+        mode = values[nodes.index("Mode")]
+        readings = {constants.DwfDmmResistance.value: 1e03, constants.DwfDmmContinuity.value: 0.5, constants.DwfDmmDiode.value: 0.6,
+                    constants.DwfDmmDCVoltage.value: 3.3, constants.DwfDmmACVoltage.value: 1.0, constants.DwfDmmDCCurrent.value: 0.1,
+                    constants.DwfDmmACCurrent.value: 0.05, constants.DwfDmmDCLowCurrent.value: 1e-03, constants.DwfDmmACLowCurrent.value: 5e-04,
+                    constants.DwfDmmTemperature.value: 25.0}
+        return readings.get(mode, 0.0)
+    return values[node]
+
+def FDwfAnalogIOStatus(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    for channel in range(len(limits.analog_io)):
+        for node in range(len(limits.analog_io[channel][2])):
+            device.analog_io_status[channel][node] = __analog_io_reading__(device, channel, node)
+    return 1
+
+def FDwfAnalogIOChannelNodeStatus(handle, channel, node, value):
+    device, description = __analog_io_node__(handle, channel, node)
+    if description is None:
+        return __fail__("Invalid channel, or node index")
+    __store__(value, device.analog_io_status[__value__(channel)][__value__(node)])
+    return 1
+
+def FDwfAnalogIOReset(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.analog_io_enable = False
+    device.analog_io = [[0.0] * len(channel[2]) for channel in limits.analog_io]
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def __digital_output__(device, time):
+    """ return the DIO line levels at the given moments as sample words """
+    words = numpy.full(len(time), device.io_input & ~device.io_enable & 0xFFFF, dtype=numpy.uint32)
+    words |= device.io_output & device.io_enable & 0xFFFF
+    if not device.digital_out_running:
+        return words
+    time = time - (device.digital_out_started - device.start)
+    for channel, output in enumerate(device.digital_out):
+        if not output.enable:
+            continue
+        step = numpy.maximum(time * limits.digital_out_frequency / max(output.divider, 1), 0).astype(numpy.int64)
+        if output.type == constants.DwfDigitalOutTypePulse.value:
+            bits = (step % max(output.low + output.high, 1)) >= output.low
+        elif output.type == constants.DwfDigitalOutTypeCustom.value and output.data.size > 0:
+            bits = output.data[step % output.data.size] != 0
+        elif output.type == constants.DwfDigitalOutTypePlay.value and device.digital_play.data.size > 0:
+            # the play buffer is circular
+            index = numpy.maximum(time * device.digital_play.rate, 0).astype(numpy.int64) % device.digital_play.data.size
+            bits = ((device.digital_play.data[index] >> channel) & 1) != 0
+        elif output.type == constants.DwfDigitalOutTypeRandom.value:
+            bits = (numpy.random.default_rng(channel).integers(0, 2, 4096)[step % 4096]) != 0
+        else:
+            continue
+        words = (words & ~numpy.uint32(1 << channel)) | (bits.astype(numpy.uint32) << channel)
+    return words
+
+def __digital_input__(device, first, count):
+    """ return the sample words recorded by the logic analyzer, starting at the given sample """
+    frequency = limits.digital_in_frequency / max(device.digital_in.divider, 1)
+    time = (device.digital_in.configured - device.start) + (first + numpy.arange(count)) / frequency
+    return __digital_output__(device, time).astype(numpy.uint16)
+
+def FDwfDigitalInBitsInfo(handle, bits):
+    __store__(bits, limits.digital_in_bits)
+    return 1
+
+def FDwfDigitalInBufferSizeInfo(handle, size):
+    __store__(size, limits.digital_in_buffer)
+    return 1
+
+def FDwfDigitalInInternalClockInfo(handle, frequency):
+    __store__(frequency, limits.digital_in_frequency)
+    return 1
+
+FDwfDigitalInDividerSet = __setter__("digital_in", "divider", lambda value: max(int(value), 1))
+FDwfDigitalInSampleFormatSet = __setter__("digital_in", "format", int)
+FDwfDigitalInBufferSizeSet = __setter__("digital_in", "buffer_size", lambda value: min(max(int(value), 16), limits.digital_in_buffer))
+FDwfDigitalInAcquisitionModeSet = __setter__("digital_in", "mode", int)
+FDwfDigitalInTriggerPositionSet = __setter__("digital_in", "position", int)
+FDwfDigitalInTriggerSourceSet = __setter__("digital_in", "trigger_source", int)
+FDwfDigitalInTriggerPrefillSet = __accept__
+FDwfDigitalInTriggerSet = __accept__
+FDwfDigitalInTriggerResetSet = __accept__
+FDwfDigitalInTriggerAutoTimeoutSet = __accept__
+FDwfDigitalInTriggerLengthSet = __accept__
+FDwfDigitalInTriggerCountSet = __accept__
+
+def FDwfDigitalInConfigure(handle, reconfigure, start):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.digital_in.running = bool(__value__(start))
+    device.digital_in.configured = perf_counter()
+    device.digital_in.consumed = 0
+    device.digital_in.triggered = False
+    device.digital_in.samples = None
+    return 1
+
+def FDwfDigitalInStatus(handle, read_data, status):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    digital_in = device.digital_in
+    if not digital_in.running:
+        __store__(status, constants.stsRdy.value)
+        return 1
+    if not __triggered__(device, digital_in):
+        __store__(status, constants.stsArm.value)
+        return 1
+    frequency = limits.digital_in_frequency / max(digital_in.divider, 1)
+    produced = __produced__(digital_in, frequency, digital_in.buffer_size)
+    if digital_in.mode == constants.acqmodeRecord.value:
+        # record mode: the status reports the newly arrived samples
+        total = digital_in.position
+        if total > 0:
+            produced = min(produced, total)
+        available = produced - digital_in.consumed
+        lost = max(0, available - digital_in.buffer_size)
+        digital_in.samples = (__digital_input__(device, digital_in.consumed + lost, available - lost), lost)
+        digital_in.consumed = produced
+        if total > 0 and produced >= total:
+            digital_in.running = False
+            __store__(status, constants.stsDone.value)
+        else:
+            __store__(status, constants.stsTrig.value)
+        return 1
+    if produced >= digital_in.buffer_size:
+        # single acquisition finished
+        if __value__(read_data):
+            digital_in.samples = (__digital_input__(device, 0, digital_in.buffer_size), 0)
+        digital_in.running = False
+        __store__(status, constants.stsDone.value)
+    else:
+        __store__(status, constants.stsTrig.value)
+    return 1
+
+def FDwfDigitalInStatusRecord(handle, available, lost, corrupted):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    samples, lost_count = device.digital_in.samples if device.digital_in.samples is not None else (numpy.zeros(0, dtype=numpy.uint16), 0)
+    __store__(available, samples.size)
+    __store__(lost, lost_count)
+    __store__(corrupted, 0)
+    return 1
+
+def FDwfDigitalInStatusData(handle, buffer, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    if device.digital_in.samples is None:
+        return __fail__("No data available")
+    samples = device.digital_in.samples[0]
+    count = min(__value__(count) // 2, samples.size)
+    __array__(buffer, ctypes.c_uint16, count)[:] = samples[samples.size - count:]
+    return 1
+
+def FDwfDigitalInReset(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.digital_in = __state__(device.index).digital_in
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfDigitalOutCount(handle, count):
+    __store__(count, limits.digital_out_channels)
+    return 1
+
+def FDwfDigitalOutDataInfo(handle, channel, size):
+    __store__(size, limits.digital_out_buffer)
+    return 1
+
+def FDwfDigitalOutInternalClockInfo(handle, frequency):
+    __store__(frequency, limits.digital_out_frequency)
+    return 1
+
+def FDwfDigitalOutCounterInfo(handle, channel, minimum, maximum):
+    __store__(maximum, limits.digital_out_counter)
+    return 1
+
+def FDwfDigitalOutDividerInfo(handle, channel, minimum, maximum):
+    __store__(minimum, 1)
+    __store__(maximum, limits.digital_out_divider)
+    return 1
+
+def __digital_out_setter__(attribute, convert):
+    """ create a function setting one parameter of a digital output channel """
+    def function(handle, channel, value):
+        device = __device__(handle)
+        if device is None:
+            return __fail__("Invalid device handle")
+        channel = __value__(channel)
+        if not 0 <= channel < limits.digital_out_channels:
+            return __fail__("Invalid channel index")
+        setattr(device.digital_out[channel], attribute, convert(__value__(value)))
+        return 1
+    return function
+
+FDwfDigitalOutEnableSet = __digital_out_setter__("enable", bool)
+FDwfDigitalOutTypeSet = __digital_out_setter__("type", int)
+FDwfDigitalOutDividerSet = __digital_out_setter__("divider", lambda value: max(int(value), 1))
+FDwfDigitalOutIdleSet = __digital_out_setter__("idle", int)
+FDwfDigitalOutWaitSet = __accept__
+
+def FDwfDigitalOutRepeatSet(handle, repeat):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.digital_out_repeat = int(__value__(repeat))
+    return 1
+
+def FDwfDigitalOutRunSet(handle, run):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.digital_out_run = float(__value__(run))
+    return 1
+
+FDwfDigitalOutRepeatTriggerSet = __accept__
+FDwfDigitalOutTriggerSourceSet = __accept__
+FDwfDigitalOutTriggerSlopeSet = __accept__
+
+def FDwfDigitalOutCounterSet(handle, channel, low, high):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    channel = __value__(channel)
+    if not 0 <= channel < limits.digital_out_channels:
+        return __fail__("Invalid channel index")
+    device.digital_out[channel].low = __value__(low)
+    device.digital_out[channel].high = __value__(high)
+    return 1
+
+def FDwfDigitalOutDataSet(handle, channel, data, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    channel = __value__(channel)
+    count = __value__(count)
+    if not 0 <= channel < limits.digital_out_channels:
+        return __fail__("Invalid channel index")
+    if count > limits.digital_out_buffer:
+        return __fail__("Data size exceeds the buffer size")
+    packed = __array__(data, ctypes.c_ubyte, (count + 7) >> 3)
+    device.digital_out[channel].data = numpy.unpackbits(packed, bitorder="little")[:count].copy()
+    return 1
+
+def FDwfDigitalOutPlayRateSet(handle, rate):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.digital_play.rate = float(__value__(rate))
+    return 1
+
+def FDwfDigitalOutPlayDataSet(handle, data, bits, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    bits = __value__(bits)
+    ctype = {8: ctypes.c_uint8, 16: ctypes.c_uint16, 32: ctypes.c_uint32}.get(bits)
+    if ctype is None:
+        return __fail__("Invalid number of bits per sample")
+    device.digital_play.bits = bits
+    device.digital_play.data = __array__(data, ctype, __value__(count)).astype(numpy.uint32)
+    return 1
+
+def FDwfDigitalOutPlayUpdateSet(handle, data, index, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    index = __value__(index)
+    count = __value__(count)
+    if index + count > device.digital_play.data.size:
+        return __fail__("Data exceeds the play buffer")
+    ctype = {8: ctypes.c_uint8, 16: ctypes.c_uint16, 32: ctypes.c_uint32}[device.digital_play.bits]
+    device.digital_play.data[index:index + count] = __array__(data, ctype, count)
+    return 1
+
+def FDwfDigitalOutConfigure(handle, start):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.digital_out_running = bool(__value__(start))
+    device.digital_out_started = perf_counter()
+    return 1
+
+def FDwfDigitalOutStatus(handle, status):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    # a finite run stops after its last repetition
+    if device.digital_out_running and device.digital_out_run > 0 and device.digital_out_repeat > 0:
+        if __elapsed__(device.digital_out_started) >= device.digital_out_run * device.digital_out_repeat:
+            device.digital_out_running = False
+    __store__(status, constants.DwfStateRunning.value if device.digital_out_running else constants.DwfStateDone.value)
+    return 1
+
+def FDwfDigitalOutReset(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    fresh = __state__(device.index)
+    device.digital_out = fresh.digital_out
+    device.digital_out_running = False
+    device.digital_play = fresh.digital_play
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfDigitalIOOutputEnableSet(handle, mask):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.io_enable = int(__value__(mask)) & 0xFFFF
+    return 1
+
+def FDwfDigitalIOOutputEnableGet(handle, mask):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    __store__(mask, device.io_enable)
+    return 1
+
+def FDwfDigitalIOOutputSet(handle, mask):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.io_output = int(__value__(mask)) & 0xFFFF
+    return 1
+
+def FDwfDigitalIOOutputGet(handle, mask):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    __store__(mask, device.io_output)
+    return 1
+
+def FDwfDigitalIOStatus(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.io_status = int(__digital_output__(device, numpy.array([__elapsed__(device.start)]))[0])
+    return 1
+
+def FDwfDigitalIOInputStatus(handle, mask):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    __store__(mask, device.io_status)
+    return 1
+
+def FDwfDigitalIOReset(handle):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    device.io_enable = 0
+    device.io_output = 0
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+FDwfDigitalUartReset = __accept__
+FDwfDigitalUartRateSet = __accept__
+FDwfDigitalUartTxSet = __accept__
+FDwfDigitalUartRxSet = __accept__
+FDwfDigitalUartBitsSet = __accept__
+FDwfDigitalUartParitySet = __accept__
+FDwfDigitalUartStopSet = __accept__
+
+def FDwfDigitalUartTx(handle, data, count):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    # the transmitted bytes are looped back to the receiver
+    device.uart += bytes(__array__(data, ctypes.c_ubyte, __value__(count)))
+    return 1
+
+def FDwfDigitalUartRx(handle, data, size, count, parity):
+    device = __device__(handle)
+    if device is None:
+        return __fail__("Invalid device handle")
+    size = min(__value__(size), len(device.uart))
+    __array__(data, ctypes.c_ubyte, size)[:] = numpy.frombuffer(bytes(device.uart[:size]), dtype=numpy.ubyte)
+    del device.uart[:size]
+    __store__(count, size)
+    __store__(parity, 0)
+    return 1
+
+FDwfDigitalSpiReset = __accept__
+FDwfDigitalSpiFrequencySet = __accept__
+FDwfDigitalSpiClockSet = __accept__
+FDwfDigitalSpiDataSet = __accept__
+FDwfDigitalSpiIdleSet = __accept__
+FDwfDigitalSpiModeSet = __accept__
+FDwfDigitalSpiOrderSet = __accept__
+FDwfDigitalSpiSelect = __accept__
+FDwfDigitalSpiWriteOne = __accept__
+FDwfDigitalSpiWrite = __accept__
+
+def FDwfDigitalSpiRead(handle, mode, bits, data, count):
+    __array__(data, ctypes.c_ubyte, __value__(count))[:] = 0
+    return 1
+
+def FDwfDigitalSpiWriteRead(handle, mode, bits, tx_data, tx_count, rx_data, rx_count):
+    # MISO is looped back to MOSI
+    received = __array__(rx_data, ctypes.c_ubyte, __value__(rx_count))
+    sent = __array__(tx_data, ctypes.c_ubyte, __value__(tx_count))
+    received[:] = 0
+    length = min(received.size, sent.size)
+    received[:length] = sent[:length]
+    return 1
+
+FDwfDigitalI2cReset = __accept__
+FDwfDigitalI2cStretchSet = __accept__
+FDwfDigitalI2cRateSet = __accept__
+FDwfDigitalI2cSclSet = __accept__
+FDwfDigitalI2cSdaSet = __accept__
+
+def FDwfDigitalI2cClear(handle, free):
+    __store__(free, 1)
+    return 1
+
+def FDwfDigitalI2cWrite(handle, address, data, count, nak):
+    __store__(nak, 0)
+    return 1
+
+def FDwfDigitalI2cRead(handle, address, data, count, nak):
+    __array__(data, ctypes.c_ubyte, __value__(count))[:] = 0
+    __store__(nak, 0)
+    return 1
+
+def FDwfDigitalI2cWriteRead(handle, address, tx_data, tx_count, rx_data, rx_count, nak):
+    __array__(rx_data, ctypes.c_ubyte, __value__(rx_count))[:] = 0
+    __store__(nak, 0)
+    return 1
+
+"""-----------------------------------------------------------------------"""
+
+def FDwfSpectrumWindow(window, count, window_type, beta, noise_equivalent_bandwidth):
+    count = __value__(count)
+    window_type = __value__(window_type)
+    functions = {constants.DwfWindowRectangular.value: numpy.ones, constants.DwfWindowTriangular.value: numpy.bartlett,
+                 constants.DwfWindowHamming.value: numpy.hamming, constants.DwfWindowHann.value: numpy.hanning,
+                 constants.DwfWindowBlackmanHarris.value: numpy.blackman}
+    __array__(window, ctypes.c_double, count)[:] = functions.get(window_type, numpy.hanning)(count)
+    return 1
+
+def FDwfSpectrumTransform(buffer, count, spectrum, phase, spectrum_count, start, stop):
+    count = __value__(count)
+    spectrum_count = __value__(spectrum_count)
+    samples = __array__(buffer, ctypes.c_double, count)
+    magnitude = numpy.abs(numpy.fft.rfft(samples)) * 2 / max(count, 1)
+    bins = numpy.linspace(__value__(start), __value__(stop), spectrum_count) * (magnitude.size - 1)
+    __array__(spectrum, ctypes.c_double, spectrum_count)[:] = numpy.maximum(numpy.interp(bins, numpy.arange(magnitude.size), magnitude), 1e-12)
+    return 1
@@ -1,33 +1,20 @@
-""" STATIC I/O CONTROL FUNCTIONS: set_mode, get_state, set_state, set_current, set_pull, close """
+""" STATIC I/O CONTROL FUNCTIONS: set_mode, get_state, set_state, read_all, write_mask, watch, wait_edge, watch_status, unwatch, set_current, set_pull, close """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+import asyncio                    # awaitable edges
+import threading                  # background polling
+import numpy                      # edge detection for every watch at once
+from time import perf_counter     # needed for timing the polls
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked, shadowed, written
+from WF_SDK.device import instrument, node
 
 """-----------------------------------------------------------------------"""
 
 class data:
-    """ stores the state of the instrument """
+    """ stores the state of the instrument (the defaults, every device keeps its own copy) """
     channel = -1
     count = 0
     class nodes :
@@ -35,6 +22,28 @@ class data:
         pull_enable = -1
         pull_direction = -1
         pull_weak = -1
+    class watcher:
+        interval = 0            # polling interval in seconds
+        callbacks = {}          # watch id: callback
+        ids = []                # watch ids, in the order of the masks
+        rising = None           # NumPy array of the lines watched for rising edges, one mask for every watch
+        falling = None          # NumPy array of the lines watched for falling edges
+        next_id = 1
+        polls = 0
+        started = 0             # perf_counter time of the first poll
+        latency = 0             # longest time between two polls
+        errors = {}             # watch id: the first exception raised by its callback, or by the poller
+        __thread__ = None
+        __stop__ = None
+        __lock__ = threading.Lock()     # guards the watches and the poller, every device gets its own
+
+"""-----------------------------------------------------------------------"""
+
+class edge:
+    """ DIO line edge directions """
+    rising = 1
+    falling = 2
+    both = 3
 
 """-----------------------------------------------------------------------"""
 
@@ -54,29 +63,28 @@ def set_mode(device_data, channel, output):
                     - selected DIO channel number
                     - True means output, False means input
     """
+    static_data = instrument(device_data, data)
+
     if device_data.name == "Digital Discovery":
         channel = channel - 24
 
     # count the DIO channels
-    global data
-    data.count = min(device_data.digital.input.channel_count, device_data.digital.output.channel_count)
+    static_data.count = min(device_data.digital.input.channel_count, device_data.digital.output.channel_count)
 
     # load current state of the output enable buffer
-    mask = ctypes.c_uint16()
-    if dwf.FDwfDigitalIOOutputEnableGet(device_data.handle, ctypes.byref(mask)) == 0:
-        check_error()
+    mask = ctypes.c_uint()
+    checked.FDwfDigitalIOOutputEnableGet(device_data.handle, ctypes.byref(mask))
     mask = mask.value
     
     # set bit in mask
     if output == True:
-        mask |= __rotate_left__(1, channel, data.count)
+        mask |= __rotate_left__(1, channel, static_data.count)
     else:
-        bits = pow(2, data.count) - 2
-        mask &= __rotate_left__(bits, channel, data.count)
+        bits = pow(2, static_data.count) - 2
+        mask &= __rotate_left__(bits, channel, static_data.count)
     
     # set the pin to output
-    if dwf.FDwfDigitalIOOutputEnableSet(device_data.handle, ctypes.c_int(mask)) == 0:
-        check_error()
+    checked.FDwfDigitalIOOutputEnableSet(device_data.handle, mask)
     return
 
 """-----------------------------------------------------------------------"""
@@ -93,18 +101,8 @@ def get_state(device_data, channel):
     if device_data.name == "Digital Discovery":
         channel = channel - 24
 
-    # load internal buffer with current state of the pins
-    if dwf.FDwfDigitalIOStatus(device_data.handle) == 0:
-        check_error()
-    
-    # get the current state of the pins
-    data = ctypes.c_uint32()  # variable for this current state
-    if dwf.FDwfDigitalIOInputStatus(device_data.handle, ctypes.byref(data)) == 0:
-        check_error()
-    data = data.value
-    
     # check the required bit
-    if data & (1 << channel) != 0:
+    if read_all(device_data) & (1 << channel) != 0:
         value = True
     else:
         value = False
@@ -114,7 +112,7 @@ def get_state(device_data, channel):
 
 def set_state(device_data, channel, value):
     """
-        set a DIO line as input, or as output
+        set a DIO line HIGH, or LOW
 
         parameters: - device data
                     - selected DIO channel number
@@ -123,25 +121,168 @@ def set_state(device_data, channel, value):
     if device_data.name == "Digital Discovery":
         channel = channel - 24
 
-    # count the DIO channels
-    global data
-    data.count = min(device_data.digital.input.channel_count, device_data.digital.output.channel_count)
+    # set the pin state
+    write_mask(device_data, 1 << channel, (1 << channel) if value else 0)
+    return
 
-    # load current state of the output state buffer
-    mask = ctypes.c_uint16()
-    if dwf.FDwfDigitalIOOutputGet(device_data.handle, ctypes.byref(mask)) == 0:
-        check_error()
-    
-    # set bit in mask
-    if value == True:
-        mask |= __rotate_left__(1, channel, data.count)
-    else:
-        bits = pow(2, data.count) - 2
-        mask &= __rotate_left__(bits, channel, data.count)
+"""-----------------------------------------------------------------------"""
+
+def read_all(device_data):
+    """
+        get the state of every DIO line with a single status read
+
+        parameters: - device data
+
+        returns:    - an integer, bit n is the state of DIO line n (DIO 24 + n on the Digital Discovery)
+    """
+    # load internal buffer with current state of the pins
+    checked.FDwfDigitalIOStatus(device_data.handle)
     
-    # set the pin state
-    if dwf.FDwfDigitalIOOutputSet(device_data.handle, ctypes.c_int(mask)) == 0:
-        check_error()
+    # get the current state of the pins
+    data = ctypes.c_uint32()  # variable for this current state
+    checked.FDwfDigitalIOInputStatus(device_data.handle, ctypes.byref(data))
+    return data.value
+
+"""-----------------------------------------------------------------------"""
+
+def write_mask(device_data, mask, value):
+    """
+        set the state of several DIO lines at once
+
+        parameters: - device data
+                    - mask: an integer, the lines of the set bits are changed (bit n is DIO line n, or DIO 24 + n on the Digital Discovery)
+                    - value: an integer, the new states of the changed lines are its bits
+    """
+    # start from the last written output state, it is read from the device only once
+    state = written(device_data.handle, "FDwfDigitalIOOutputSet")
+    if state is None:
+        state = ctypes.c_uint()
+        checked.FDwfDigitalIOOutputGet(device_data.handle, ctypes.byref(state))
+        state = state.value
+
+    # set the pin states
+    state = (state & ~mask) | (value & mask)
+    shadowed.FDwfDigitalIOOutputSet(device_data.handle, state)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def watch(device_data, callback, mask=0xFFFFFFFF, direction=edge.both, interval=1e-03):
+    """
+        call a function when DIO lines change, the lines are polled in the background
+
+        every poll reads every line with a single status read, and is compared to the previous one for every watch at once
+
+        parameters: - device data
+                    - callback: function(state, changed, time), called from the polling thread (keep it short)
+                      with the state of every line, the watched lines which changed (as in read_all) and the perf_counter time of the poll
+                    - mask of the watched lines (bit n is DIO line n, or DIO 24 + n on the Digital Discovery), default is every line
+                    - direction - possible: edge.rising, edge.falling, edge.both, default is both
+                    - polling interval in seconds, default is 1ms, 0 polls continuously (the first watch of a device sets it)
+
+        returns:    - the watch id, for unwatch()
+    """
+    watcher = instrument(device_data, data).watcher
+    with watcher.__lock__:
+        watch_id = watcher.next_id
+        watcher.next_id += 1
+        watcher.callbacks[watch_id] = callback
+        watcher.ids.append(watch_id)
+        rising = mask if direction & edge.rising else 0
+        falling = mask if direction & edge.falling else 0
+        watcher.rising = numpy.append(watcher.rising if watcher.rising is not None else numpy.zeros(0, dtype=numpy.int64), rising)
+        watcher.falling = numpy.append(watcher.falling if watcher.falling is not None else numpy.zeros(0, dtype=numpy.int64), falling)
+
+        # start polling with the first watch, or again if the poller stopped on an error
+        if watcher.__thread__ is None or not watcher.__thread__.is_alive():
+            watcher.interval = interval
+            watcher.polls = 0
+            watcher.latency = 0
+            watcher.__stop__ = threading.Event()
+            watcher.__thread__ = threading.Thread(target=__poll__, args=(device_data, watcher, watcher.__stop__), daemon=True)
+            watcher.__thread__.start()
+    return watch_id
+
+"""-----------------------------------------------------------------------"""
+
+async def wait_edge(device_data, mask=0xFFFFFFFF, direction=edge.both, timeout=None):
+    """
+        wait for a change of DIO lines in asyncio code
+
+        parameters: - device data
+                    - mask of the watched lines, as in watch()
+                    - direction - possible: edge.rising, edge.falling, edge.both, default is both
+                    - timeout in seconds, default is None (no timeout), asyncio.TimeoutError is raised when it expires
+
+        returns:    - the state of every line, the watched lines which changed and the time of the poll, as passed to the callbacks of watch()
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    def resolve(result):
+        if not future.done():
+            future.set_result(result)
+        return
+    watch_id = watch(device_data, lambda *result: loop.call_soon_threadsafe(resolve, result), mask, direction)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    finally:
+        unwatch(device_data, watch_id)
+
+"""-----------------------------------------------------------------------"""
+
+def watch_status(device_data):
+    """
+        return the performance of the DIO watcher
+
+        parameters: - device data
+
+        returns:    - the measured poll rate in Hz
+                    - the worst-case detection latency in seconds (the longest time between the starts of two polls,
+                      a change is seen by the next poll at the latest)
+    """
+    watcher = instrument(device_data, data).watcher
+    elapsed = perf_counter() - watcher.started
+    if watcher.polls == 0 or elapsed <= 0:
+        return 0, 0
+    return watcher.polls / elapsed, watcher.latency
+
+"""-----------------------------------------------------------------------"""
+
+def unwatch(device_data, watch_id=None):
+    """
+        stop a watch, polling stops with the last one
+
+        the first exception raised by the callback of the watch, or by the poller while the watch was active, is raised here
+
+        parameters: - device data
+                    - the watch id returned by watch(), default is None (every watch)
+    """
+    watcher = instrument(device_data, data).watcher
+    errors = []
+    thread = None
+    with watcher.__lock__:
+        for index in reversed(range(len(watcher.ids))):
+            if watch_id is None or watcher.ids[index] == watch_id:
+                if watcher.ids[index] in watcher.errors:
+                    errors.insert(0, watcher.errors.pop(watcher.ids[index]))
+                del watcher.callbacks[watcher.ids[index]]
+                del watcher.ids[index]
+                watcher.rising = numpy.delete(watcher.rising, index)
+                watcher.falling = numpy.delete(watcher.falling, index)
+
+        # stop polling with the last watch, a later watch() starts a new poller
+        if len(watcher.ids) == 0 and watcher.__thread__ is not None:
+            watcher.__stop__.set()
+            thread = watcher.__thread__
+            watcher.__thread__ = None
+
+    # wait for the poller outside the lock, as the poller takes it too
+    if thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+    # report the errors of the removed watches
+    if len(errors) > 0:
+        raise errors[0]
     return
 
 """-----------------------------------------------------------------------"""
@@ -153,25 +294,15 @@ def set_current(device_data, current):
         parameters: - device data
                     - current limit in mA: possible values are 2, 4, 6, 8, 12 and 16mA
     """
-    # search for the digital voltage channel
-    global data
-    for channel_index in range(device_data.analog.IO.channel_count):
-        if device_data.analog.IO.channel_label[channel_index] == "VDD":
-            data.channel = channel_index
-            break
+    static_data = instrument(device_data, data)
 
-    # search for the drive node
-    if data.channel >= 0:
-        for node_index in range(device_data.analog.IO.node_count[data.channel]):
-            if device_data.analog.IO.node_name[data.channel][node_index] == "Drive":
-                data.nodes.current = node_index
-                break
+    # find the drive node of the digital voltage channel
+    static_data.channel, static_data.nodes.current = node(device_data, "VDD", "Drive")
 
     # set limit
-    if data.channel >= 0 and data.nodes.current >= 0:
-        current = max(min(current, device_data.analog.IO.max_set_range[data.channel][data.nodes.current]), device_data.analog.IO.min_set_range[data.channel][data.nodes.current])
-        if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, data.channel, data.nodes.current, ctypes.c_double(current)) == 0:
-            check_error()
+    if static_data.channel >= 0 and static_data.nodes.current >= 0:
+        current = max(min(current, device_data.analog.IO.max_set_range[static_data.channel][static_data.nodes.current]), device_data.analog.IO.min_set_range[static_data.channel][static_data.nodes.current])
+        checked.FDwfAnalogIOChannelNodeSet(device_data.handle, static_data.channel, static_data.nodes.current, current)
     return
 
 """-----------------------------------------------------------------------"""
@@ -184,67 +315,42 @@ def set_pull(device_data, channel, direction):
                     - selected DIO channel number
                     - direction: pull.up, pull.idle, or pull.down
     """
+    static_data = instrument(device_data, data)
+
     if device_data.name == "Digital Discovery":
         channel = channel - 24
         
     # count the DIO channels
-    global data
-    data.count = min(device_data.digital.input.channel_count, device_data.digital.output.channel_count)
-
-    # search for the digital voltage channel
-    for channel_index in range(device_data.analog.IO.channel_count):
-        if device_data.analog.IO.channel_label[channel_index] == "VDD":
-            data.channel = channel_index
-            break
+    static_data.count = min(device_data.digital.input.channel_count, device_data.digital.output.channel_count)
 
-    # search for the pull enable node
-    if data.channel >= 0:
-        for node_index in range(device_data.analog.IO.node_count[data.channel]):
-            if device_data.analog.IO.node_name[data.channel][node_index] == "DIOPE":
-                data.nodes.pull_enable = node_index
-                break
-
-    # search for the pull direction node
-    if data.channel >= 0:
-        for node_index in range(device_data.analog.IO.node_count[data.channel]):
-            if device_data.analog.IO.node_name[data.channel][node_index] == "DIOPP":
-                data.nodes.pull_direction = node_index
-                break
-
-    # search for the weak pull node
-    if data.channel >= 0:
-        for node_index in range(device_data.analog.IO.node_count[data.channel]):
-            if device_data.analog.IO.node_name[data.channel][node_index] == "DINPP":
-                data.nodes.pull_weak = node_index
-                break
+    # find the pull enable, the pull direction and the weak pull nodes of the digital voltage channel
+    static_data.channel, static_data.nodes.pull_enable = node(device_data, "VDD", "DIOPE")
+    static_data.nodes.pull_direction = node(device_data, "VDD", "DIOPP")[1]
+    static_data.nodes.pull_weak = node(device_data, "VDD", "DINPP")[1]
 
     # set pull enable mask
-    mask = ctypes.c_uint16()
-    if dwf.FDwfAnalogIOChannelNodeGet(device_data.handle, data.channel, data.nodes.pull_enable, ctypes.byref(mask)) == 0:
-        check_error()
-    bitmask = int(mask)
+    mask = ctypes.c_double()
+    checked.FDwfAnalogIOChannelNodeGet(device_data.handle, static_data.channel, static_data.nodes.pull_enable, ctypes.byref(mask))
+    bitmask = int(mask.value)
     if direction == pull.idle:
-        bitmask |= __rotate_left__(1, channel, data.count)
+        bitmask |= __rotate_left__(1, channel, static_data.count)
     else:
-        bits = int(pow(2, data.count) - 2)
-        bitmask &= __rotate_left__(bits, channel, data.count)
-    if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, data.channel, data.nodes.pull_enable, bitmask) == 0:
-        check_error()
+        bits = int(pow(2, static_data.count) - 2)
+        bitmask &= __rotate_left__(bits, channel, static_data.count)
+    checked.FDwfAnalogIOChannelNodeSet(device_data.handle, static_data.channel, static_data.nodes.pull_enable, bitmask)
 
     # set direction if necessary
     if direction != pull.idle:
         # set direction mask
-        mask = ctypes.c_uint16()
-        if dwf.FDwfAnalogIOChannelNodeGet(device_data.handle, data.channel, data.nodes.pull_direction, ctypes.byref(mask)) == 0:
-            check_error()
-        bitmask = int(mask)
+        mask = ctypes.c_double()
+        checked.FDwfAnalogIOChannelNodeGet(device_data.handle, static_data.channel, static_data.nodes.pull_direction, ctypes.byref(mask))
+        bitmask = int(mask.value)
         if direction == pull.up:
-            bitmask |= __rotate_left__(1, channel, data.count)
+            bitmask |= __rotate_left__(1, channel, static_data.count)
         else:
-            bits = int(pow(2, data.count) - 2)
-            bitmask &= __rotate_left__(bits, channel, data.count)
-        if dwf.FDwfAnalogIOChannelNodeSet(device_data.handle, data.channel, data.nodes.pull_direction, bitmask) == 0:
-            check_error()
+            bits = int(pow(2, static_data.count) - 2)
+            bitmask &= __rotate_left__(bits, channel, static_data.count)
+        checked.FDwfAnalogIOChannelNodeSet(device_data.handle, static_data.channel, static_data.nodes.pull_direction, bitmask)
     return
 
 """-----------------------------------------------------------------------"""
@@ -253,8 +359,7 @@ def close(device_data):
     """
         reset the instrument
     """
-    if dwf.FDwfDigitalIOReset(device_data.handle) == 0:
-        check_error()
+    checked.FDwfDigitalIOReset(device_data.handle)
     return
 
 """-----------------------------------------------------------------------"""
@@ -264,3 +369,51 @@ def __rotate_left__(number, position, size=16):
         rotate left a number bitwise
     """
     return (number << position) | (number >> (size - position))
+
+"""-----------------------------------------------------------------------"""
+
+def __poll__(device_data, watcher, stop):
+    """
+        background poller of the DIO watcher: read every line, then call the callbacks of the watches with an edge,
+        until its own stop event is set
+    """
+    previous = None
+    watcher.started = perf_counter()
+    last = watcher.started
+    while not stop.is_set():
+        if previous is not None and watcher.interval > 0:
+            stop.wait(watcher.interval)
+        start = perf_counter()
+        try:
+            state = read_all(device_data)
+        except Exception as exception:
+            # the device was closed, or disconnected, every active watch gets the error
+            with watcher.__lock__:
+                for watch_id in watcher.ids:
+                    watcher.errors.setdefault(watch_id, exception)
+            break
+        if previous is None:
+            # the first read is the reference of the edges
+            previous = state
+            continue
+        watcher.latency = max(watcher.latency, perf_counter() - last)
+        last = start
+        watcher.polls += 1
+
+        changed = state ^ previous
+        previous = state
+        if changed == 0:
+            continue
+
+        # find the watches with an edge, all at once
+        with watcher.__lock__:
+            hits = (watcher.rising & (changed & state)) | (watcher.falling & (changed & ~state))
+            calls = [(watcher.ids[index], watcher.callbacks[watcher.ids[index]], int(hits[index])) for index in numpy.flatnonzero(hits)]
+        for watch_id, callback, lines in calls:
+            try:
+                callback(state, lines, start)
+            except Exception as exception:
+                with watcher.__lock__:
+                    if watch_id in watcher.callbacks:
+                        watcher.errors.setdefault(watch_id, exception)
+    return
@@ -1,28 +1,12 @@
-""" TOOLS: spectrum """
+""" TOOLS: spectrum, reader """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
 from math import log10, sqrt      # import necessary math functions
+import numpy                      # fast array handling
 
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked
 
 """-----------------------------------------------------------------------"""
 
@@ -52,7 +36,7 @@ def spectrum(buffer, window, sample_rate, frequency_start, frequency_stop):
     # get and apply window
     buffer_length = len(buffer)
     window_buffer = (ctypes.c_double * buffer_length)()   # create an empty buffer
-    dwf.FDwfSpectrumWindow(window_buffer, ctypes.c_int(buffer_length), window, ctypes.c_double(1), ctypes.c_double(0))
+    checked.FDwfSpectrumWindow(window_buffer, buffer_length, window, 1, None)
     for index in range(buffer_length):
         buffer[index] *= float(window_buffer[index])
 
@@ -64,8 +48,55 @@ def spectrum(buffer, window, sample_rate, frequency_start, frequency_stop):
         c_buffer[index] = ctypes.c_double(buffer[index])
     frequency_start = max(frequency_start * 2.0 / sample_rate, 0.0)
     frequency_stop = min(frequency_stop * 2.0 / sample_rate, 1.0)
-    dwf.FDwfSpectrumTransform(c_buffer, ctypes.c_int(buffer_length), c_spectrum, ctypes.c_int(0), ctypes.c_int(spectrum_length), ctypes.c_double(frequency_start), ctypes.c_double(frequency_stop))
+    checked.FDwfSpectrumTransform(c_buffer, buffer_length, c_spectrum, None, spectrum_length, frequency_start, frequency_stop)
     spectrum = []
     for index in range(spectrum_length):
         spectrum.append(20.0 * log10(float(c_spectrum[index]) / sqrt(2)))
     return spectrum
+
+"""-----------------------------------------------------------------------"""
+
+def reader(samples, dtype=numpy.float64):
+    """
+        read a signal block by block, used by the streamed playback of the instruments
+
+        parameters: - samples: a list, a NumPy array, a memory-mapped file (numpy.memmap), a buffer (like bytes),
+                      or an iterable (like a generator) of samples, or of arrays of samples
+                    - type of the returned blocks, default is numpy.float64
+
+        returns:    - a function returning the next (at most) count samples as a NumPy array, an empty array at the end
+                    - the number of samples, None for iterables
+    """
+    if isinstance(samples, (list, tuple)):
+        samples = numpy.asarray(samples, dtype=dtype)
+    elif not isinstance(samples, numpy.ndarray):
+        try:
+            samples = numpy.asarray(memoryview(samples))   # buffer protocol objects
+        except TypeError:
+            pass
+
+    if isinstance(samples, numpy.ndarray):
+        position = [0]
+        def read(count):
+            # only the slice is read from a memory-mapped file, and converted
+            block = numpy.asarray(samples[position[0]:position[0] + count], dtype=dtype)
+            position[0] += block.size
+            return block
+        return read, samples.size
+
+    iterator = iter(samples)
+    pending = [numpy.zeros(0, dtype=dtype)]
+    def read(count):
+        # collect the items of the iterable until the count is reached, the rest is kept for the next read
+        blocks = [pending[0]]
+        size = pending[0].size
+        for item in iterator:
+            item = numpy.atleast_1d(numpy.asarray(item, dtype=dtype))
+            blocks.append(item)
+            size += item.size
+            if size >= count:
+                break
+        block = numpy.concatenate(blocks)
+        pending[0] = block[count:]
+        return block[:count]
+    return read, None
@@ -1,28 +1,21 @@
-""" WAVEFORM GENERATOR CONTROL FUNCTIONS: generate, close, enable, disable """
+""" WAVEFORM GENERATOR CONTROL FUNCTIONS: generate, update, play, close, enable, disable """
 
 import ctypes                     # import the C compatible data types
-from sys import platform, path    # this is needed to check the OS type and get the PATH
-from os import sep                # OS specific file path separators
-
-# load the dynamic library, get constants path (the path is OS specific)
-if platform.startswith("win"):
-    # on Windows
-    dwf = ctypes.cdll.dwf
-    constants_path = "C:" + sep + "Program Files (x86)" + sep + "Digilent" + sep + "WaveFormsSDK" + sep + "samples" + sep + "py"
-elif platform.startswith("darwin"):
-    # on macOS
-    lib_path = sep + "Library" + sep + "Frameworks" + sep + "dwf.framework" + sep + "dwf"
-    dwf = ctypes.cdll.LoadLibrary(lib_path)
-    constants_path = sep + "Applications" + sep + "WaveForms.app" + sep + "Contents" + sep + "Resources" + sep + "SDK" + sep + "samples" + sep + "py"
-else:
-    # on Linux
-    dwf = ctypes.cdll.LoadLibrary("libdwf.so")
-    constants_path = sep + "usr" + sep + "share" + sep + "digilent" + sep + "waveforms" + sep + "samples" + sep + "py"
-
-# import constants
-path.append(constants_path)
-import dwfconstants as constants
-from WF_SDK.device import check_error
+import hashlib                    # content hash of the custom waveforms
+import numpy                      # fast array handling
+from time import sleep            # needed for delays
+
+# import constants and the library
+from WF_SDK.loader import constants
+from WF_SDK.backend import checked, shadowed, written
+from WF_SDK.device import instrument, wait_policy, error
+from WF_SDK import tools
+
+"""-----------------------------------------------------------------------"""
+
+class state:
+    """ stores the content hash of the custom waveform loaded on every channel (the defaults, every device keeps its own copy) """
+    loaded = {}
 
 """-----------------------------------------------------------------------"""
 
@@ -46,6 +39,8 @@ def generate(device_data, channel, function, offset, frequency=1e03, amplitude=1
     """
         generate an analog signal
 
+        the settings equal to the ones written by the previous call are not sent to the device again
+
         parameters: - device data
                     - the selected wavegen channel (1-2)
                     - function - possible: custom, sine, square, triangle, noise, ds, pulse, trapezium, sine_power, ramp_up, ramp_down
@@ -56,84 +51,211 @@ def generate(device_data, channel, function, offset, frequency=1e03, amplitude=1
                     - wait time in seconds, default is 0s
                     - run time in seconds, default is infinite (0)
                     - repeat count, default is infinite (0)
-                    - data - list of voltages, used only if function=custom, default is empty
+                    - data - list, NumPy array, or other buffer of voltages, used only if function=custom, default is empty
+                      (a waveform already loaded on the channel is not sent again)
     """
+    wavegen_state = instrument(device_data, state)
+
+    channel = channel - 1
+
+    # the device still holds the waveform loaded by the previous call if the function wasn't changed, or reset since
+    if function == constants.funcCustom:
+        buffer = numpy.ascontiguousarray(data, dtype=numpy.float64)
+        digest = hashlib.blake2b(buffer, digest_size=16).digest()
+        loaded = written(device_data.handle, "FDwfAnalogOutNodeFunctionSet", channel, constants.AnalogOutNodeCarrier) == constants.funcCustom.value and wavegen_state.loaded.get(channel) == digest
+
     # enable channel
-    channel = ctypes.c_int(channel - 1)
-    if dwf.FDwfAnalogOutNodeEnableSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, ctypes.c_bool(True)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutNodeEnableSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, True)
     
     # set function type
-    if dwf.FDwfAnalogOutNodeFunctionSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, function) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutNodeFunctionSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, function)
     
     # load data if the function type is custom
-    if function == constants.funcCustom:
-        data_length = len(data)
-        buffer = (ctypes.c_double * data_length)()
-        for index in range(0, len(buffer)):
-            buffer[index] = ctypes.c_double(data[index])
-        if dwf.FDwfAnalogOutNodeDataSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, buffer, ctypes.c_int(data_length)) == 0:
-            check_error()
+    if function == constants.funcCustom and not loaded:
+        checked.FDwfAnalogOutNodeDataSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, buffer.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), len(buffer))
+        wavegen_state.loaded[channel] = digest
     
     # set frequency
-    if dwf.FDwfAnalogOutNodeFrequencySet(device_data.handle, channel, constants.AnalogOutNodeCarrier, ctypes.c_double(frequency)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutNodeFrequencySet(device_data.handle, channel, constants.AnalogOutNodeCarrier, frequency)
     
     # set amplitude or DC voltage
-    if dwf.FDwfAnalogOutNodeAmplitudeSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, ctypes.c_double(amplitude)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutNodeAmplitudeSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, amplitude)
     
     # set offset
-    if dwf.FDwfAnalogOutNodeOffsetSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, ctypes.c_double(offset)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutNodeOffsetSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, offset)
     
     # set symmetry
-    if dwf.FDwfAnalogOutNodeSymmetrySet(device_data.handle, channel, constants.AnalogOutNodeCarrier, ctypes.c_double(symmetry)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutNodeSymmetrySet(device_data.handle, channel, constants.AnalogOutNodeCarrier, symmetry)
     
     # set running time limit
-    if dwf.FDwfAnalogOutRunSet(device_data.handle, channel, ctypes.c_double(run_time)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutRunSet(device_data.handle, channel, run_time)
     
     # set wait time before start
-    if dwf.FDwfAnalogOutWaitSet(device_data.handle, channel, ctypes.c_double(wait)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutWaitSet(device_data.handle, channel, wait)
     
     # set number of repeating cycles
-    if dwf.FDwfAnalogOutRepeatSet(device_data.handle, channel, ctypes.c_int(repeat)) == 0:
-        check_error()
+    shadowed.FDwfAnalogOutRepeatSet(device_data.handle, channel, repeat)
     
     # start
-    if dwf.FDwfAnalogOutConfigure(device_data.handle, channel, ctypes.c_bool(True)) == 0:
-        check_error()
+    checked.FDwfAnalogOutConfigure(device_data.handle, channel, True)
+    return
+
+"""-----------------------------------------------------------------------"""
+
+def update(device_data, channel, frequency=None, amplitude=None, offset=None, symmetry=None):
+    """
+        change parameters of a running signal, without restarting it
+
+        only the given parameters which differ from the ones written before are sent to the device,
+        then they are applied together
+
+        parameters: - device data
+                    - the selected wavegen channel (1-2)
+                    - frequency in Hz, default is None (unchanged)
+                    - amplitude in Volts, default is None (unchanged)
+                    - offset voltage in Volts, default is None (unchanged)
+                    - signal symmetry in percentage, default is None (unchanged)
+    """
+    channel = channel - 1
+    changed = False
+    for setter, value in ((shadowed.FDwfAnalogOutNodeFrequencySet, frequency), (shadowed.FDwfAnalogOutNodeAmplitudeSet, amplitude),
+                          (shadowed.FDwfAnalogOutNodeOffsetSet, offset), (shadowed.FDwfAnalogOutNodeSymmetrySet, symmetry)):
+        if value is None:
+            continue
+        name = setter.__name__
+        if written(device_data.handle, name, channel, constants.AnalogOutNodeCarrier) != value:
+            setter(device_data.handle, channel, constants.AnalogOutNodeCarrier, value)
+            changed = True
+
+    # apply the new parameters (3 = apply, without restarting)
+    if changed:
+        checked.FDwfAnalogOutConfigure(device_data.handle, channel, 3)
     return
 
 """-----------------------------------------------------------------------"""
 
+def play(device_data, channel, samples, sampling_frequency, amplitude=0, offset=0):
+    """
+        play a signal of any length sample by sample, the samples are streamed to the device while the channel runs
+
+        parameters: - device data
+                    - the selected wavegen channel (1-2)
+                    - samples: voltages in a list, a NumPy array, a memory-mapped file (numpy.memmap),
+                      or an iterable (like a generator) of voltages, or of arrays of voltages
+                    - sampling frequency in Hz
+                    - amplitude in Volts: the largest distance of the samples from the offset,
+                      default is 0 (found from an array in memory, it must be given for memory-mapped files
+                      and iterables, as finding it would read every sample before the start)
+                    - offset voltage in Volts, default is 0V
+
+        returns:    - the number of samples sent to the device
+                    - the number of samples lost, because the buffer of the device ran empty (underruns)
+                    - the number of samples possibly corrupted
+    """
+    channel = channel - 1
+    read, length = tools.reader(samples)
+
+    # find the amplitude of an array
+    if amplitude == 0:
+        if length is None or isinstance(samples, numpy.memmap):
+            raise error("The amplitude of a generated signal, or of a memory-mapped file must be given", "play", "wavegen")
+        if length > 0:
+            amplitude = max(abs(float(numpy.max(samples)) - offset), abs(float(numpy.min(samples)) - offset))
+        if amplitude == 0:
+            amplitude = 1
+
+    # set up the channel for playback, a finite signal stops after its last sample
+    checked.FDwfAnalogOutNodeEnableSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, True)
+    checked.FDwfAnalogOutNodeFunctionSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, constants.funcPlay)
+    checked.FDwfAnalogOutNodeFrequencySet(device_data.handle, channel, constants.AnalogOutNodeCarrier, sampling_frequency)
+    checked.FDwfAnalogOutNodeAmplitudeSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, amplitude)
+    checked.FDwfAnalogOutNodeOffsetSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, offset)
+    checked.FDwfAnalogOutRunSet(device_data.handle, channel, 0 if length is None else length / sampling_frequency)
+    checked.FDwfAnalogOutWaitSet(device_data.handle, channel, 0)
+    checked.FDwfAnalogOutRepeatSet(device_data.handle, channel, 1)
+
+    # fill the buffer of the device before the start
+    buffer_size = device_data.analog.output.max_buffer_size[max(channel, 0)][constants.AnalogOutNodeCarrier.value]
+    block = __normalize__(read(buffer_size), amplitude, offset)
+    if block.size == 0:
+        return 0, 0, 0
+    checked.FDwfAnalogOutNodeDataSet(device_data.handle, channel, constants.AnalogOutNodeCarrier, block.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), block.size)
+    checked.FDwfAnalogOutConfigure(device_data.handle, channel, True)
+
+    sent = block.size
+    lost_count = 0
+    corrupted_count = 0
+    exhausted = False
+    # sleep while at least half of the buffer is queued, but no longer than a quarter of its playing time
+    interval = min(buffer_size / sampling_frequency / 4, wait_policy.max_interval)
+
+    # variables to store the playback state
+    status = ctypes.c_ubyte()
+    free = ctypes.c_int()
+    lost = ctypes.c_int()
+    corrupted = ctypes.c_int()
+
+    try:
+        while True:
+            checked.FDwfAnalogOutStatus(device_data.handle, channel, ctypes.byref(status))
+            if status.value != constants.DwfStateRunning.value:
+                break
+            checked.FDwfAnalogOutNodePlayStatus(device_data.handle, channel, constants.AnalogOutNodeCarrier, ctypes.byref(free), ctypes.byref(lost), ctypes.byref(corrupted))
+
+            if exhausted:
+                # an endless playback is stopped when the device played every sample
+                if length is None and free.value >= buffer_size:
+                    break
+                sleep(interval)
+                continue
+            lost_count += lost.value
+            corrupted_count += corrupted.value
+
+            # send as many new samples as the device has room for
+            if free.value > 0:
+                block = __normalize__(read(free.value), amplitude, offset)
+                if block.size == 0:
+                    exhausted = True
+                    continue
+                checked.FDwfAnalogOutNodePlayData(device_data.handle, channel, constants.AnalogOutNodeCarrier, block.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), block.size)
+                sent += block.size
+            if free.value < buffer_size // 2:
+                sleep(interval)
+    finally:
+        # stop the channel (a finite signal is already stopped, unless playback was interrupted)
+        checked.FDwfAnalogOutConfigure(device_data.handle, channel, False)
+    return sent, lost_count, corrupted_count
+
+"""-----------------------------------------------------------------------"""
+
 def close(device_data, channel=0):
     """
         reset a wavegen channel, or all channels (channel=0)
     """
-    channel = ctypes.c_int(channel - 1)
-    if dwf.FDwfAnalogOutReset(device_data.handle, channel) == 0:
-        check_error()
+    channel = channel - 1
+    checked.FDwfAnalogOutReset(device_data.handle, channel)
     return
 
 """-----------------------------------------------------------------------"""
 
 def enable(device_data, channel):
     """ enables an analog output channel """
-    channel = ctypes.c_int(channel - 1)
-    if dwf.FDwfAnalogOutConfigure(device_data.handle, channel, ctypes.c_bool(True)) == 0:
-        check_error()
+    channel = channel - 1
+    checked.FDwfAnalogOutConfigure(device_data.handle, channel, True)
     return
 
 """-----------------------------------------------------------------------"""
 
 def disable(device_data, channel):
     """ disables an analog output channel """
-    channel = ctypes.c_int(channel - 1)
-    if dwf.FDwfAnalogOutConfigure(device_data.handle, channel, ctypes.c_bool(False)) == 0:
-        check_error()
+    channel = channel - 1
+    checked.FDwfAnalogOutConfigure(device_data.handle, channel, False)
     return
+
+"""-----------------------------------------------------------------------"""
+
+def __normalize__(block, amplitude, offset):
+    """
+        scale a block of voltages to the -1..1 range of the device
+    """
+    return numpy.clip((numpy.asarray(block, dtype=numpy.float64) - offset) / amplitude, -1, 1)
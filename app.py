@@ -52,8 +52,8 @@ def stream_data():
                 for _ in range(session_count):
                     sample_start_time = time.time()
                     
-                    buffer_ch1 = scope.record(device_data, channel=1)
-                    buffer_ch2 = scope.record(device_data, channel=2)
+                    # record both channels with a single, time-aligned acquisition
+                    buffer_ch1, buffer_ch2 = scope.record_channels(device_data, channels=[1, 2]).tolist()
                     
                     num_samples = len(buffer_ch1)
                     
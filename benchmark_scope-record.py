@@ -0,0 +1,33 @@
+from WF_SDK import device, scope, backend, simulator   # import instruments
+
+from time import perf_counter     # needed for timing
+
+"""-----------------------------------------------------------------------"""
+
+def measure(device_data, as_array, repeat):
+    """
+        return the average duration of a record call in seconds
+    """
+    start = perf_counter()
+    for _ in range(repeat):
+        scope.record(device_data, channel=1, as_array=as_array)
+    return (perf_counter() - start) / repeat
+
+"""-----------------------------------------------------------------------"""
+
+# replace the dynamic library with the simulated device, finish acquisitions instantly
+backend.use(backend.simulated)
+simulator.settings.realtime = False
+
+# connect to the device
+device_data = device.open()
+
+for buffer_size in [1024, 4096, 8192]:
+    scope.open(device_data, buffer_size=buffer_size)
+    list_time = measure(device_data, as_array=False, repeat=100)
+    array_time = measure(device_data, as_array=True, repeat=100)
+    print("buffer size {:6d}: list {:8.1f} us, array {:8.1f} us, speedup {:5.1f}x".format(buffer_size, list_time * 1e06, array_time * 1e06, list_time / array_time))
+
+# close the connection
+scope.close(device_data)
+device.close(device_data)
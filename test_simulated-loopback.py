@@ -0,0 +1,82 @@
+from WF_SDK import device, scope, wavegen, logic, pattern, static, backend, error   # import instruments
+
+import numpy                      # needed for checking the recordings
+
+"""-----------------------------------------------------------------------"""
+
+DIO_PATTERN = 0
+DIO_STATIC = 3
+
+"""-----------------------------------------------------------------------"""
+
+def rising_edges(buffer):
+    """
+        return the indices of the rising edges in a logic recording
+    """
+    buffer = numpy.asarray(buffer)
+    return numpy.flatnonzero((buffer[1:] == 1) & (buffer[:-1] == 0)) + 1
+
+"""-----------------------------------------------------------------------"""
+
+# replace the dynamic library with the simulated device (as WF_SDK_BACKEND=simulated does), no hardware is needed
+backend.use(backend.simulated)
+
+try:
+    # connect to the device
+    device_data = device.open()
+
+    """-----------------------------------"""
+
+    # wavegen -> scope: a 1KHz, 2V sine wave recorded at 1MHz
+    scope.open(device_data, sampling_frequency=1e06, buffer_size=8192)
+    wavegen.generate(device_data, channel=1, function=wavegen.function.sine, offset=0, frequency=1e03, amplitude=2)
+    buffer = scope.record(device_data, channel=1, as_array=True)
+
+    assert abs(buffer.max() - 2) < 0.1 and abs(buffer.min() + 2) < 0.1, "wrong amplitude: " + str(buffer.min()) + "V to " + str(buffer.max()) + "V"
+    crossings = numpy.flatnonzero((buffer[1:] >= 0) & (buffer[:-1] < 0))
+    frequency = 1e06 / numpy.mean(numpy.diff(crossings))
+    assert abs(frequency - 1e03) < 10, "wrong frequency: " + str(frequency) + "Hz"
+    print("wavegen -> scope: passed")
+
+    wavegen.close(device_data)
+    scope.close(device_data)
+
+    """-----------------------------------"""
+
+    # pattern -> logic: a 100KHz PWM signal with 30% duty cycle recorded at 10MHz
+    logic.open(device_data, sampling_frequency=10e06, buffer_size=4096)
+    pattern.generate(device_data, channel=DIO_PATTERN, function=pattern.function.pulse, frequency=100e03, duty_cycle=30)
+    buffer = numpy.asarray(logic.record(device_data, channel=DIO_PATTERN))
+
+    edges = rising_edges(buffer)
+    assert len(edges) > 2, "no signal on DIO " + str(DIO_PATTERN)
+    frequency = 10e06 / numpy.mean(numpy.diff(edges))
+    duty_cycle = 100 * numpy.mean(buffer[edges[0]:edges[-1]])
+    assert abs(frequency - 100e03) < 1e03, "wrong frequency: " + str(frequency) + "Hz"
+    assert abs(duty_cycle - 30) < 2, "wrong duty cycle: " + str(duty_cycle) + "%"
+    print("pattern -> logic: passed")
+
+    pattern.close(device_data)
+
+    """-----------------------------------"""
+
+    # static I/O -> logic: a DIO line set high, then low
+    static.set_mode(device_data, DIO_STATIC, True)
+    for state in [True, False]:
+        static.set_state(device_data, DIO_STATIC, state)
+        buffer = numpy.asarray(logic.record(device_data, channel=DIO_STATIC))
+        assert numpy.all(buffer == int(state)), "DIO " + str(DIO_STATIC) + " is not " + ("high" if state else "low")
+    print("static I/O -> logic: passed")
+
+    logic.close(device_data)
+    static.close(device_data)
+
+    """-----------------------------------"""
+
+    # close the connection
+    device.close(device_data)
+
+except error as e:
+    print(e)
+    # close the connection
+    device.close(device.data)